@@ -4,6 +4,7 @@ Handles GDPR and HIPAA compliance features
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
@@ -12,7 +13,6 @@ from app.models.user import User
 from app.schemas.security import (
     ConsentRecordCreate,
     ConsentRecordResponse,
-    GDPRDataExportResponse,
     GDPRDeleteRequest,
     DataClassificationCreate,
     DataClassificationResponse
@@ -20,36 +20,30 @@ from app.schemas.security import (
 from app.services.gdpr_service import GDPRService
 from app.services.hipaa_service import HIPAAService
 from app.services.audit_service import AuditService
-import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 
 router = APIRouter()
 
 
 # ===== GDPR Endpoints =====
 
-@router.get("/gdpr/export", response_model=GDPRDataExportResponse)
+@router.get("/gdpr/export")
 def export_user_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Export all user data (GDPR)"""
+    """Export all user data as a streamed JSON document (GDPR)"""
     gdpr_service = GDPRService(db)
     
-    # Export data
-    data = gdpr_service.export_user_data(current_user)
-    
     # Log the export
     audit_service = AuditService(db)
     audit_service.log_gdpr_export(current_user)
     
-    # In production, create a downloadable file and return URL
-    export_id = str(uuid.uuid4())
-    
-    return GDPRDataExportResponse(
-        export_id=export_id,
-        download_url=f"/api/compliance/gdpr/download/{export_id}",
-        expires_at=datetime.utcnow() + timedelta(days=7)
+    filename = f"nexbii-export-{datetime.utcnow():%Y%m%d}.json"
+    return StreamingResponse(
+        gdpr_service.stream_user_data(current_user),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 
@@ -141,16 +135,7 @@ def list_phi_classifications(
     """List PHI classifications"""
     hipaa_service = HIPAAService(db)
     
-    if datasource_id:
-        classifications = hipaa_service.get_phi_columns(datasource_id, current_user.tenant_id)
-    else:
-        from app.models.security import DataClassification, DataClassificationType
-        classifications = db.query(DataClassification).filter(
-            DataClassification.tenant_id == current_user.tenant_id,
-            DataClassification.classification == DataClassificationType.PHI
-        ).all()
-    
-    return classifications
+    return hipaa_service.get_phi_columns(datasource_id, current_user.tenant_id)
 
 
 @router.post("/hipaa/classify", response_model=DataClassificationResponse, status_code=status.HTTP_201_CREATED)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
 from ...core.database import get_db
@@ -74,9 +75,14 @@ async def test_datasource_connection(
     is_valid = await service.test_connection(test_data.type, test_data.connection_config)
     return {"valid": is_valid}
 
-@router.get("/{datasource_id}/schema", response_model=SchemaResponse)
+@router.get(
+    "/{datasource_id}/schema",
+    response_class=ORJSONResponse,
+    responses={status.HTTP_200_OK: {"model": SchemaResponse}}
+)
 async def get_datasource_schema(
     datasource_id: str,
+    refresh: bool = False,
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -88,8 +94,13 @@ async def get_datasource_schema(
         )
     
     service = DataSourceService()
-    schema = await service.get_schema(datasource.type, datasource.connection_config)
-    return SchemaResponse(tables=schema)
+    schema = await service.get_schema(
+        datasource.type, datasource.connection_config,
+        force_refresh=refresh, datasource_id=datasource.id
+    )
+    # Large schemas have thousands of column dicts; serialize them straight
+    # with orjson. SchemaResponse only documents the shape, it is not validated
+    return ORJSONResponse({"tables": schema})
 
 @router.delete("/{datasource_id}")
 async def delete_datasource(
@@ -107,6 +118,14 @@ async def delete_datasource(
     # Invalidate cache for this datasource
     cache_service = CacheService()
     invalidated_count = cache_service.invalidate_datasource_cache(datasource_id)
+    DataSourceService.invalidate_schema(datasource_id)
+    # Other active data sources with the same connection settings share the pool
+    in_use = db.query(DataSource.type, DataSource.connection_config).filter(
+        DataSource.id != datasource_id,
+        DataSource.is_active == True,
+        DataSource.type.in_(DataSourceService.pool_sharing_types(datasource.type))
+    ).all()
+    await DataSourceService.close_pools(datasource.type, datasource.connection_config or {}, in_use)
     
     datasource.is_active = False
     db.commit()
@@ -638,7 +638,7 @@ async def verify_custom_domain(
     
     from app.services.dns_verification_service import DNSVerificationService
     
-    result = DNSVerificationService.verify_domain(
+    result = await DNSVerificationService.verify_domain(
         domain.domain,
         domain.verification_method,
         domain.verification_token
@@ -0,0 +1,22 @@
+"""
+Primary key generation
+"""
+import os
+import time
+
+
+def uuid7() -> str:
+    """
+    Time-ordered UUID (RFC 9562 version 7) as a string.
+
+    The leading 48 bits are the Unix time in milliseconds, so new keys land
+    at the end of the primary-key index instead of at random pages.
+    """
+    value = (time.time_ns() // 1_000_000 & 0xFFFF_FFFF_FFFF) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    # Formatted directly; building a uuid.UUID just to str() it costs more
+    # than generating the value
+    digits = f"{value:032x}"
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
@@ -0,0 +1,43 @@
+"""
+Migration script for Phase 4.4 - Data Governance indexes
+Adds the indexes declared on the governance, audit log and data
+classification models to databases whose tables were created before
+they existed
+"""
+import sys
+import os
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.models.governance import DataCatalogEntry, DataLineage, AccessRequest
+from app.models.security import AuditLog, DataClassification
+
+
+def run_migration():
+    """
+    Create any missing governance indexes
+    """
+    print("🚀 Starting Phase 4.4 Data Governance index migration...")
+
+    try:
+        with engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+            # Dialect-specific indexes (ddl_if) are skipped automatically
+            for model in (DataCatalogEntry, DataLineage, AccessRequest, AuditLog, DataClassification):
+                for index in model.__table__.indexes:
+                    index.create(bind=conn, checkfirst=True)
+
+        print("\n🎉 Phase 4.4 index migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    run_migration()
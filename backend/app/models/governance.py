@@ -2,12 +2,12 @@
 Data Governance Models for NexBII Platform
 Phase 4.4: Data Governance
 """
-from sqlalchemy import Column, String, Boolean, DateTime, JSON, Text, Integer, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, DateTime, JSON, Text, Integer, ForeignKey, Index, DDL, event, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
-import uuid
 import enum
 from app.core.database import Base
+from app.core.ids import uuid7
 
 
 class ClassificationLevel(str, enum.Enum):
@@ -46,7 +46,7 @@ class DataCatalogEntry(Base):
     """
     __tablename__ = "data_catalog_entries"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=uuid7)
     tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
     
     # Resource identification
@@ -85,6 +85,30 @@ class DataCatalogEntry(Base):
     # Relationships
     tenant = relationship("Tenant", back_populates="catalog_entries")
     datasource = relationship("DataSource")
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_catalog_tenant_datasource', 'tenant_id', 'datasource_id'),
+        Index('idx_catalog_tenant_pii', 'tenant_id', 'is_pii'),
+        Index('idx_catalog_tenant_classification', 'tenant_id', 'classification_level'),
+        Index('idx_catalog_tenant_column', 'tenant_id', 'column_name'),
+        # Trigram indexes let the catalog search's ILIKE '%term%' use an
+        # index scan; PostgreSQL only, and need the pg_trgm extension below
+        *(
+            Index(
+                f'idx_catalog_{column}_trgm', column,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+            ).ddl_if(dialect='postgresql')
+            for column in ('table_name', 'column_name', 'description', 'display_name')
+        ),
+    )
+
+
+event.listen(
+    DataCatalogEntry.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
 
 
 class DataLineage(Base):
@@ -94,7 +118,7 @@ class DataLineage(Base):
     """
     __tablename__ = "data_lineage"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=uuid7)
     tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
     
     # Source information
@@ -123,6 +147,12 @@ class DataLineage(Base):
     
     # Relationships
     tenant = relationship("Tenant", back_populates="lineage_entries")
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_lineage_tenant_source', 'tenant_id', 'source_type', 'source_id', 'is_active'),
+        Index('idx_lineage_tenant_target', 'tenant_id', 'target_type', 'target_id', 'is_active'),
+    )
 
 
 class DataClassificationRule(Base):
@@ -132,7 +162,7 @@ class DataClassificationRule(Base):
     """
     __tablename__ = "data_classification_rules"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=uuid7)
     tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
     
     # Rule identification
@@ -168,7 +198,7 @@ class AccessRequest(Base):
     """
     __tablename__ = "access_requests"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=uuid7)
     tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
     
     # Requester information
@@ -207,6 +237,12 @@ class AccessRequest(Base):
     requester = relationship("User", foreign_keys=[requester_id])
     approver = relationship("User", foreign_keys=[approver_id])
     compliance_approver = relationship("User", foreign_keys=[compliance_approver_id])
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_access_request_tenant_status', 'tenant_id', 'status'),
+        Index('idx_access_request_tenant_requester', 'tenant_id', 'requester_id'),
+    )
 
 
 class DataImpactAnalysis(Base):
@@ -216,7 +252,7 @@ class DataImpactAnalysis(Base):
     """
     __tablename__ = "data_impact_analysis"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String(36), primary_key=True, default=uuid7)
     tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
     
     # Change information
@@ -3,9 +3,10 @@ Security Models for Phase 4.3
 Includes RLS, CLS, Data Masking, SSO, MFA, Audit Logs, and Compliance
 """
 
-from sqlalchemy import Column, String, Boolean, Integer, JSON, Text, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, JSON, Text, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.ids import uuid7
 from datetime import datetime
 import enum
 
@@ -134,6 +135,12 @@ class DataClassification(Base):
     datasource = relationship("DataSource")
     masking_rule = relationship("DataMaskingRule")
     classifier = relationship("User", foreign_keys=[classified_by])
+    
+    # Indexes
+    __table_args__ = (
+        # Covers the PHI lookups and the HIPAA report's aggregates
+        Index('idx_data_classification_tenant_class', 'tenant_id', 'classification', 'datasource_id', 'table_name'),
+    )
 
 
 class OAuthProvider(Base):
@@ -278,7 +285,7 @@ class MFAConfig(Base):
     secret_key = Column(String, nullable=False)  # Encrypted
     
     # Backup codes (one-time use)
-    backup_codes = Column(JSON, default=[])  # List of encrypted backup codes
+    backup_codes = Column(JSON, default=dict)  # SHA-256 hash of each backup code -> still unused
     
     is_enabled = Column(Boolean, default=False)
     enrollment_completed = Column(Boolean, default=False)
@@ -340,6 +347,12 @@ class AuditLog(Base):
     # Relationships
     tenant = relationship("Tenant")
     user = relationship("User")
+    
+    # Indexes
+    __table_args__ = (
+        # Newest-first per user, as read by the GDPR export
+        Index('idx_audit_log_user_created', 'user_id', created_at.desc()),
+    )
 
 
 class ConsentRecord(Base):
@@ -348,7 +361,7 @@ class ConsentRecord(Base):
     """
     __tablename__ = "consent_records"
 
-    id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True, default=uuid7)
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"))
     
     # Consent type
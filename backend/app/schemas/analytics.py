@@ -113,6 +113,7 @@ class DataProfilingRequest(BaseModel):
     table_name: Optional[str] = None
     query: Optional[str] = None
     sample_size: Optional[int] = 10000
+    exact: bool = False  # Compute quartiles over every row instead of a sample
 
 
 class ColumnProfile(BaseModel):
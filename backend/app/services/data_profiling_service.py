@@ -2,6 +2,10 @@
 Data Profiling Service
 Automatic data quality assessment, missing values, outliers, distributions
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
@@ -14,6 +18,47 @@ from app.schemas.analytics import (
     DataProfilingRequest, DataProfilingResponse, ColumnProfile
 )
 
+# Columns longer than this estimate quartiles from a random sample of this many rows
+QUANTILE_SAMPLE_THRESHOLD = 100_000
+
+
+def _numeric_column_stats(values: np.ndarray, exact: bool = False) -> Dict[str, Any]:
+    """
+    Summary statistics for a numeric column with missing values removed.
+    Works on a plain float array so it can run in a worker thread while the
+    numpy reductions release the GIL. Unless exact is set, quartiles of very
+    long columns are estimated from a fixed-seed sample; outliers are still
+    counted over every row against the estimated bounds.
+    """
+    if len(values) == 0:
+        return {
+            "mean": None, "median": None, "std": None, "min": None, "max": None,
+            "quartiles": {"Q1": None, "Q2": None, "Q3": None},
+            "outliers_count": 0
+        }
+
+    quantile_values = values
+    if not exact and len(values) > QUANTILE_SAMPLE_THRESHOLD:
+        rng = np.random.default_rng(0)
+        quantile_values = rng.choice(values, QUANTILE_SAMPLE_THRESHOLD, replace=False)
+    q1, q2, q3 = (float(q) for q in np.quantile(quantile_values, [0.25, 0.50, 0.75]))
+
+    # Outlier detection (IQR method)
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+    outliers_count = int(np.count_nonzero((values < lower_bound) | (values > upper_bound)))
+
+    return {
+        "mean": float(values.mean()),
+        "median": q2,
+        "std": float(values.std(ddof=1)) if len(values) > 1 else float("nan"),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "quartiles": {"Q1": q1, "Q2": q2, "Q3": q3},
+        "outliers_count": outliers_count
+    }
+
 
 class DataProfilingService:
     """Service for data quality assessment and profiling"""
@@ -49,16 +94,18 @@ class DataProfilingService:
         df = await self.execute_query(request.datasource_id, query)
         
         # Profile each column
+        numeric_stats = self._compute_numeric_stats(df, exact=request.exact)
         column_profiles = []
         for col in df.columns:
-            profile = self._profile_column(df, col)
+            profile = self._profile_column(df, col, numeric_stats.get(col))
             column_profiles.append(profile)
         
         # Calculate correlation matrix for numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        numeric_df = df.select_dtypes(include=[np.number])
+        numeric_cols = numeric_df.columns.tolist()
         correlation_matrix = None
         if len(numeric_cols) >= 2:
-            corr = df[numeric_cols].corr()
+            corr = numeric_df.corr()
             correlation_matrix = {
                 "columns": numeric_cols,
                 "matrix": corr.values.tolist()
@@ -79,7 +126,24 @@ class DataProfilingService:
             issues=issues
         )
 
-    def _profile_column(self, df: pd.DataFrame, column: str) -> ColumnProfile:
+    def _compute_numeric_stats(self, df: pd.DataFrame,
+                               exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Compute statistics for all numeric columns, one worker thread per column"""
+        buffers = {
+            col: df[col].dropna().to_numpy(dtype=np.float64)
+            for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col])
+        }
+        if len(buffers) < 2:
+            return {col: _numeric_column_stats(values, exact) for col, values in buffers.items()}
+
+        max_workers = min(len(buffers), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(partial(_numeric_column_stats, exact=exact), buffers.values())
+            return dict(zip(buffers.keys(), results))
+
+    def _profile_column(self, df: pd.DataFrame, column: str,
+                        numeric_stats: Optional[Dict[str, Any]] = None) -> ColumnProfile:
         """Profile a single column"""
         series = df[column]
         
@@ -94,24 +158,19 @@ class DataProfilingService:
         
         # Numeric column profiling
         if pd.api.types.is_numeric_dtype(series):
-            clean_series = series.dropna()
+            if numeric_stats is None:
+                numeric_stats = _numeric_column_stats(series.dropna().to_numpy(dtype=np.float64))
             
             # Statistical measures
-            mean_val = float(clean_series.mean()) if len(clean_series) > 0 else None
-            median_val = float(clean_series.median()) if len(clean_series) > 0 else None
-            std_val = float(clean_series.std()) if len(clean_series) > 0 else None
-            min_val = float(clean_series.min()) if len(clean_series) > 0 else None
-            max_val = float(clean_series.max()) if len(clean_series) > 0 else None
+            mean_val = numeric_stats["mean"]
+            median_val = numeric_stats["median"]
+            std_val = numeric_stats["std"]
+            min_val = numeric_stats["min"]
+            max_val = numeric_stats["max"]
             
-            # Quartiles
-            quartiles = {
-                "Q1": float(clean_series.quantile(0.25)) if len(clean_series) > 0 else None,
-                "Q2": float(clean_series.quantile(0.50)) if len(clean_series) > 0 else None,
-                "Q3": float(clean_series.quantile(0.75)) if len(clean_series) > 0 else None
-            }
-            
-            # Outlier detection (IQR method)
-            outliers_count = self._detect_outliers_iqr(clean_series)
+            # Quartiles and outliers
+            quartiles = numeric_stats["quartiles"]
+            outliers_count = numeric_stats["outliers_count"]
             
             # Top values (less relevant for continuous numeric)
             top_values = None
@@ -150,20 +209,17 @@ class DataProfilingService:
             top_values=top_values
         )
 
-    def _detect_outliers_iqr(self, series: pd.Series) -> int:
-        """Detect outliers using IQR method"""
-        if len(series) == 0:
-            return 0
-        
-        Q1 = series.quantile(0.25)
-        Q3 = series.quantile(0.75)
-        IQR = Q3 - Q1
-        
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        
-        outliers = series[(series < lower_bound) | (series > upper_bound)]
-        return len(outliers)
+    def _top_value_counts(self, series: pd.Series, k: int) -> pd.Series:
+        """
+        Return the k most frequent values of a series, most frequent first.
+        Counts are hashed without sorting and only the top k are ordered, so
+        high-cardinality columns avoid a full sort of every distinct value.
+        """
+        counts = series.value_counts(dropna=True, sort=False)
+        if len(counts) > k:
+            idx = np.argpartition(-counts.to_numpy(), k)[:k]
+            counts = counts.iloc[idx]
+        return counts.sort_values(ascending=False, kind="stable")
 
     def _calculate_quality_score(self, df: pd.DataFrame, profiles: List[ColumnProfile]) -> float:
         """
@@ -203,25 +259,32 @@ class DataProfilingService:
     def _identify_issues(self, df: pd.DataFrame, profiles: List[ColumnProfile]) -> List[str]:
         """Identify data quality issues"""
         issues = []
+        if not profiles:
+            return issues
+        
+        names = [p.column_name for p in profiles]
+        missing_pct = np.array([p.missing_percentage for p in profiles], dtype=float)
+        missing_count = np.array([p.missing_count for p in profiles])
+        unique_count = np.array([p.unique_count for p in profiles])
         
         # Check for high missing values
-        for p in profiles:
-            if p.missing_percentage > 50:
-                issues.append(f"Column '{p.column_name}' has {p.missing_percentage:.1f}% missing values")
-            elif p.missing_percentage > 20:
-                issues.append(f"Column '{p.column_name}' has {p.missing_percentage:.1f}% missing values (moderate)")
+        for i in np.flatnonzero(missing_pct > 20):
+            if missing_pct[i] > 50:
+                issues.append(f"Column '{names[i]}' has {missing_pct[i]:.1f}% missing values")
+            else:
+                issues.append(f"Column '{names[i]}' has {missing_pct[i]:.1f}% missing values (moderate)")
         
         # Check for low variance
-        for p in profiles:
-            if p.unique_count == 1 and p.missing_count < len(df):
-                issues.append(f"Column '{p.column_name}' has only one unique value (constant)")
+        for i in np.flatnonzero((unique_count == 1) & (missing_count < len(df))):
+            issues.append(f"Column '{names[i]}' has only one unique value (constant)")
         
         # Check for high outlier count
-        for p in profiles:
-            if p.outliers_count is not None:
-                outlier_pct = (p.outliers_count / (len(df) - p.missing_count) * 100) if (len(df) - p.missing_count) > 0 else 0
-                if outlier_pct > 10:
-                    issues.append(f"Column '{p.column_name}' has {outlier_pct:.1f}% outliers")
+        has_outliers = np.array([p.outliers_count is not None for p in profiles])
+        outliers = np.array([p.outliers_count or 0 for p in profiles], dtype=float)
+        present = len(df) - missing_count
+        outlier_pct = np.divide(outliers * 100, present, out=np.zeros_like(outliers), where=present > 0)
+        for i in np.flatnonzero(has_outliers & (outlier_pct > 10)):
+            issues.append(f"Column '{names[i]}' has {outlier_pct[i]:.1f}% outliers")
         
         # Check for duplicate rows
         duplicate_count = df.duplicated().sum()
@@ -230,7 +293,7 @@ class DataProfilingService:
             issues.append(f"{duplicate_count} duplicate rows found ({dup_pct:.1f}%)")
         
         # Check for completely empty columns
-        empty_cols = [p.column_name for p in profiles if p.missing_percentage == 100]
+        empty_cols = [names[i] for i in np.flatnonzero(missing_pct == 100)]
         if empty_cols:
             issues.append(f"Completely empty columns: {', '.join(empty_cols)}")
         
@@ -258,7 +321,7 @@ class DataProfilingService:
             }
         else:
             # Bar chart for categorical data
-            value_counts = series.value_counts().head(20)
+            value_counts = self._top_value_counts(series, 20)
             
             return {
                 "type": "bar",
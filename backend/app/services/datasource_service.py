@@ -1,546 +1,1384 @@
-from typing import Dict, Any, List
-import psycopg2
-import mysql.connector
-from pymongo import MongoClient
+from typing import Dict, Any, AsyncIterable, AsyncIterator, List, Callable, Iterable, Iterator, Optional, Set, Tuple, TypeVar
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from types import ModuleType
+import asyncio
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import operator
+import re
+import threading
+import time
+import weakref
 import sqlite3
 from ..models.datasource import DataSourceType
 
-# Optional imports for additional data sources (with fallback)
-try:
-    import pymssql
-    MSSQL_AVAILABLE = True
-except ImportError:
-    MSSQL_AVAILABLE = False
-
-try:
-    import cx_Oracle
-    ORACLE_AVAILABLE = True
-except ImportError:
-    ORACLE_AVAILABLE = False
-
-try:
-    from cassandra.cluster import Cluster
-    CASSANDRA_AVAILABLE = True
-except ImportError:
-    CASSANDRA_AVAILABLE = False
-
-try:
-    import boto3
-    BOTO3_AVAILABLE = True
-except ImportError:
-    BOTO3_AVAILABLE = False
-
-try:
-    from elasticsearch import Elasticsearch
-    ELASTICSEARCH_AVAILABLE = True
-except ImportError:
-    ELASTICSEARCH_AVAILABLE = False
-
-try:
-    import clickhouse_connect
-    CLICKHOUSE_AVAILABLE = True
-except ImportError:
-    CLICKHOUSE_AVAILABLE = False
-
-try:
-    import redis
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-
-try:
-    from google.cloud import bigquery
-    BIGQUERY_AVAILABLE = True
-except ImportError:
-    BIGQUERY_AVAILABLE = False
-
-try:
-    from snowflake.connector import connect as snowflake_connect
-    SNOWFLAKE_AVAILABLE = True
-except ImportError:
-    SNOWFLAKE_AVAILABLE = False
-
-try:
-    import couchdb
-    COUCHDB_AVAILABLE = True
-except ImportError:
-    COUCHDB_AVAILABLE = False
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A misconfigured source polled by a dashboard can fail many times a second;
+# keep at most this many tracebacks per message and source type per window
+LOG_RATE_LIMIT = 10
+LOG_RATE_WINDOW = 60
+
+# Upper bound (seconds) for establishing any data source connection, so an
+# unreachable host fails fast instead of hanging on the OS TCP timeout
+CONNECT_TIMEOUT = 5
+
+# Overall bound on a single test_connection / get_schema driver call
+TEST_CONNECTION_TIMEOUT = CONNECT_TIMEOUT + 2
+SCHEMA_TIMEOUT = 60
+
+# Introspected schemas are reused for this many seconds (or until invalidated)
+SCHEMA_CACHE_TTL = 300
+SCHEMA_CACHE_MAX_ENTRIES = 512
+
+# BigQuery project/dataset names cannot be bound as query parameters
+_BIGQUERY_NAME_PATTERN = re.compile(r"[A-Za-z0-9_.:-]+")
+
+# Upper bound on data sources introspected concurrently by get_schemas_bulk
+BULK_SCHEMA_CONCURRENCY = 8
+
+# SQLite's default SQLITE_MAX_COMPOUND_SELECT; row counts are batched under it
+SQLITE_MAX_COMPOUND_SELECT = 500
+
+# Rows fetched per round-trip when streaming column metadata through server-side cursors
+SCHEMA_CURSOR_BATCH_SIZE = 2000
+
+# Documents sampled per MongoDB collection when inferring its fields; a
+# "schema_sample_size" in the connection config overrides it
+MONGO_SCHEMA_SAMPLE_SIZE = 50
+
+# Shared pools/clients kept per driver; past this many configs the least
+# recently used is closed, as is any left unused for POOL_IDLE_TIMEOUT seconds
+POOL_MAX_ENTRIES = 32
+POOL_IDLE_TIMEOUT = 900
+
+# BSON $type aliases mapped to the Python type names PyMongo decodes them to,
+# which is what MongoDB schemas have always reported
+_BSON_PYTHON_TYPES: Dict[str, str] = {
+    "double": "float",
+    "string": "str",
+    "object": "dict",
+    "array": "list",
+    "binData": "bytes",
+    "undefined": "NoneType",
+    "objectId": "ObjectId",
+    "bool": "bool",
+    "date": "datetime",
+    "null": "NoneType",
+    "regex": "Regex",
+    "dbPointer": "DBRef",
+    "javascript": "Code",
+    "symbol": "str",
+    "javascriptWithScope": "Code",
+    "int": "int",
+    "timestamp": "Timestamp",
+    "long": "Int64",
+    "decimal": "Decimal128",
+    "minKey": "MinKey",
+    "maxKey": "MaxKey",
+}
+
+_DEFAULT_PORTS: Dict[DataSourceType, int] = {
+    DataSourceType.POSTGRESQL: 5432,
+    DataSourceType.TIMESCALEDB: 5432,
+    DataSourceType.MYSQL: 3306,
+    DataSourceType.MARIADB: 3306,
+    DataSourceType.MSSQL: 1433,
+    DataSourceType.ORACLE: 1521,
+    DataSourceType.MONGODB: 27017,
+    DataSourceType.CASSANDRA: 9042,
+    DataSourceType.REDIS: 6379,
+    DataSourceType.ELASTICSEARCH: 9200,
+    DataSourceType.CLICKHOUSE: 8123,
+    DataSourceType.REDSHIFT: 5439,
+    DataSourceType.COUCHDB: 5984,
+}
+
+_DEFAULT_DATABASES: Dict[DataSourceType, Any] = {
+    DataSourceType.CLICKHOUSE: "default",
+    DataSourceType.REDIS: 0,
+}
+
+
+@dataclass(frozen=True)
+class DSParams:
+    """Connection parameters shared by the host/port based data sources"""
+    host: Optional[str]
+    port: Optional[int]
+    user: Optional[str]
+    password: Optional[str]
+    database: Any
+
+
+def _build_params(ds_type: DataSourceType, config: Dict[str, Any]) -> DSParams:
+    database = config.get("database")
+    return DSParams(
+        host=config.get("host"),
+        port=config.get("port") or _DEFAULT_PORTS.get(ds_type),
+        user=config.get("user"),
+        password=config.get("password"),
+        database=_DEFAULT_DATABASES.get(ds_type) if database is None else database
+    )
+
+
+@lru_cache(maxsize=256)
+def _pool_key(ds_type: DataSourceType, frozen: Tuple[Tuple[str, Any], ...]) -> DSParams:
+    """Memoized DSParams for a frozen config, so repeat callers share one key object"""
+    return _build_params(ds_type, dict(frozen))
+
+
+def _normalize_config(ds_type: DataSourceType, config: Dict[str, Any]) -> DSParams:
+    """Read the common connection fields from a config, filling per-type defaults"""
+    try:
+        return _pool_key(ds_type, tuple(sorted(config.items())))
+    except TypeError:
+        # Nested values (e.g. SSL options dicts) are unhashable; build uncached
+        return _build_params(ds_type, config)
+
+
+def _mongo_pool_key(config: Dict[str, Any]) -> Tuple:
+    params = _normalize_config(DataSourceType.MONGODB, config)
+    return (params.host, params.port, params.user, params.password)
+
+
+def _redis_pool_key(config: Dict[str, Any]) -> Tuple:
+    params = _normalize_config(DataSourceType.REDIS, config)
+    return (params.host, params.port, params.database, params.password)
+
+
+def _es_pool_key(config: Dict[str, Any]) -> Tuple:
+    """(url, user, password) for an Elasticsearch config"""
+    params = _normalize_config(DataSourceType.ELASTICSEARCH, config)
+    host = params.host
+    if "://" not in str(host):
+        host = f"http://{host}"
+    return (f"{host}:{params.port}", params.user, params.password)
+
+
+def _cassandra_pool_key(config: Dict[str, Any]) -> Tuple:
+    params = _normalize_config(DataSourceType.CASSANDRA, config)
+    return (params.host, params.port)
+
+
+def _snowflake_params(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "user": config.get("user"),
+        "account": config.get("account"),
+        "warehouse": config.get("warehouse"),
+        "database": config.get("database"),
+        "schema": config.get("schema", "PUBLIC")
+    }
+
+
+def _snowflake_pool_key(config: Dict[str, Any]) -> Tuple:
+    credentials = (config.get("private_key"), config.get("private_key_passphrase"), config.get("password"))
+    return tuple(_snowflake_params(config).values()) + credentials
+
+
+def _bigquery_pool_key(config: Dict[str, Any]) -> Tuple:
+    return (config.get("project_id"), json.dumps(config.get("credentials"), sort_keys=True, default=str))
+
+
+def _boto3_params(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "region_name": config.get("region"),
+        "aws_access_key_id": config.get("access_key_id"),
+        "aws_secret_access_key": config.get("secret_access_key")
+    }
+
+
+def _snowflake_type(data_type: str) -> str:
+    """Render a SHOW COLUMNS data_type document as the SQL type DESCRIBE TABLE reports.
+
+    SHOW COLUMNS gives the internal type, e.g. {"type":"FIXED","precision":38,"scale":0}
+    for NUMBER(38,0) or {"type":"TEXT","length":16777216} for VARCHAR(16777216).
+    """
+    info = json.loads(data_type)
+    kind = info.get("type")
+    if kind == "FIXED":
+        return f"NUMBER({info.get('precision', 38)},{info.get('scale', 0)})"
+    if kind == "TEXT":
+        return f"VARCHAR({info['length']})" if "length" in info else "VARCHAR"
+    if kind == "BINARY":
+        return f"BINARY({info['length']})" if "length" in info else "BINARY"
+    if kind == "REAL":
+        return "FLOAT"
+    if kind in ("TIME", "TIMESTAMP_LTZ", "TIMESTAMP_NTZ", "TIMESTAMP_TZ") and "scale" in info:
+        # Fractional-second precision is carried in "scale"
+        return f"{kind}({info['scale']})"
+    return kind
+
+
+async def _close_aiomysql_pool(pool: Any) -> None:
+    pool.close()
+    await pool.wait_closed()
+
+
+async def _close_quietly(closing: Any) -> None:
+    try:
+        await closing
+    except Exception:
+        logger.warning("Failed to close an evicted data source pool", exc_info=True)
+
+
+class _PoolRegistry:
+    """Shared pools/clients of one driver, keyed by connection config.
+
+    Holds at most `max_entries`, dropping the least recently used, and drops
+    entries unused for `idle_timeout` seconds as new ones are added. Dropped
+    pools are handed back to the caller to be closed with `close`.
+    """
+    
+    def __init__(self, key: Callable[[Dict[str, Any]], Any], close: Callable[[Any], Any],
+                 max_entries: int = POOL_MAX_ENTRIES, idle_timeout: float = POOL_IDLE_TIMEOUT):
+        self.key = key
+        self.close = close
+        self.max_entries = max_entries
+        self.idle_timeout = idle_timeout
+        # key -> (last_used, pool), least recently used first
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries[key] = (time.monotonic(), entry[1])
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def put(self, key: Any, pool: Any) -> List[Any]:
+        """Store a pool and return the ones evicted for space or idleness"""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            self._entries[key] = (now, pool)
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1:
+                oldest_key, (last_used, oldest) = next(iter(self._entries.items()))
+                if len(self._entries) <= self.max_entries and now - last_used < self.idle_timeout:
+                    break
+                del self._entries[oldest_key]
+                evicted.append(oldest)
+        return evicted
+    
+    def pop(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+    
+    def drain(self) -> List[Any]:
+        with self._lock:
+            pools = [pool for _, pool in self._entries.values()]
+            self._entries.clear()
+        return pools
+
+
+class _RateLimitFilter(logging.Filter):
+    """Drop records beyond `rate` per `per` seconds for each (message, first arg) pair"""
+    
+    def __init__(self, rate: int, per: float):
+        super().__init__()
+        self.rate = rate
+        self.per = per
+        self._windows: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.msg, str(record.args[0]) if record.args else None)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per:
+                # Start a new window: [started_at, records_emitted]
+                self._windows[key] = [now, 1]
+                return True
+            if window[1] >= self.rate:
+                return False
+            window[1] += 1
+            return True
+
+
+logger.addFilter(_RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW))
+
+
+@lru_cache(maxsize=None)
+def _load_driver(module_name: str) -> Optional[ModuleType]:
+    """Import a driver module on first use; None if it is not installed"""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=32)
+def _load_private_key_der(private_key_pem: str, passphrase: Optional[str]) -> bytes:
+    """Parse a PEM private key once and return it as unencrypted PKCS#8 DER (Snowflake key-pair auth)"""
+    from cryptography.hazmat.primitives import serialization
+    key = serialization.load_pem_private_key(
+        private_key_pem.encode(),
+        password=passphrase.encode() if passphrase else None
+    )
+    return key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+def _probe(conn: Any, query: str = "SELECT 1") -> None:
+    """Run a trivial query on a DB-API connection to prove the session is usable"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _group_columns(rows: Iterable[Tuple[str, str, str]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Group (table_name, column_name, data_type) rows into per-table column lists.
+
+    A row with no column name (from an outer join) records the table with no columns.
+    """
+    columns_by_table: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name, column_name, data_type in rows:
+        _add_column(columns_by_table, table_name, column_name, data_type)
+    return columns_by_table
+
+
+async def _group_columns_async(rows: AsyncIterable[Tuple[str, str, str]]) -> Dict[str, List[Dict[str, Any]]]:
+    """_group_columns over a streaming cursor, bucketing rows as they arrive"""
+    columns_by_table: Dict[str, List[Dict[str, Any]]] = {}
+    async for table_name, column_name, data_type in rows:
+        _add_column(columns_by_table, table_name, column_name, data_type)
+    return columns_by_table
+
+
+def _add_column(columns_by_table: Dict[str, List[Dict[str, Any]]], table_name: str,
+                column_name: Optional[str], data_type: Optional[str]) -> None:
+    columns = columns_by_table.setdefault(table_name, [])
+    if column_name is not None:
+        columns.append({"name": column_name, "type": data_type})
+
+
+def _register(registry: Dict[DataSourceType, Callable], *ds_types: DataSourceType) -> Callable[[Callable], Callable]:
+    """Record the decorated method as the handler for the given data source types"""
+    def decorator(func: Callable) -> Callable:
+        for ds_type in ds_types:
+            registry[ds_type] = func
+        return func
+    return decorator
+
+
+def _quote_identifier(name: str, quote: str = '"') -> str:
+    """Quote a table/column identifier for interpolation into SQL, escaping embedded quotes"""
+    return f"{quote}{name.replace(quote, quote * 2)}{quote}"
+
+
+def _connect_sqlite(config: Dict[str, Any]) -> sqlite3.Connection:
+    """Open a SQLite database in autocommit mode, so reads never hold a write transaction"""
+    return sqlite3.connect(
+        config.get("database_path") or config.get("database"), isolation_level=None
+    )
+
 
 class DataSourceService:
+    # Connection pools shared by every service instance, keyed by
+    # (host, port, database, user, password). PostgreSQL/TimescaleDB use
+    # asyncpg and MySQL/MariaDB aiomysql; Redshift stays on psycopg2 since
+    # asyncpg does not support it.
+    _asyncpg_pools = _PoolRegistry(partial(_normalize_config, DataSourceType.POSTGRESQL), operator.methodcaller("close"))
+    _asyncpg_pools_lock = asyncio.Lock()
+    _aiomysql_pools = _PoolRegistry(partial(_normalize_config, DataSourceType.MYSQL), _close_aiomysql_pool)
+    _aiomysql_pools_lock = asyncio.Lock()
+    _pg_pools = _PoolRegistry(partial(_normalize_config, DataSourceType.REDSHIFT), operator.methodcaller("closeall"))
+    _pg_pools_lock = threading.Lock()
+
+    # MongoDB clients are themselves connection pools and meant to be long-lived
+    _mongo_clients = _PoolRegistry(_mongo_pool_key, operator.methodcaller("close"))
+
+    # redis.asyncio connection pools keyed by (host, port, db, password)
+    _redis_pools = _PoolRegistry(_redis_pool_key, operator.methodcaller("disconnect"))
+
+    # Async Elasticsearch clients keyed by (url, user, password)
+    _es_clients = _PoolRegistry(_es_pool_key, operator.methodcaller("close"))
+
+    # Cassandra clusters keyed by (host, port); each holds a control connection
+    # and keeps schema metadata current, so it is built once and shared
+    _cassandra_clusters = _PoolRegistry(_cassandra_pool_key, operator.methodcaller("shutdown"))
+    _cassandra_lock = threading.Lock()
+
+    # BigQuery clients fetch an OAuth token on construction; one per project/credentials
+    _bigquery_clients = _PoolRegistry(_bigquery_pool_key, operator.methodcaller("close"))
+    _bigquery_lock = threading.Lock()
+
+    # boto3 sessions re-read AWS config and botocore models on creation; one per
+    # credentials. They hold no connections, so there is nothing to close.
+    _boto3_sessions = _PoolRegistry(lambda config: tuple(_boto3_params(config).values()), lambda session: None)
+    _boto3_lock = threading.Lock()
+
+    # Snowflake sessions keyed by account/user/warehouse/database/schema/credentials
+    _snowflake_conns = _PoolRegistry(_snowflake_pool_key, operator.methodcaller("close"))
+    _snowflake_lock = threading.Lock()
+
+    # Registries holding each type's pools, for close_pools / close_all
+    _POOL_REGISTRIES: Dict[DataSourceType, _PoolRegistry] = {
+        DataSourceType.POSTGRESQL: _asyncpg_pools,
+        DataSourceType.TIMESCALEDB: _asyncpg_pools,
+        DataSourceType.MYSQL: _aiomysql_pools,
+        DataSourceType.MARIADB: _aiomysql_pools,
+        DataSourceType.REDSHIFT: _pg_pools,
+        DataSourceType.MONGODB: _mongo_clients,
+        DataSourceType.REDIS: _redis_pools,
+        DataSourceType.ELASTICSEARCH: _es_clients,
+        DataSourceType.CASSANDRA: _cassandra_clusters,
+        DataSourceType.BIGQUERY: _bigquery_clients,
+        DataSourceType.DYNAMODB: _boto3_sessions,
+        DataSourceType.SNOWFLAKE: _snowflake_conns,
+    }
+
+    # Closes of evicted async pools still in flight
+    _closing_tasks: Set["asyncio.Task[None]"] = set()
+
+    # Bounded worker pool for drivers that only offer blocking I/O: psycopg2
+    # (Redshift), pymssql, cx_Oracle, the Cassandra/Snowflake/BigQuery/boto3
+    # SDKs, clickhouse-connect, CouchDB and sqlite3. aiosqlite would only move
+    # sqlite3 onto a thread of its own, so SQLite stays here as well.
+    _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="datasource")
+
+    # Schema cache: (ds_type, config digest) -> (expires_at, tables), plus one
+    # lock per key so concurrent misses trigger a single introspection
+    _schema_cache: Dict[Tuple[str, bytes], Tuple[float, List[Dict[str, Any]]]] = {}
+    _schema_locks: "weakref.WeakValueDictionary[Tuple[str, bytes], asyncio.Lock]" = weakref.WeakValueDictionary()
+    # Cache keys each stored data source has populated, for invalidate_schema
+    _schema_keys_by_datasource: Dict[str, set] = {}
+
+    # Per-type connection test and schema handlers, filled in by @_register below.
+    # Coroutine handlers run on the event loop, plain ones on the worker pool.
+    _TEST_HANDLERS: Dict[DataSourceType, Callable] = {}
+    _SCHEMA_HANDLERS: Dict[DataSourceType, Callable] = {}
+
+    @classmethod
+    def _store_pool(cls, registry: _PoolRegistry, key: Any, pool: Any) -> None:
+        """Add a pool to its registry and close whatever that evicts.
+
+        Async closes are started as tasks on the running loop; blocking ones
+        run inline, as their getters already run on the worker pool.
+        """
+        for evicted in registry.put(key, pool):
+            try:
+                closing = registry.close(evicted)
+            except Exception:
+                logger.warning("Failed to close an evicted data source pool", exc_info=True)
+                continue
+            if inspect.isawaitable(closing):
+                task = asyncio.ensure_future(_close_quietly(closing))
+                cls._closing_tasks.add(task)
+                task.add_done_callback(cls._closing_tasks.discard)
+
+    @classmethod
+    async def _get_asyncpg_pool(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the asyncpg pool for a PostgreSQL/TimescaleDB config"""
+        key = cls._asyncpg_pools.key(config)
+        pool = cls._asyncpg_pools.get(key)
+        if pool is None:
+            async with cls._asyncpg_pools_lock:
+                pool = cls._asyncpg_pools.get(key)
+                if pool is None:
+                    pool = await _load_driver("asyncpg").create_pool(
+                        host=key.host, port=key.port, database=key.database,
+                        user=key.user, password=key.password,
+                        min_size=1, max_size=10, timeout=CONNECT_TIMEOUT
+                    )
+                    cls._store_pool(cls._asyncpg_pools, key, pool)
+        return pool
+
+    @classmethod
+    async def _get_aiomysql_pool(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the aiomysql pool for a MySQL/MariaDB config"""
+        key = cls._aiomysql_pools.key(config)
+        pool = cls._aiomysql_pools.get(key)
+        if pool is None:
+            async with cls._aiomysql_pools_lock:
+                pool = cls._aiomysql_pools.get(key)
+                if pool is None:
+                    # Autocommit so a reused connection never reads from a stale snapshot
+                    pool = await _load_driver("aiomysql").create_pool(
+                        host=key.host, port=key.port, db=key.database,
+                        user=key.user, password=key.password or "",
+                        minsize=1, maxsize=10, connect_timeout=CONNECT_TIMEOUT,
+                        autocommit=True
+                    )
+                    cls._store_pool(cls._aiomysql_pools, key, pool)
+        return pool
+
+    @classmethod
+    @contextmanager
+    def _pg_connection(cls, config: Dict[str, Any]) -> Iterator[Any]:
+        """Borrow a pooled psycopg2 connection (Redshift)"""
+        key = cls._pg_pools.key(config)
+        pool = cls._pg_pools.get(key)
+        if pool is None:
+            with cls._pg_pools_lock:
+                pool = cls._pg_pools.get(key)
+                if pool is None:
+                    pool = _load_driver("psycopg2.pool").ThreadedConnectionPool(
+                        minconn=1, maxconn=8, connect_timeout=CONNECT_TIMEOUT,
+                        host=key.host, port=key.port, database=key.database,
+                        user=key.user, password=key.password
+                    )
+                    cls._store_pool(cls._pg_pools, key, pool)
+        
+        conn = pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            # Never hand a connection in an unknown state back to the pool
+            pool.putconn(conn, close=True)
+            raise
+        else:
+            conn.rollback()
+            pool.putconn(conn)
+
+    @classmethod
+    def _get_mongo_client(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the shared Motor client for a MongoDB config"""
+        key = cls._mongo_clients.key(config)
+        client = cls._mongo_clients.get(key)
+        if client is None:
+            host, port, user, password = key
+            # Constructing the client does no I/O, so no lock is needed on the event loop
+            client = _load_driver("motor.motor_asyncio").AsyncIOMotorClient(
+                host=host,
+                port=port,
+                username=user,
+                password=password,
+                serverSelectionTimeoutMS=CONNECT_TIMEOUT * 1000,
+                connectTimeoutMS=CONNECT_TIMEOUT * 1000,
+                maxPoolSize=10
+            )
+            cls._store_pool(cls._mongo_clients, key, client)
+        return client
+
+    @classmethod
+    def _get_redis_pool(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the shared redis.asyncio connection pool for a config"""
+        aioredis = _load_driver("redis.asyncio")
+        key = cls._redis_pools.key(config)
+        pool = cls._redis_pools.get(key)
+        if pool is None:
+            host, port, db, password = key
+            # Creating the pool opens no sockets, so no lock is needed on the event loop
+            pool = aioredis.ConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                password=password,
+                max_connections=32,
+                socket_connect_timeout=CONNECT_TIMEOUT,
+                socket_timeout=CONNECT_TIMEOUT
+            )
+            cls._store_pool(cls._redis_pools, key, pool)
+        return pool
+
+    @classmethod
+    def _get_es_client(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the shared AsyncElasticsearch client for a config"""
+        elasticsearch = _load_driver("elasticsearch")
+        key = cls._es_clients.key(config)
+        client = cls._es_clients.get(key)
+        if client is None:
+            url, user, password = key
+            client = elasticsearch.AsyncElasticsearch(
+                [url],
+                basic_auth=(user, password) if user else None,
+                request_timeout=CONNECT_TIMEOUT
+            )
+            cls._store_pool(cls._es_clients, key, client)
+        return client
+
+    @classmethod
+    def _get_cassandra_cluster(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily connect the shared Cassandra cluster for a config"""
+        cassandra_cluster = _load_driver("cassandra.cluster")
+        key = cls._cassandra_clusters.key(config)
+        cluster = cls._cassandra_clusters.get(key)
+        if cluster is None:
+            with cls._cassandra_lock:
+                cluster = cls._cassandra_clusters.get(key)
+                if cluster is None:
+                    host, port = key
+                    cluster = cassandra_cluster.Cluster(
+                        [host],
+                        port=port,
+                        connect_timeout=CONNECT_TIMEOUT,
+                        control_connection_timeout=CONNECT_TIMEOUT
+                    )
+                    try:
+                        cluster.connect()
+                    except Exception:
+                        cluster.shutdown()
+                        raise
+                    cls._store_pool(cls._cassandra_clusters, key, cluster)
+        return cluster
+
+    @classmethod
+    def _get_snowflake_connection(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily open the shared Snowflake session for a config"""
+        snowflake_connector = _load_driver("snowflake.connector")
+        key = cls._snowflake_conns.key(config)
+        conn = cls._snowflake_conns.get(key)
+        if conn is None or conn.is_closed():
+            with cls._snowflake_lock:
+                conn = cls._snowflake_conns.get(key)
+                if conn is None or conn.is_closed():
+                    if config.get("private_key"):
+                        # Key-pair (JWT) auth avoids a password login round-trip
+                        auth = {
+                            "authenticator": "SNOWFLAKE_JWT",
+                            "private_key": _load_private_key_der(
+                                config["private_key"], config.get("private_key_passphrase")
+                            )
+                        }
+                    else:
+                        auth = {"password": config.get("password")}
+                    conn = snowflake_connector.connect(
+                        login_timeout=CONNECT_TIMEOUT,
+                        client_session_keep_alive=True,
+                        **_snowflake_params(config),
+                        **auth
+                    )
+                    cls._store_pool(cls._snowflake_conns, key, conn)
+        return conn
+
+    @classmethod
+    def _get_bigquery_client(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the shared BigQuery client for a project"""
+        bigquery = _load_driver("google.cloud.bigquery")
+        key = cls._bigquery_clients.key(config)
+        client = cls._bigquery_clients.get(key)
+        if client is None:
+            with cls._bigquery_lock:
+                client = cls._bigquery_clients.get(key)
+                if client is None:
+                    # credentials is the service account JSON
+                    client = bigquery.Client(project=config.get("project_id"), credentials=config.get("credentials"))
+                    cls._store_pool(cls._bigquery_clients, key, client)
+        return client
+
+    @classmethod
+    def _get_boto3_session(cls, config: Dict[str, Any]) -> Any:
+        """Get or lazily create the shared boto3 session for a set of AWS credentials"""
+        boto3 = _load_driver("boto3")
+        key = cls._boto3_sessions.key(config)
+        session = cls._boto3_sessions.get(key)
+        if session is None:
+            with cls._boto3_lock:
+                session = cls._boto3_sessions.get(key)
+                if session is None:
+                    session = boto3.session.Session(**_boto3_params(config))
+                    cls._store_pool(cls._boto3_sessions, key, session)
+        return session
+
+    async def _run_blocking(self, func: Callable[[Dict[str, Any]], T],
+                            config: Dict[str, Any], timeout: float) -> T:
+        """Run a blocking driver call on the worker pool without stalling the event loop"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(self._executor, func, config), timeout)
+
+    async def _dispatch(self, handler: Callable, config: Dict[str, Any], timeout: float) -> Any:
+        """Await a registered handler, sending blocking ones to the worker pool"""
+        if asyncio.iscoroutinefunction(handler):
+            return await asyncio.wait_for(handler(self, config), timeout)
+        return await self._run_blocking(partial(handler, self), config, timeout)
+
+    @asynccontextmanager
+    async def _acquire(self, ds_type: DataSourceType, config: Dict[str, Any]) -> AsyncIterator[Any]:
+        """Borrow a connection from the shared async pool for a PostgreSQL- or MySQL-family config"""
+        if ds_type in (DataSourceType.POSTGRESQL, DataSourceType.TIMESCALEDB):
+            pool = await self._get_asyncpg_pool(config)
+        elif ds_type in (DataSourceType.MYSQL, DataSourceType.MARIADB):
+            pool = await self._get_aiomysql_pool(config)
+        else:
+            raise ValueError(f"No async connection pool for {ds_type}")
+        async with pool.acquire() as conn:
+            yield conn
+
+    @classmethod
+    def pool_sharing_types(cls, ds_type: DataSourceType) -> List[DataSourceType]:
+        """Data source types whose connections share ds_type's pool registry"""
+        registry = cls._POOL_REGISTRIES.get(ds_type)
+        if registry is None:
+            return []
+        return [t for t, other in cls._POOL_REGISTRIES.items() if other is registry]
+
+    @classmethod
+    async def close_pools(
+        cls,
+        ds_type: DataSourceType,
+        config: Dict[str, Any],
+        in_use: Iterable[Tuple[DataSourceType, Dict[str, Any]]] = ()
+    ) -> None:
+        """Close the shared pool/client for one data source config, e.g. once the data source is deleted.
+
+        Pools are keyed by config, not by data source, so the pool stays open
+        while any (type, config) in `in_use` maps to the same key; it is then
+        left to LRU/idle eviction.
+        """
+        registry = cls._POOL_REGISTRIES.get(ds_type)
+        if registry is None:
+            return
+        key = registry.key(config)
+        if any(cls._POOL_REGISTRIES.get(t) is registry and registry.key(c or {}) == key for t, c in in_use):
+            return
+        pool = registry.pop(key)
+        if pool is not None:
+            closing = registry.close(pool)
+            if inspect.isawaitable(closing):
+                await closing
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close all pooled connections (called on application shutdown)"""
+        for registry in dict.fromkeys(cls._POOL_REGISTRIES.values()):
+            for pool in registry.drain():
+                closing = registry.close(pool)
+                if inspect.isawaitable(closing):
+                    await closing
+        if cls._closing_tasks:
+            await asyncio.gather(*cls._closing_tasks)
+
     async def test_connection(self, ds_type: DataSourceType, config: Dict[str, Any]) -> bool:
         """Test connection to a data source"""
+        # File-based sources (CSV, Excel, JSON, Parquet) don't need connection testing
+        handler = self._TEST_HANDLERS.get(ds_type)
+        if handler is None:
+            return True
         try:
-            if ds_type == DataSourceType.POSTGRESQL or ds_type == DataSourceType.TIMESCALEDB:
-                conn = psycopg2.connect(
-                    host=config.get("host"),
-                    port=config.get("port", 5432),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
-                )
-                conn.close()
-                return True
-            
-            elif ds_type == DataSourceType.MYSQL or ds_type == DataSourceType.MARIADB:
-                conn = mysql.connector.connect(
-                    host=config.get("host"),
-                    port=config.get("port", 3306),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
-                )
-                conn.close()
-                return True
-            
-            elif ds_type == DataSourceType.MSSQL:
-                if not MSSQL_AVAILABLE:
-                    return False
-                conn = pymssql.connect(
-                    server=config.get("host"),
-                    port=config.get("port", 1433),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
-                )
-                conn.close()
-                return True
-            
-            elif ds_type == DataSourceType.ORACLE:
-                if not ORACLE_AVAILABLE:
-                    return False
-                dsn = cx_Oracle.makedsn(
-                    config.get("host"),
-                    config.get("port", 1521),
-                    service_name=config.get("service_name") or config.get("database")
-                )
-                conn = cx_Oracle.connect(
-                    user=config.get("user"),
-                    password=config.get("password"),
-                    dsn=dsn
-                )
-                conn.close()
-                return True
-            
-            elif ds_type == DataSourceType.MONGODB:
-                client = MongoClient(
-                    host=config.get("host"),
-                    port=config.get("port", 27017),
-                    username=config.get("user"),
-                    password=config.get("password")
-                )
-                client.server_info()  # Test connection
-                client.close()
-                return True
-            
-            elif ds_type == DataSourceType.CASSANDRA:
-                if not CASSANDRA_AVAILABLE:
-                    return False
-                cluster = Cluster([config.get("host")], port=config.get("port", 9042))
-                session = cluster.connect()
-                cluster.shutdown()
-                return True
-            
-            elif ds_type == DataSourceType.REDIS:
-                if not REDIS_AVAILABLE:
-                    return False
-                r = redis.Redis(
-                    host=config.get("host"),
-                    port=config.get("port", 6379),
-                    password=config.get("password"),
-                    db=config.get("database", 0)
-                )
-                r.ping()
-                return True
-            
-            elif ds_type == DataSourceType.ELASTICSEARCH:
-                if not ELASTICSEARCH_AVAILABLE:
-                    return False
-                es = Elasticsearch(
-                    [f"{config.get('host')}:{config.get('port', 9200)}"],
-                    basic_auth=(config.get("user"), config.get("password")) if config.get("user") else None
-                )
-                es.ping()
-                return True
-            
-            elif ds_type == DataSourceType.CLICKHOUSE:
-                if not CLICKHOUSE_AVAILABLE:
-                    return False
-                client = clickhouse_connect.get_client(
-                    host=config.get("host"),
-                    port=config.get("port", 8123),
-                    username=config.get("user"),
-                    password=config.get("password"),
-                    database=config.get("database", "default")
-                )
-                client.ping()
-                return True
-            
-            elif ds_type == DataSourceType.SNOWFLAKE:
-                if not SNOWFLAKE_AVAILABLE:
-                    return False
-                conn = snowflake_connect(
-                    user=config.get("user"),
-                    password=config.get("password"),
-                    account=config.get("account"),
-                    warehouse=config.get("warehouse"),
-                    database=config.get("database"),
-                    schema=config.get("schema", "PUBLIC")
-                )
-                conn.close()
-                return True
-            
-            elif ds_type == DataSourceType.REDSHIFT:
-                # Redshift uses PostgreSQL protocol
-                conn = psycopg2.connect(
-                    host=config.get("host"),
-                    port=config.get("port", 5439),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
-                )
-                conn.close()
-                return True
-            
-            elif ds_type == DataSourceType.BIGQUERY:
-                if not BIGQUERY_AVAILABLE:
-                    return False
-                client = bigquery.Client(
-                    project=config.get("project_id"),
-                    credentials=config.get("credentials")  # Service account JSON
-                )
-                # Test query
-                query = "SELECT 1"
-                client.query(query).result()
-                return True
+            return await self._dispatch(handler, config, TEST_CONNECTION_TIMEOUT)
+        except Exception:
+            logger.exception("Connection test failed for %s", ds_type)
+            return False
+    
+    @_register(_TEST_HANDLERS, DataSourceType.POSTGRESQL, DataSourceType.TIMESCALEDB)
+    async def _test_postgres(self, config: Dict[str, Any]) -> bool:
+        async with self._acquire(DataSourceType.POSTGRESQL, config) as conn:
+            await conn.execute("SELECT 1")
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.MYSQL, DataSourceType.MARIADB)
+    async def _test_mysql(self, config: Dict[str, Any]) -> bool:
+        async with self._acquire(DataSourceType.MYSQL, config) as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT 1")
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.MSSQL)
+    def _test_mssql(self, config: Dict[str, Any]) -> bool:
+        pymssql = _load_driver("pymssql")
+        if pymssql is None:
+            return False
+        params = _normalize_config(DataSourceType.MSSQL, config)
+        conn = pymssql.connect(
+            server=params.host,
+            port=params.port,
+            database=params.database,
+            user=params.user,
+            password=params.password,
+            login_timeout=CONNECT_TIMEOUT
+        )
+        try:
+            _probe(conn)
+        finally:
+            conn.close()
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.ORACLE)
+    def _test_oracle(self, config: Dict[str, Any]) -> bool:
+        cx_Oracle = _load_driver("cx_Oracle")
+        if cx_Oracle is None:
+            return False
+        params = _normalize_config(DataSourceType.ORACLE, config)
+        dsn = cx_Oracle.makedsn(
+            params.host,
+            params.port,
+            service_name=config.get("service_name") or params.database
+        )
+        # makedsn() has no timeout argument; set it on the descriptor
+        dsn = dsn.replace(
+            "(DESCRIPTION=", f"(DESCRIPTION=(TRANSPORT_CONNECT_TIMEOUT={CONNECT_TIMEOUT})", 1
+        )
+        conn = cx_Oracle.connect(
+            user=params.user,
+            password=params.password,
+            dsn=dsn
+        )
+        try:
+            _probe(conn, "SELECT 1 FROM DUAL")
+        finally:
+            conn.close()
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.MONGODB)
+    async def _test_mongodb(self, config: Dict[str, Any]) -> bool:
+        client = self._get_mongo_client(config)
+        await client.admin.command("ping")
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.CASSANDRA)
+    def _test_cassandra(self, config: Dict[str, Any]) -> bool:
+        if _load_driver("cassandra.cluster") is None:
+            return False
+        self._get_cassandra_cluster(config)
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.REDIS)
+    async def _test_redis(self, config: Dict[str, Any]) -> bool:
+        aioredis = _load_driver("redis.asyncio")
+        if aioredis is None:
+            return False
+        # The pool outlives this client; closing the client leaves it intact
+        client = aioredis.Redis(connection_pool=self._get_redis_pool(config))
+        try:
+            await client.ping()
+        finally:
+            await client.aclose()
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.ELASTICSEARCH)
+    async def _test_elasticsearch(self, config: Dict[str, Any]) -> bool:
+        if _load_driver("elasticsearch") is None:
+            return False
+        return await self._get_es_client(config).ping()
+    
+    @_register(_TEST_HANDLERS, DataSourceType.CLICKHOUSE)
+    def _test_clickhouse(self, config: Dict[str, Any]) -> bool:
+        clickhouse_connect = _load_driver("clickhouse_connect")
+        if clickhouse_connect is None:
+            return False
+        params = _normalize_config(DataSourceType.CLICKHOUSE, config)
+        client = clickhouse_connect.get_client(
+            host=params.host,
+            port=params.port,
+            username=params.user,
+            password=params.password,
+            database=params.database,
+            connect_timeout=CONNECT_TIMEOUT
+        )
+        client.ping()
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.SNOWFLAKE)
+    def _test_snowflake(self, config: Dict[str, Any]) -> bool:
+        if _load_driver("snowflake.connector") is None:
+            return False
+        _probe(self._get_snowflake_connection(config))
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.REDSHIFT)
+    def _test_redshift(self, config: Dict[str, Any]) -> bool:
+        # Redshift uses PostgreSQL protocol
+        with self._pg_connection(config) as conn:
+            _probe(conn)
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.BIGQUERY)
+    def _test_bigquery(self, config: Dict[str, Any]) -> bool:
+        bigquery = _load_driver("google.cloud.bigquery")
+        if bigquery is None:
+            return False
+        client = self._get_bigquery_client(config)
+        # A metadata call validates credentials and project without running a billed job
+        next(iter(client.list_datasets(max_results=1, timeout=CONNECT_TIMEOUT)), None)
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.DYNAMODB)
+    def _test_dynamodb(self, config: Dict[str, Any]) -> bool:
+        boto3 = _load_driver("boto3")
+        if boto3 is None:
+            return False
+        client = self._get_boto3_session(config).client(
+            'dynamodb',
+            config=_load_driver("botocore.config").Config(
+                connect_timeout=CONNECT_TIMEOUT, read_timeout=CONNECT_TIMEOUT
+            )
+        )
+        # A single-name page is enough to prove credentials and network access
+        client.list_tables(Limit=1)
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.COUCHDB)
+    def _test_couchdb(self, config: Dict[str, Any]) -> bool:
+        couchdb = _load_driver("couchdb")
+        if couchdb is None:
+            return False
+        params = _normalize_config(DataSourceType.COUCHDB, config)
+        server = couchdb.Server(
+            f"http://{params.host}:{params.port}",
+            session=couchdb.Session(timeout=CONNECT_TIMEOUT)
+        )
+        if params.user:
+            server.resource.credentials = (params.user, params.password)
+        server.version()
+        return True
+    
+    @_register(_TEST_HANDLERS, DataSourceType.SQLITE)
+    def _test_sqlite(self, config: Dict[str, Any]) -> bool:
+        conn = _connect_sqlite(config)
+        try:
+            _probe(conn)
+        finally:
+            conn.close()
+        return True
+    
+    @staticmethod
+    def _schema_cache_key(ds_type: DataSourceType, config: Dict[str, Any]) -> Tuple[str, bytes]:
+        digest = hashlib.blake2b(
+            json.dumps(config, sort_keys=True, default=str).encode(), digest_size=16
+        ).digest()
+        return (str(ds_type), digest)
+
+    @classmethod
+    def _get_cached_schema(cls, key: Tuple[str, bytes]) -> Optional[List[Dict[str, Any]]]:
+        entry = cls._schema_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, tables = entry
+        if expires_at < time.monotonic():
+            cls._schema_cache.pop(key, None)
+            return None
+        return tables
+
+    @classmethod
+    def _store_schema(cls, key: Tuple[str, bytes], tables: List[Dict[str, Any]]) -> None:
+        now = time.monotonic()
+        if len(cls._schema_cache) >= SCHEMA_CACHE_MAX_ENTRIES:
+            for stale_key in [k for k, (expires_at, _) in cls._schema_cache.items() if expires_at < now]:
+                del cls._schema_cache[stale_key]
+            if len(cls._schema_cache) >= SCHEMA_CACHE_MAX_ENTRIES:
+                cls._schema_cache.pop(next(iter(cls._schema_cache)))
+        cls._schema_cache[key] = (now + SCHEMA_CACHE_TTL, tables)
+
+    @classmethod
+    def invalidate_schema(cls, datasource_id: str) -> int:
+        """Drop cached schemas for a stored data source; returns the number of entries removed"""
+        keys = cls._schema_keys_by_datasource.pop(datasource_id, set())
+        return sum(cls._schema_cache.pop(key, None) is not None for key in keys)
+
+    async def get_schema(self, ds_type: DataSourceType, config: Dict[str, Any],
+                         force_refresh: bool = False,
+                         datasource_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get schema information from a data source, cached for SCHEMA_CACHE_TTL seconds"""
+        key = self._schema_cache_key(ds_type, config)
+        if datasource_id is not None:
+            self._schema_keys_by_datasource.setdefault(datasource_id, set()).add(key)
+        if not force_refresh:
+            cached = self._get_cached_schema(key)
+            if cached is not None:
+                return cached
+        
+        lock = self._schema_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._schema_locks[key] = lock
+        
+        async with lock:
+            # Another request may have filled the cache while we waited
+            if not force_refresh:
+                cached = self._get_cached_schema(key)
+                if cached is not None:
+                    return cached
             
-            elif ds_type == DataSourceType.DYNAMODB:
-                if not BOTO3_AVAILABLE:
-                    return False
-                dynamodb = boto3.resource(
-                    'dynamodb',
-                    region_name=config.get("region"),
-                    aws_access_key_id=config.get("access_key_id"),
-                    aws_secret_access_key=config.get("secret_access_key")
-                )
-                # List tables to test connection
-                list(dynamodb.tables.all())
-                return True
+            try:
+                tables = await self._fetch_schema(ds_type, config)
+            except Exception:
+                logger.exception("Schema retrieval failed for %s", ds_type)
+                return []
             
-            elif ds_type == DataSourceType.COUCHDB:
-                if not COUCHDB_AVAILABLE:
-                    return False
-                server = couchdb.Server(
-                    f"http://{config.get('host')}:{config.get('port', 5984)}"
-                )
-                if config.get("user"):
-                    server.resource.credentials = (config.get("user"), config.get("password"))
-                server.version()
-                return True
+            self._store_schema(key, tables)
+            return tables
+    
+    async def get_schemas_bulk(
+        self, items: List[Tuple[DataSourceType, Dict[str, Any]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Get schemas for several data sources concurrently, in the order given"""
+        semaphore = asyncio.Semaphore(BULK_SCHEMA_CONCURRENCY)
+        
+        async def fetch_one(ds_type: DataSourceType, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_schema(ds_type, config)
+        
+        return await asyncio.gather(*(fetch_one(ds_type, config) for ds_type, config in items))
+    
+    async def _fetch_schema(self, ds_type: DataSourceType, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Introspect tables and columns directly from the data source"""
+        handler = self._SCHEMA_HANDLERS.get(ds_type)
+        if handler is None:
+            return []
+        return await self._dispatch(handler, config, SCHEMA_TIMEOUT)
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.POSTGRESQL, DataSourceType.TIMESCALEDB)
+    async def _schema_postgres(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with self._acquire(DataSourceType.POSTGRESQL, config) as conn:
+            # Tables and their columns in one query, streamed through a
+            # server-side cursor (which needs a transaction)
+            async with conn.transaction():
+                columns_by_table = await _group_columns_async(conn.cursor("""
+                    SELECT t.table_name, c.column_name, c.data_type 
+                    FROM information_schema.tables t
+                    LEFT JOIN information_schema.columns c
+                      ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+                    WHERE t.table_schema = 'public'
+                    ORDER BY t.table_name, c.ordinal_position
+                """, prefetch=SCHEMA_CURSOR_BATCH_SIZE))
+        
+        return [
+            {"name": table_name, "columns": columns}
+            for table_name, columns in columns_by_table.items()
+        ]
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.MYSQL, DataSourceType.MARIADB)
+    async def _schema_mysql(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with self._acquire(DataSourceType.MYSQL, config) as conn:
+            # Unbuffered cursor: rows are bucketed as they arrive off the socket
+            async with conn.cursor(_load_driver("aiomysql").SSCursor) as cursor:
+                # Tables and their columns in one query
+                await cursor.execute("""
+                    SELECT t.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE 
+                    FROM information_schema.TABLES t
+                    LEFT JOIN information_schema.COLUMNS c
+                      ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+                    WHERE t.TABLE_SCHEMA = DATABASE()
+                    ORDER BY t.TABLE_NAME, c.ORDINAL_POSITION
+                """)
+                columns_by_table = await _group_columns_async(cursor)
+        
+        return [
+            {"name": table_name, "columns": columns}
+            for table_name, columns in columns_by_table.items()
+        ]
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.MSSQL)
+    def _schema_mssql(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tables = []
+        pymssql = _load_driver("pymssql")
+        if pymssql is None:
+            return tables
+        params = _normalize_config(DataSourceType.MSSQL, config)
+        conn = pymssql.connect(
+            server=params.host,
+            port=params.port,
+            database=params.database,
+            user=params.user,
+            password=params.password,
+            login_timeout=CONNECT_TIMEOUT
+        )
+        cursor = conn.cursor()
+        
+        # Columns of every base table in one round-trip
+        cursor.execute("""
+            SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE 
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            JOIN INFORMATION_SCHEMA.TABLES t
+              ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+            WHERE t.TABLE_TYPE = 'BASE TABLE'
+            ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+        """)
+        columns_by_table = _group_columns(cursor.fetchall())
+        
+        for table_name, columns in columns_by_table.items():
+            tables.append({
+                "name": table_name,
+                "columns": columns
+            })
+        
+        conn.close()
+        return tables
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.MONGODB)
+    async def _schema_mongodb(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        client = self._get_mongo_client(config)
+        db = client[config.get("database")]
+        collection_names = await db.list_collection_names()
+        sample_size = int(config.get("schema_sample_size") or MONGO_SCHEMA_SAMPLE_SIZE)
+        
+        columns = await asyncio.gather(
+            *(self._infer_mongo_fields(db[name], sample_size) for name in collection_names)
+        )
+        return [
+            {"name": name, "columns": collection_columns}
+            for name, collection_columns in zip(collection_names, columns)
+        ]
+    
+    async def _infer_mongo_fields(self, collection: Any, sample_size: int) -> List[Dict[str, Any]]:
+        """Infer fields from a random sample of documents, shipping only field names and BSON types"""
+        pipeline = [
+            {"$sample": {"size": sample_size}},
+            {"$project": {
+                "_id": 0,
+                "fields": {
+                    "$map": {
+                        "input": {"$objectToArray": "$$ROOT"},
+                        "as": "field",
+                        "in": {"name": "$$field.k", "type": {"$type": "$$field.v"}}
+                    }
+                }
+            }}
+        ]
+        # First type seen wins; dict keeps fields in first-seen order
+        fields: Dict[str, str] = {}
+        async for doc in collection.aggregate(pipeline):
+            for field in doc["fields"]:
+                fields.setdefault(field["name"], _BSON_PYTHON_TYPES.get(field["type"], field["type"]))
+        return [{"name": name, "type": field_type} for name, field_type in fields.items()]
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.REDSHIFT)
+    def _schema_redshift(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tables = []
+        # Redshift uses PostgreSQL protocol
+        with self._pg_connection(config) as conn:
+            cursor = conn.cursor()
             
-            elif ds_type == DataSourceType.SQLITE:
-                conn = sqlite3.connect(config.get("database_path") or config.get("database"))
-                conn.close()
-                return True
+            cursor.execute("""
+                SELECT tablename 
+                FROM pg_tables 
+                WHERE schemaname = 'public'
+            """)
+            table_names = cursor.fetchall()
             
-            # File-based sources (CSV, Excel, JSON, Parquet) don't need connection testing
-            elif ds_type in [DataSourceType.CSV, DataSourceType.EXCEL, DataSourceType.JSON_FILE, DataSourceType.PARQUET]:
-                return True
+            # Columns for every table in one query, streamed in batches
+            # through a named (server-side) cursor
+            column_cursor = conn.cursor(name="schema_columns")
+            column_cursor.itersize = SCHEMA_CURSOR_BATCH_SIZE
+            column_cursor.execute("""
+                SELECT table_name, column_name, data_type 
+                FROM information_schema.columns 
+                WHERE table_schema = 'public'
+                ORDER BY table_name, ordinal_position
+            """)
+            columns_by_table = _group_columns(column_cursor)
+            column_cursor.close()
             
-            return True
-        except Exception as e:
-            print(f"Connection test failed for {ds_type}: {str(e)}")
-            return False
+            for (table_name,) in table_names:
+                tables.append({
+                    "name": table_name,
+                    "columns": columns_by_table.get(table_name, [])
+                })
+        return tables
     
-    async def get_schema(self, ds_type: DataSourceType, config: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Get schema information from a data source"""
+    @_register(_SCHEMA_HANDLERS, DataSourceType.CLICKHOUSE)
+    def _schema_clickhouse(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
         tables = []
+        clickhouse_connect = _load_driver("clickhouse_connect")
+        if clickhouse_connect is None:
+            return tables
+        params = _normalize_config(DataSourceType.CLICKHOUSE, config)
+        client = clickhouse_connect.get_client(
+            host=params.host,
+            port=params.port,
+            username=params.user,
+            password=params.password,
+            database=params.database,
+            connect_timeout=CONNECT_TIMEOUT
+        )
+        
+        result = client.query("SHOW TABLES")
+        table_names = [row[0] for row in result.result_rows]
+        
+        # Columns for every table in one round-trip
+        result = client.query("""
+            SELECT table, name, type 
+            FROM system.columns 
+            WHERE database = currentDatabase()
+            ORDER BY table, position
+        """)
+        columns_by_table = _group_columns(result.result_rows)
+        
+        for table_name in table_names:
+            tables.append({
+                "name": table_name,
+                "columns": columns_by_table.get(table_name, [])
+            })
+        return tables
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.SNOWFLAKE)
+    def _schema_snowflake(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tables = []
+        if _load_driver("snowflake.connector") is None:
+            return tables
+        conn = self._get_snowflake_connection(config)
+        cursor = conn.cursor()
         
         try:
-            if ds_type in [DataSourceType.POSTGRESQL, DataSourceType.TIMESCALEDB]:
-                conn = psycopg2.connect(
-                    host=config.get("host"),
-                    port=config.get("port", 5432),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
-                )
-                cursor = conn.cursor()
-                
-                # Get tables
-                cursor.execute("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = 'public'
-                """)
-                table_names = cursor.fetchall()
-                
-                for (table_name,) in table_names:
-                    # Get columns for each table
-                    cursor.execute("""
-                        SELECT column_name, data_type 
-                        FROM information_schema.columns 
-                        WHERE table_name = %s
-                    """, (table_name,))
-                    columns = cursor.fetchall()
-                    
-                    tables.append({
-                        "name": table_name,
-                        "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                    })
-                
-                conn.close()
+            cursor.execute("SHOW TABLES")
+            table_names = [row[1] for row in cursor.fetchall()]  # Table name is in the second column
             
-            elif ds_type in [DataSourceType.MYSQL, DataSourceType.MARIADB]:
-                conn = mysql.connector.connect(
-                    host=config.get("host"),
-                    port=config.get("port", 3306),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
-                )
-                cursor = conn.cursor()
-                
-                # Get tables
-                cursor.execute("SHOW TABLES")
-                table_names = cursor.fetchall()
+            # Columns of every table in the session's schema in one metadata call
+            cursor.execute("SHOW COLUMNS IN SCHEMA")
+            fields = [col[0].lower() for col in cursor.description]
+            table_idx = fields.index("table_name")
+            column_idx = fields.index("column_name")
+            type_idx = fields.index("data_type")
+            columns_by_table = _group_columns(
+                (row[table_idx], row[column_idx], _snowflake_type(row[type_idx]))
+                for row in cursor.fetchall()
+            )
+        finally:
+            cursor.close()
+        
+        for table_name in table_names:
+            tables.append({
+                "name": table_name,
+                "columns": columns_by_table.get(table_name, [])
+            })
+        
+        return tables
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.BIGQUERY)
+    def _schema_bigquery(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tables = []
+        bigquery = _load_driver("google.cloud.bigquery")
+        if bigquery is None:
+            return tables
+        client = self._get_bigquery_client(config)
+        project = config.get("project_id") or client.project
+        dataset = config.get("dataset") or config.get("dataset_id")
+        
+        # One INFORMATION_SCHEMA query instead of a get_table() call per table
+        if dataset:
+            scope = f"{project}.{dataset}"
+        else:
+            # Without a dataset, read every dataset in the region and qualify table names
+            scope = f"{project}.region-{config.get('location', 'us').lower()}"
+        for name in scope.split("."):
+            if not _BIGQUERY_NAME_PATTERN.fullmatch(name):
+                raise ValueError(f"Invalid BigQuery project or dataset name: {name}")
+        
+        rows = client.query(f"""
+            SELECT table_schema, table_name, column_name, data_type 
+            FROM `{scope}`.INFORMATION_SCHEMA.COLUMNS 
+            ORDER BY table_schema, table_name, ordinal_position
+        """).result(timeout=SCHEMA_TIMEOUT)
+        columns_by_table = _group_columns(
+            (row.table_name if dataset else f"{row.table_schema}.{row.table_name}",
+             row.column_name, row.data_type)
+            for row in rows
+        )
+        
+        for table_name, columns in columns_by_table.items():
+            tables.append({
+                "name": table_name,
+                "columns": columns
+            })
+        return tables
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.ELASTICSEARCH)
+    async def _schema_elasticsearch(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tables = []
+        if _load_driver("elasticsearch") is None:
+            return tables
+        es = self._get_es_client(config)
+        
+        # All indices, plus the mappings of every index in a single request trimmed
+        # to field types. The filter drops indices with no mapped fields, so the
+        # index list comes from get_alias.
+        indices, response = await asyncio.gather(
+            es.indices.get_alias(index="*"),
+            es.indices.get_mapping(
+                index="*",
+                expand_wildcards="all",
+                filter_path=[
+                    "*.mappings.properties.*.type",
+                    "*.mappings.properties.*.properties.*.type"
+                ]
+            )
+        )
+        mappings = response.body
+        
+        for index_name in indices.body:
+            if not index_name.startswith('.'):  # Skip system indices
+                properties = mappings.get(index_name, {}).get("mappings", {}).get("properties", {})
                 
-                for (table_name,) in table_names:
-                    # Get columns for each table
-                    cursor.execute(f"DESCRIBE {table_name}")
-                    columns = cursor.fetchall()
-                    
-                    tables.append({
-                        "name": table_name,
-                        "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                    })
+                columns = [{"name": field, "type": props.get("type", "unknown")} 
+                         for field, props in properties.items()]
                 
-                conn.close()
+                tables.append({
+                    "name": index_name,
+                    "columns": columns
+                })
+        return tables
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.CASSANDRA)
+    def _schema_cassandra(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tables = []
+        if _load_driver("cassandra.cluster") is None:
+            return tables
+        cluster = self._get_cassandra_cluster(config)
+        
+        # The driver keeps keyspace/table metadata current over its control
+        # connection, so no CQL queries are needed here
+        keyspace = config.get("keyspace", "system")
+        keyspace_metadata = cluster.metadata.keyspaces.get(keyspace)
+        if keyspace_metadata is None:
+            raise ValueError(f"Keyspace '{keyspace}' does not exist")
+        
+        for table_name, table_metadata in keyspace_metadata.tables.items():
+            columns = [{"name": column.name, "type": column.cql_type}
+                       for column in table_metadata.columns.values()]
             
-            elif ds_type == DataSourceType.MSSQL:
-                if MSSQL_AVAILABLE:
-                    conn = pymssql.connect(
-                        server=config.get("host"),
-                        port=config.get("port", 1433),
-                        database=config.get("database"),
-                        user=config.get("user"),
-                        password=config.get("password")
-                    )
-                    cursor = conn.cursor()
-                    
-                    cursor.execute("""
-                        SELECT TABLE_NAME 
-                        FROM INFORMATION_SCHEMA.TABLES 
-                        WHERE TABLE_TYPE = 'BASE TABLE'
-                    """)
-                    table_names = cursor.fetchall()
-                    
-                    for (table_name,) in table_names:
-                        cursor.execute("""
-                            SELECT COLUMN_NAME, DATA_TYPE 
-                            FROM INFORMATION_SCHEMA.COLUMNS 
-                            WHERE TABLE_NAME = ?
-                        """, (table_name,))
-                        columns = cursor.fetchall()
-                        
-                        tables.append({
-                            "name": table_name,
-                            "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                        })
-                    
-                    conn.close()
+            tables.append({
+                "name": table_name,
+                "columns": columns
+            })
+        
+        return tables
+    
+    @_register(_SCHEMA_HANDLERS, DataSourceType.SQLITE)
+    def _schema_sqlite(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        conn = _connect_sqlite(config)
+        try:
+            cursor = conn.cursor()
             
-            elif ds_type == DataSourceType.MONGODB:
-                client = MongoClient(
-                    host=config.get("host"),
-                    port=config.get("port", 27017),
-                    username=config.get("user"),
-                    password=config.get("password")
-                )
-                db = client[config.get("database")]
-                collection_names = db.list_collection_names()
-                
-                for collection_name in collection_names:
-                    # Sample document to infer schema
-                    sample = db[collection_name].find_one()
-                    columns = []
-                    if sample:
-                        columns = [{"name": key, "type": type(value).__name__} for key, value in sample.items()]
-                    
-                    tables.append({
-                        "name": collection_name,
-                        "columns": columns
-                    })
-                
-                client.close()
+            # Tables and their columns in one query
+            cursor.execute("""
+                SELECT m.name, p.name, p.type 
+                FROM sqlite_master m 
+                LEFT JOIN pragma_table_info(m.name) p 
+                WHERE m.type = 'table'
+                ORDER BY m.name, p.cid
+            """)
+            columns_by_table = _group_columns(cursor.fetchall())
             
-            elif ds_type == DataSourceType.REDSHIFT:
-                # Redshift uses PostgreSQL protocol
-                conn = psycopg2.connect(
-                    host=config.get("host"),
-                    port=config.get("port", 5439),
-                    database=config.get("database"),
-                    user=config.get("user"),
-                    password=config.get("password")
+            # Row counts as one UNION ALL statement per batch of tables
+            table_names = list(columns_by_table)
+            row_counts: Dict[str, int] = {}
+            for start in range(0, len(table_names), SQLITE_MAX_COMPOUND_SELECT):
+                batch = table_names[start:start + SQLITE_MAX_COMPOUND_SELECT]
+                cursor.execute(
+                    " UNION ALL ".join(
+                        f"SELECT ?, COUNT(*) FROM {_quote_identifier(name)}" for name in batch
+                    ),
+                    batch
                 )
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT tablename 
-                    FROM pg_tables 
-                    WHERE schemaname = 'public'
-                """)
-                table_names = cursor.fetchall()
-                
-                for (table_name,) in table_names:
-                    cursor.execute(f"""
-                        SELECT column_name, data_type 
-                        FROM information_schema.columns 
-                        WHERE table_name = '{table_name}'
-                    """)
-                    columns = cursor.fetchall()
-                    
-                    tables.append({
-                        "name": table_name,
-                        "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                    })
-                
-                conn.close()
-            
-            elif ds_type == DataSourceType.CLICKHOUSE:
-                if CLICKHOUSE_AVAILABLE:
-                    client = clickhouse_connect.get_client(
-                        host=config.get("host"),
-                        port=config.get("port", 8123),
-                        username=config.get("user"),
-                        password=config.get("password"),
-                        database=config.get("database", "default")
-                    )
-                    
-                    result = client.query("SHOW TABLES")
-                    table_names = [row[0] for row in result.result_rows]
-                    
-                    for table_name in table_names:
-                        result = client.query(f"DESCRIBE TABLE {table_name}")
-                        columns = [{"name": row[0], "type": row[1]} for row in result.result_rows]
-                        
-                        tables.append({
-                            "name": table_name,
-                            "columns": columns
-                        })
-            
-            elif ds_type == DataSourceType.SNOWFLAKE:
-                if SNOWFLAKE_AVAILABLE:
-                    conn = snowflake_connect(
-                        user=config.get("user"),
-                        password=config.get("password"),
-                        account=config.get("account"),
-                        warehouse=config.get("warehouse"),
-                        database=config.get("database"),
-                        schema=config.get("schema", "PUBLIC")
-                    )
-                    cursor = conn.cursor()
-                    
-                    cursor.execute("SHOW TABLES")
-                    table_names = cursor.fetchall()
-                    
-                    for row in table_names:
-                        table_name = row[1]  # Table name is in the second column
-                        cursor.execute(f"DESCRIBE TABLE {table_name}")
-                        columns = cursor.fetchall()
-                        
-                        tables.append({
-                            "name": table_name,
-                            "columns": [{"name": col[0], "type": col[1]} for col in columns]
-                        })
-                    
-                    conn.close()
-            
-            elif ds_type == DataSourceType.ELASTICSEARCH:
-                if ELASTICSEARCH_AVAILABLE:
-                    es = Elasticsearch(
-                        [f"{config.get('host')}:{config.get('port', 9200)}"],
-                        basic_auth=(config.get("user"), config.get("password")) if config.get("user") else None
-                    )
-                    
-                    # Get all indices
-                    indices = es.indices.get_alias(index="*")
-                    
-                    for index_name in indices.keys():
-                        if not index_name.startswith('.'):  # Skip system indices
-                            # Get mapping to infer schema
-                            mapping = es.indices.get_mapping(index=index_name)
-                            properties = mapping[index_name]["mappings"].get("properties", {})
-                            
-                            columns = [{"name": field, "type": props.get("type", "unknown")} 
-                                     for field, props in properties.items()]
-                            
-                            tables.append({
-                                "name": index_name,
-                                "columns": columns
-                            })
-            
-            elif ds_type == DataSourceType.CASSANDRA:
-                if CASSANDRA_AVAILABLE:
-                    cluster = Cluster([config.get("host")], port=config.get("port", 9042))
-                    session = cluster.connect()
-                    
-                    # Get keyspaces
-                    keyspace = config.get("keyspace", "system")
-                    session.set_keyspace(keyspace)
-                    
-                    # Get tables in keyspace
-                    rows = session.execute(f"""
-                        SELECT table_name 
-                        FROM system_schema.tables 
-                        WHERE keyspace_name = '{keyspace}'
-                    """)
-                    
-                    for row in rows:
-                        table_name = row.table_name
-                        
-                        # Get columns
-                        col_rows = session.execute(f"""
-                            SELECT column_name, type 
-                            FROM system_schema.columns 
-                            WHERE keyspace_name = '{keyspace}' AND table_name = '{table_name}'
-                        """)
-                        
-                        columns = [{"name": col_row.column_name, "type": col_row.type} 
-                                 for col_row in col_rows]
-                        
-                        tables.append({
-                            "name": table_name,
-                            "columns": columns
-                        })
-                    
-                    cluster.shutdown()
-            
-            elif ds_type == DataSourceType.SQLITE:
-                conn = sqlite3.connect(config.get("database_path") or config.get("database"))
-                cursor = conn.cursor()
-                
-                # Get tables
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                table_names = cursor.fetchall()
-                
-                for (table_name,) in table_names:
-                    # Get columns for each table
-                    cursor.execute(f"PRAGMA table_info({table_name})")
-                    columns = cursor.fetchall()
-                    
-                    # Get row count
-                    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                    row_count = cursor.fetchone()[0]
-                    
-                    tables.append({
-                        "name": table_name,
-                        "columns": [{"name": col[1], "type": col[2]} for col in columns],
-                        "row_count": row_count
-                    })
-                
-                conn.close()
-        
-        except Exception as e:
-            print(f"Schema retrieval failed for {ds_type}: {str(e)}")
+                row_counts.update(cursor.fetchall())
+        finally:
+            conn.close()
         
-        return tables
\ No newline at end of file
+        return [
+            {"name": name, "columns": columns, "row_count": row_counts[name]}
+            for name, columns in columns_by_table.items()
+        ]
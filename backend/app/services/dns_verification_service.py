@@ -3,20 +3,160 @@ DNS Verification Service
 Handles DNS verification for custom domains using CNAME, TXT, and HTTP methods.
 """
 
+import dns.asyncresolver
+import dns.name
+import dns.rdataclass
+import dns.rdatatype
 import dns.resolver
-import requests
+import aiohttp
+import asyncio
+from functools import lru_cache
 import logging
-from typing import Optional, Dict
+import threading
+import time
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+class _PositiveLRUCache(dns.resolver.LRUCache):
+    """Resolver cache that keeps only answers carrying records.
+
+    NXDOMAIN/NoAnswer would otherwise be held for the zone's SOA negative TTL
+    (often 300-3600s), hiding a record the tenant has just added well past the
+    short failure TTL of the verification cache.
+    """
+    
+    def put(self, key, value):
+        if value.rrset is not None:
+            super().put(key, value)
+
+
+# One resolver for the process; its LRU cache honours each record's DNS TTL,
+# so repeated checks of a domain don't go back to the network
+_resolver = dns.asyncresolver.Resolver()
+_resolver.timeout = 5
+_resolver.lifetime = 5
+_resolver.cache = _PositiveLRUCache(max_size=1024)
+
+
+def _forget_answer(domain: str, rdtype: str) -> None:
+    """Drop a cached answer that failed verification, so the next check sees a corrected record"""
+    _resolver.cache.flush((dns.name.from_text(domain), dns.rdatatype.from_text(rdtype), dns.rdataclass.IN))
+
+# verify_domain results are reused for this many seconds so a dashboard polling
+# every few seconds doesn't re-run lookups; failures expire sooner so a freshly
+# added record is picked up quickly
+VERIFICATION_CACHE_TTL = 60
+VERIFICATION_FAILURE_CACHE_TTL = 15
+VERIFICATION_CACHE_MAX_ENTRIES = 256
+
+_verification_cache: Dict[Tuple[str, str, str], Tuple[float, Dict[str, any]]] = {}
+_verification_cache_lock = threading.Lock()
+
+# Record values and instruction text, formatted per domain/token on demand
+_CNAME_TARGET = "verify-{token}.nexbii.com"
+_TXT_PREFIX = "nexbii-verification="
+_HTTP_VERIFICATION_URL = "http://{domain}/.well-known/nexbii-verification.txt"
+
+_CNAME_INSTRUCTIONS = """
+                1. Log in to your domain registrar (GoDaddy, Namecheap, etc.)
+                2. Navigate to DNS Management for {domain}
+                3. Add a new CNAME record:
+                   - Host/Name: {domain}
+                   - Points to: verify-{token}.nexbii.com
+                   - TTL: 3600 (or default)
+                4. Save the record
+                5. Wait 5-10 minutes for DNS propagation
+                6. Click "Verify Domain" below
+                """
+
+_TXT_INSTRUCTIONS = """
+                1. Log in to your domain registrar (GoDaddy, Namecheap, etc.)
+                2. Navigate to DNS Management for {domain}
+                3. Add a new TXT record:
+                   - Host/Name: {domain} (or @)
+                   - Value: nexbii-verification={token}
+                   - TTL: 3600 (or default)
+                4. Save the record
+                5. Wait 5-10 minutes for DNS propagation
+                6. Click "Verify Domain" below
+                """
+
+_HTTP_INSTRUCTIONS = """
+                1. Create a file named: nexbii-verification.txt
+                2. Add this content to the file: {token}
+                3. Upload the file to: http://{domain}/.well-known/nexbii-verification.txt
+                4. Make sure the file is publicly accessible
+                5. Click "Verify Domain" below
+                """
+
+# Upper bound on domains checked concurrently by verify_domains
+BULK_VERIFICATION_CONCURRENCY = 8
+
+HTTP_VERIFICATION_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Shared HTTP session for file checks, created on first use inside the event loop
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        # Keep-alive pool shared across checks; a few sockets per host is plenty
+        # for re-polling one domain, and resolved addresses are reused for 5 minutes
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=4, ttl_dns_cache=300),
+            timeout=HTTP_VERIFICATION_TIMEOUT
+        )
+    return _http_session
+
+
+@lru_cache(maxsize=4096)
+def _build_instructions(domain: str, verification_method: str, verification_token: str) -> Dict[str, str]:
+    if verification_method == "cname":
+        return {
+            "method": "CNAME Record",
+            "title": "Add CNAME Record to Your DNS",
+            "instructions": _CNAME_INSTRUCTIONS.format(domain=domain, token=verification_token),
+            "record_type": "CNAME",
+            "host": domain,
+            "value": _CNAME_TARGET.format(token=verification_token)
+        }
+    
+    elif verification_method == "txt":
+        return {
+            "method": "TXT Record",
+            "title": "Add TXT Record to Your DNS",
+            "instructions": _TXT_INSTRUCTIONS.format(domain=domain, token=verification_token),
+            "record_type": "TXT",
+            "host": domain,
+            "value": f"{_TXT_PREFIX}{verification_token}"
+        }
+    
+    elif verification_method == "http":
+        return {
+            "method": "HTTP File",
+            "title": "Upload Verification File to Your Website",
+            "instructions": _HTTP_INSTRUCTIONS.format(domain=domain, token=verification_token),
+            "file_name": "nexbii-verification.txt",
+            "file_content": verification_token,
+            "file_location": _HTTP_VERIFICATION_URL.format(domain=domain)
+        }
+    
+    return {
+        "method": "Unknown",
+        "title": "Invalid Verification Method",
+        "instructions": "Please select a valid verification method.",
+        "error": f"Unknown method: {verification_method}"
+    }
+
 
 class DNSVerificationService:
     """Service for verifying custom domain ownership"""
     
     @staticmethod
-    def verify_cname_record(domain: str, expected_value: str) -> Dict[str, any]:
+    async def verify_cname_record(domain: str, expected_value: str) -> Dict[str, any]:
         """
         Verify CNAME record for domain verification.
         Expected CNAME: <verification_token>.nexbii.com
@@ -30,11 +170,7 @@ class DNSVerificationService:
         """
         try:
             # Query CNAME records
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = 5
-            resolver.lifetime = 5
-            
-            answers = resolver.resolve(domain, 'CNAME')
+            answers = await _resolver.resolve(domain, 'CNAME')
             
             for rdata in answers:
                 cname_value = str(rdata.target).rstrip('.')
@@ -48,6 +184,7 @@ class DNSVerificationService:
                         "verified_at": datetime.utcnow().isoformat()
                     }
             
+            _forget_answer(domain, 'CNAME')
             return {
                 "verified": False,
                 "actual_value": str(answers[0].target).rstrip('.') if answers else None,
@@ -75,7 +212,7 @@ class DNSVerificationService:
             }
     
     @staticmethod
-    def verify_txt_record(domain: str, expected_token: str) -> Dict[str, any]:
+    async def verify_txt_record(domain: str, expected_token: str) -> Dict[str, any]:
         """
         Verify TXT record for domain verification.
         Expected TXT: nexbii-verification=<token>
@@ -88,18 +225,14 @@ class DNSVerificationService:
             dict: {"verified": bool, "actual_value": str, "error": str}
         """
         try:
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = 5
-            resolver.lifetime = 5
-            
-            answers = resolver.resolve(domain, 'TXT')
+            answers = await _resolver.resolve(domain, 'TXT')
             
             for rdata in answers:
                 txt_value = str(rdata).strip('"')
                 logger.info(f"Found TXT record for {domain}: {txt_value}")
                 
                 # Check for nexbii-verification=<token>
-                if txt_value.startswith('nexbii-verification='):
+                if txt_value.startswith(_TXT_PREFIX):
                     token = txt_value.split('=', 1)[1]
                     if token == expected_token:
                         return {
@@ -109,10 +242,11 @@ class DNSVerificationService:
                             "verified_at": datetime.utcnow().isoformat()
                         }
             
+            _forget_answer(domain, 'TXT')
             return {
                 "verified": False,
                 "actual_value": None,
-                "error": f"TXT record not found or does not match. Expected: nexbii-verification={expected_token}"
+                "error": f"TXT record not found or does not match. Expected: {_TXT_PREFIX}{expected_token}"
             }
             
         except dns.resolver.NXDOMAIN:
@@ -136,7 +270,7 @@ class DNSVerificationService:
             }
     
     @staticmethod
-    def verify_http_file(domain: str, expected_token: str) -> Dict[str, any]:
+    async def verify_http_file(domain: str, expected_token: str) -> Dict[str, any]:
         """
         Verify domain ownership via HTTP file.
         Expected file: http://<domain>/.well-known/nexbii-verification.txt
@@ -150,12 +284,11 @@ class DNSVerificationService:
             dict: {"verified": bool, "actual_value": str, "error": str}
         """
         try:
-            verification_url = f"http://{domain}/.well-known/nexbii-verification.txt"
-            
-            response = requests.get(verification_url, timeout=10, allow_redirects=True)
-            response.raise_for_status()
+            verification_url = _HTTP_VERIFICATION_URL.format(domain=domain)
             
-            content = response.text.strip()
+            async with _get_http_session().get(verification_url, allow_redirects=True) as response:
+                response.raise_for_status()
+                content = (await response.text()).strip()
             logger.info(f"HTTP verification file content: {content}")
             
             if content == expected_token:
@@ -172,7 +305,7 @@ class DNSVerificationService:
                     "error": f"Token mismatch. Expected: {expected_token}"
                 }
             
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"HTTP verification error: {str(e)}")
             return {
                 "verified": False,
@@ -181,7 +314,7 @@ class DNSVerificationService:
             }
     
     @staticmethod
-    def verify_domain(domain: str, verification_method: str, verification_token: str) -> Dict[str, any]:
+    async def verify_domain(domain: str, verification_method: str, verification_token: str) -> Dict[str, any]:
         """
         Verify domain using specified method.
         
@@ -193,15 +326,22 @@ class DNSVerificationService:
         Returns:
             dict: Verification result
         """
+        key = (domain, verification_method, verification_token)
+        now = time.monotonic()
+        with _verification_cache_lock:
+            entry = _verification_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        
         if verification_method == "cname":
-            expected_value = f"verify-{verification_token}.nexbii.com"
-            return DNSVerificationService.verify_cname_record(domain, expected_value)
+            expected_value = _CNAME_TARGET.format(token=verification_token)
+            result = await DNSVerificationService.verify_cname_record(domain, expected_value)
         
         elif verification_method == "txt":
-            return DNSVerificationService.verify_txt_record(domain, verification_token)
+            result = await DNSVerificationService.verify_txt_record(domain, verification_token)
         
         elif verification_method == "http":
-            return DNSVerificationService.verify_http_file(domain, verification_token)
+            result = await DNSVerificationService.verify_http_file(domain, verification_token)
         
         else:
             return {
@@ -209,74 +349,51 @@ class DNSVerificationService:
                 "actual_value": None,
                 "error": f"Invalid verification method: {verification_method}"
             }
+        
+        ttl = VERIFICATION_CACHE_TTL if result["verified"] else VERIFICATION_FAILURE_CACHE_TTL
+        with _verification_cache_lock:
+            if len(_verification_cache) >= VERIFICATION_CACHE_MAX_ENTRIES:
+                for stale_key in [k for k, (expires_at, _) in _verification_cache.items() if expires_at < now]:
+                    del _verification_cache[stale_key]
+                if len(_verification_cache) >= VERIFICATION_CACHE_MAX_ENTRIES:
+                    _verification_cache.pop(next(iter(_verification_cache)))
+            _verification_cache[key] = (now + ttl, result)
+        return result
     
     @staticmethod
-    def get_verification_instructions(domain: str, verification_method: str, verification_token: str) -> Dict[str, str]:
+    async def verify_domains(items: List[Tuple[str, str, str]]) -> List[Dict[str, any]]:
         """
-        Get user-friendly instructions for domain verification.
+        Verify several domains concurrently.
+        
+        Args:
+            items: (domain, verification_method, verification_token) tuples
         
         Returns:
-            dict: Instructions for the specified method
+            list: Verification results in the order given
         """
-        if verification_method == "cname":
-            return {
-                "method": "CNAME Record",
-                "title": "Add CNAME Record to Your DNS",
-                "instructions": f"""
-                1. Log in to your domain registrar (GoDaddy, Namecheap, etc.)
-                2. Navigate to DNS Management for {domain}
-                3. Add a new CNAME record:
-                   - Host/Name: {domain}
-                   - Points to: verify-{verification_token}.nexbii.com
-                   - TTL: 3600 (or default)
-                4. Save the record
-                5. Wait 5-10 minutes for DNS propagation
-                6. Click "Verify Domain" below
-                """,
-                "record_type": "CNAME",
-                "host": domain,
-                "value": f"verify-{verification_token}.nexbii.com"
-            }
+        semaphore = asyncio.Semaphore(BULK_VERIFICATION_CONCURRENCY)
         
-        elif verification_method == "txt":
-            return {
-                "method": "TXT Record",
-                "title": "Add TXT Record to Your DNS",
-                "instructions": f"""
-                1. Log in to your domain registrar (GoDaddy, Namecheap, etc.)
-                2. Navigate to DNS Management for {domain}
-                3. Add a new TXT record:
-                   - Host/Name: {domain} (or @)
-                   - Value: nexbii-verification={verification_token}
-                   - TTL: 3600 (or default)
-                4. Save the record
-                5. Wait 5-10 minutes for DNS propagation
-                6. Click "Verify Domain" below
-                """,
-                "record_type": "TXT",
-                "host": domain,
-                "value": f"nexbii-verification={verification_token}"
-            }
+        async def verify_one(domain: str, method: str, token: str) -> Dict[str, any]:
+            async with semaphore:
+                return await DNSVerificationService.verify_domain(domain, method, token)
         
-        elif verification_method == "http":
-            return {
-                "method": "HTTP File",
-                "title": "Upload Verification File to Your Website",
-                "instructions": f"""
-                1. Create a file named: nexbii-verification.txt
-                2. Add this content to the file: {verification_token}
-                3. Upload the file to: http://{domain}/.well-known/nexbii-verification.txt
-                4. Make sure the file is publicly accessible
-                5. Click "Verify Domain" below
-                """,
-                "file_name": "nexbii-verification.txt",
-                "file_content": verification_token,
-                "file_location": f"http://{domain}/.well-known/nexbii-verification.txt"
-            }
+        return await asyncio.gather(*(verify_one(*item) for item in items))
+    
+    @staticmethod
+    async def close() -> None:
+        """Close the shared HTTP session (called on application shutdown)"""
+        global _http_session
+        if _http_session is not None:
+            await _http_session.close()
+            _http_session = None
+    
+    @staticmethod
+    def get_verification_instructions(domain: str, verification_method: str, verification_token: str) -> Dict[str, str]:
+        """
+        Get user-friendly instructions for domain verification.
         
-        return {
-            "method": "Unknown",
-            "title": "Invalid Verification Method",
-            "instructions": "Please select a valid verification method.",
-            "error": f"Unknown method: {verification_method}"
-        }
+        Returns:
+            dict: Instructions for the specified method
+        """
+        # Copy so callers can't mutate the memoized dict
+        return dict(_build_instructions(domain, verification_method, verification_token))
@@ -5,13 +5,29 @@ To configure real SMTP, update the settings in this file and set MOCK_EMAIL=Fals
 """
 
 import os
+import asyncio
+import atexit
+import importlib.util
 import logging
-from typing import List, Optional
+import queue
+import ssl
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from functools import lru_cache
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.image import MIMEImage
+from jinja2 import DictLoader, Environment
+from markupsafe import Markup
+from email.utils import formataddr
+
+from .email_template_service import get_bytecode_cache, minify_html, register_template
+
+# smtplib, email.message and aiosmtplib are imported where mail is actually
+# sent, so workers running in mock mode never load them
+if TYPE_CHECKING:
+    import smtplib
+    from email.message import EmailMessage
+
+AIOSMTPLIB_AVAILABLE = importlib.util.find_spec("aiosmtplib") is not None
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +39,326 @@ SMTP_USER = os.getenv("SMTP_USER", "your-email@gmail.com")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "your-app-password")
 FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@nexbii.com")
 FROM_NAME = os.getenv("FROM_NAME", "NexBII Analytics")
+_FROM_HEADER = formataddr((FROM_NAME, FROM_EMAIL))
+# Wider RCPT lists are split across several DATA transactions
+SMTP_MAX_RECIPIENTS_PER_MESSAGE = int(os.getenv("SMTP_MAX_RECIPIENTS_PER_MESSAGE", "50"))
+_UNDISCLOSED_RECIPIENTS = "undisclosed-recipients:;"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "5"))
+# Connections are recycled after this many messages, per common provider limits
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Pooled connections idle longer than this are NOOP-checked before reuse
+SMTP_IDLE_CHECK_SECONDS = int(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+
+# HTML bodies are compiled once at import; autoescape keeps names, comments
+# and URLs from being interpreted as markup
+_ENV = Environment(loader=DictLoader({}), autoescape=True, bytecode_cache=get_bytecode_cache())
+
+# Rules common to every notification email; each template only adds its
+# accent colours and its own blocks
+_ENV.globals["shared_css"] = Markup(minify_html("""
+    body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+    .header { color: white; padding: 20px; text-align: center; }
+    .content { padding: 20px; }
+    .button { display: inline-block; color: white; padding: 12px 24px;
+              text-decoration: none; border-radius: 6px; margin: 20px 0; }
+    .footer { background: #f4f4f4; padding: 15px; text-align: center;
+              font-size: 12px; color: #666; }
+    """))
+
+_SUBSCRIPTION_HTML = register_template(_ENV, "subscription.html", minify_html("""
+        <html>
+            <head>
+                <style>
+                    {{ shared_css }}
+                    .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }
+                    .button { background: #667eea; }
+                </style>
+            </head>
+            <body>
+                <div class="header">
+                    <h1>📊 {{ dashboard_name }}</h1>
+                    <p>{{ frequency.title() }} Report - {{ report_date }}</p>
+                </div>
+                <div class="content">
+                    <p>Hello!</p>
+                    <p>Here's your {{ frequency }} dashboard report for <strong>{{ dashboard_name }}</strong>.</p>
+                    <p>Click the button below to view your interactive dashboard:</p>
+                    <center>
+                        <a href="{{ dashboard_url }}" class="button">View Dashboard</a>
+                    </center>
+                    <p>This email was sent as part of your {{ frequency }} subscription. 
+                       You can manage your subscriptions in your dashboard settings.</p>
+                </div>
+                <div class="footer">
+                    <p>© 2024 NexBII Analytics Platform | Business Intelligence Made Simple</p>
+                </div>
+            </body>
+        </html>
+        """))
+
+_ALERT_HTML = register_template(_ENV, "alert.html", minify_html("""
+        <html>
+            <head>
+                <style>
+                    {{ shared_css }}
+                    .header { background: #ef4444; }
+                    .alert-box { background: #fef2f2; border-left: 4px solid #ef4444; 
+                                 padding: 15px; margin: 20px 0; }
+                    .metric { font-size: 24px; font-weight: bold; color: #ef4444; }
+                </style>
+            </head>
+            <body>
+                <div class="header">
+                    <h1>🔔 Alert Triggered</h1>
+                    <p>{{ alert_name }}</p>
+                </div>
+                <div class="content">
+                    <p>An alert condition has been met for your query <strong>{{ query_name }}</strong>.</p>
+                    
+                    <div class="alert-box">
+                        <p><strong>Condition:</strong> {{ condition_description }}</p>
+                        <p><strong>Actual Value:</strong> <span class="metric">{{ actual_value }}</span></p>
+                        <p><strong>Threshold:</strong> {{ threshold_value }}</p>
+                    </div>
+                    
+                    <p>Triggered at: {{ triggered_at }}</p>
+                    
+                    <p>Please review your data and take appropriate action if needed.</p>
+                </div>
+                <div class="footer">
+                    <p>© 2024 NexBII Analytics Platform | Intelligent Alerts & Monitoring</p>
+                </div>
+            </body>
+        </html>
+        """))
+
+_MENTION_HTML = register_template(_ENV, "mention.html", minify_html("""
+        <html>
+            <head>
+                <style>
+                    {{ shared_css }}
+                    .header { background: #3b82f6; }
+                    .button { background: #3b82f6; }
+                    .comment-box { background: #eff6ff; border-left: 4px solid #3b82f6; 
+                                   padding: 15px; margin: 20px 0; font-style: italic; }
+                </style>
+            </head>
+            <body>
+                <div class="header">
+                    <h1>💬 You were mentioned!</h1>
+                </div>
+                <div class="content">
+                    <p><strong>{{ mentioned_by }}</strong> mentioned you in a comment on 
+                       {{ entity_type }} <strong>{{ entity_name }}</strong>:</p>
+                    
+                    <div class="comment-box">
+                        "{{ comment_text }}"
+                    </div>
+                    
+                    <center>
+                        <a href="{{ entity_url }}" class="button">View & Reply</a>
+                    </center>
+                </div>
+                <div class="footer">
+                    <p>© 2024 NexBII Analytics Platform | Collaboration Made Easy</p>
+                </div>
+            </body>
+        </html>
+        """))
+
+# Plain-text part of the mention email; a str.format skeleton since plain
+# text must not be HTML-escaped
+_MENTION_TEXT = """
+        💬 YOU WERE MENTIONED!
+        
+        {mentioned_by} mentioned you in a comment on {entity_type} "{entity_name}":
+        
+        "{comment_text}"
+        
+        View and reply at: {entity_url}
+        """
+
+
+@lru_cache(maxsize=256)
+def _render_subscription(
+    dashboard_name: str,
+    dashboard_url: str,
+    frequency: str,
+    report_date: str
+) -> Tuple[str, str]:
+    """Render the subscription HTML and text bodies, shared by all subscribers of a dashboard on a given day"""
+    html_content = _SUBSCRIPTION_HTML.render(
+        dashboard_name=dashboard_name,
+        dashboard_url=dashboard_url,
+        frequency=frequency,
+        report_date=report_date
+    )
+    
+    text_content = f"""
+        {dashboard_name}
+        {frequency.title()} Report - {report_date}
+        
+        Hello!
+        
+        Here's your {frequency} dashboard report for {dashboard_name}.
+        
+        View your dashboard at: {dashboard_url}
+        
+        This email was sent as part of your {frequency} subscription.
+        """
+    return html_content, text_content
+
+
+class _ResumingSSLContext:
+    """SSLContext wrapper that offers the last TLS session for resumption on reconnect"""
+    
+    def __init__(self, context: ssl.SSLContext):
+        self.base = context
+        self.session: Optional[ssl.SSLSession] = None
+    
+    def wrap_socket(self, sock, **kwargs):
+        if self.session is not None:
+            kwargs.setdefault("session", self.session)
+        return self.base.wrap_socket(sock, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+
+@lru_cache(maxsize=1)
+def _get_ssl_context() -> _ResumingSSLContext:
+    """Process-wide TLS context, created (and CA store loaded) on first real send"""
+    return _ResumingSSLContext(ssl.create_default_context())
+
 
 class EmailService:
     """Email service with mock mode for development"""
     
+    # Pool of warm, authenticated SMTP connections; STARTTLS and AUTH are
+    # paid once per connection rather than once per message
+    _smtp_pool: "queue.Queue[smtplib.SMTP]" = queue.Queue(maxsize=SMTP_POOL_SIZE)
+    
+    @staticmethod
+    def _connect_smtp() -> "smtplib.SMTP":
+        """Open an SMTP connection, resuming the previous TLS session when possible"""
+        import smtplib
+        
+        ssl_context = _get_ssl_context()
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+        try:
+            server.ehlo()
+            server.starttls(context=ssl_context)
+            server.ehlo()
+            server.login(SMTP_USER, SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        session = getattr(server.sock, "session", None)
+        if session is not None:
+            ssl_context.session = session
+        # Counts messages so the connection can be recycled
+        server.messages_sent = 0
+        return server
+    
+    @classmethod
+    def get_smtp(cls) -> "smtplib.SMTP":
+        """Check out a warm SMTP connection from the pool, connecting if none is idle"""
+        while True:
+            try:
+                server = cls._smtp_pool.get_nowait()
+            except queue.Empty:
+                return cls._connect_smtp()
+            if time.monotonic() - server.last_used < SMTP_IDLE_CHECK_SECONDS or cls._is_alive(server):
+                return server
+            server.close()
+    
+    @staticmethod
+    def _is_alive(server: "smtplib.SMTP") -> bool:
+        """NOOP health check for a connection that sat idle long enough to be dropped by the server"""
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+    
+    @classmethod
+    def release_smtp(cls, server: "smtplib.SMTP") -> None:
+        """Return a connection to the pool, or close it once it is used up"""
+        if server.messages_sent < SMTP_MAX_MESSAGES_PER_CONNECTION:
+            server.last_used = time.monotonic()
+            try:
+                cls._smtp_pool.put_nowait(server)
+                return
+            except queue.Full:
+                pass
+        cls._quit(server)
+    
+    @classmethod
+    def close_smtp(cls) -> None:
+        """Close all pooled SMTP connections (call at the end of a send job)"""
+        while True:
+            try:
+                server = cls._smtp_pool.get_nowait()
+            except queue.Empty:
+                return
+            cls._quit(server)
+    
+    @staticmethod
+    def _quit(server: "smtplib.SMTP") -> None:
+        import smtplib
+        
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    @classmethod
+    def _send_message(
+        cls,
+        server: "smtplib.SMTP",
+        msg: "EmailMessage",
+        to_addrs: Optional[List[str]] = None
+    ) -> "smtplib.SMTP":
+        """Send over server, reconnecting once if it was dropped; returns the live connection"""
+        import smtplib
+        
+        try:
+            server.send_message(msg, to_addrs=to_addrs)
+        except smtplib.SMTPServerDisconnected:
+            server.close()
+            server = cls._connect_smtp()
+            try:
+                server.send_message(msg, to_addrs=to_addrs)
+            except Exception:
+                # The caller only holds the dropped connection, so the new one
+                # is closed here
+                cls._quit(server)
+                raise
+        server.messages_sent += 1
+        return server
+    
+    @staticmethod
+    def _build_message(
+        recipients: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> "EmailMessage":
+        """Build a multipart/alternative message (HTML only when there is no text body)"""
+        from email.message import EmailMessage
+        
+        msg = EmailMessage()
+        msg['From'] = _FROM_HEADER
+        msg['To'] = recipients
+        msg['Subject'] = subject
+        
+        # Add text and HTML parts
+        if text_content:
+            msg.set_content(text_content)
+            msg.add_alternative(html_content, subtype='html')
+        else:
+            msg.set_content(html_content, subtype='html')
+        return msg
+    
     @staticmethod
     def send_email(
         to_emails: List[str],
@@ -35,51 +367,125 @@ class EmailService:
         text_content: Optional[str] = None
     ) -> bool:
         """
-        Send email to recipients
+        Send email to recipients (only logged when MOCK_EMAIL is set)
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if MOCK_EMAIL:
+            return _send_mock(to_emails, subject, html_content, text_content)
+        return _send_real(to_emails, subject, html_content, text_content)
+    
+    @classmethod
+    def send_many(cls, messages: List["EmailMessage"]) -> int:
+        """
+        Send pre-built messages over a single SMTP connection
         
         Args:
-            to_emails: List of recipient email addresses
-            subject: Email subject
-            html_content: HTML email body
-            text_content: Plain text email body (optional)
+            messages: Messages built with _build_message (or any MIME message)
         
         Returns:
-            bool: True if successful, False otherwise
+            int: Number of messages sent successfully
         """
         if MOCK_EMAIL:
-            # Mock mode - just log the email
-            logger.info(f"📧 [MOCK EMAIL] To: {', '.join(to_emails)}")
-            logger.info(f"📧 [MOCK EMAIL] Subject: {subject}")
-            logger.info(f"📧 [MOCK EMAIL] Content: {text_content or html_content[:100]}...")
-            return True
+            for msg in messages:
+                logger.info("📧 [MOCK EMAIL] To: %s\nSubject: %s", msg['To'], msg['Subject'])
+            return len(messages)
         
+        import smtplib
+        
+        sent = 0
+        server = None
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{FROM_NAME} <{FROM_EMAIL}>"
-            msg['To'] = ', '.join(to_emails)
-            msg['Subject'] = subject
-            
-            # Add text and HTML parts
-            if text_content:
-                part1 = MIMEText(text_content, 'plain')
-                msg.attach(part1)
-            
-            part2 = MIMEText(html_content, 'html')
-            msg.attach(part2)
-            
-            # Send email
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-                server.starttls()
-                server.login(SMTP_USER, SMTP_PASSWORD)
-                server.send_message(msg)
-            
-            logger.info(f"✅ Email sent successfully to {', '.join(to_emails)}")
-            return True
-            
+            server = cls.get_smtp()
+            for msg in messages:
+                if server.messages_sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                    cls._quit(server)
+                    server = None
+                    server = cls._connect_smtp()
+                try:
+                    server = cls._send_message(server, msg)
+                    sent += 1
+                except smtplib.SMTPRecipientsRefused as e:
+                    logger.error(f"❌ Failed to send email to {msg['To']}: {str(e)}")
         except Exception as e:
-            logger.error(f"❌ Failed to send email: {str(e)}")
-            return False
+            logger.error(f"❌ Failed to send email batch: {str(e)}")
+            if server is not None:
+                server.close()
+                server = None
+        finally:
+            if server is not None:
+                cls.release_smtp(server)
+        return sent
+    
+    @staticmethod
+    async def send_many_async(messages: List["EmailMessage"]) -> int:
+        """
+        Send pre-built messages concurrently over up to SMTP_POOL_SIZE connections
+        
+        Falls back to send_many in a worker thread when aiosmtplib is not installed.
+        
+        Returns:
+            int: Number of messages sent successfully
+        """
+        if MOCK_EMAIL or not AIOSMTPLIB_AVAILABLE:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, EmailService.send_many, messages)
+        
+        import aiosmtplib
+        
+        tls_context = _get_ssl_context().base
+        # Workers share one iterator, so each message is taken exactly once
+        pending = iter(messages)
+        
+        async def worker() -> int:
+            sent = 0
+            sent_on_connection = 0
+            smtp = None
+            try:
+                for msg in pending:
+                    if smtp is None or sent_on_connection >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                        if smtp is not None:
+                            await smtp.quit()
+                        smtp = aiosmtplib.SMTP(
+                            hostname=SMTP_HOST, port=SMTP_PORT,
+                            start_tls=True, tls_context=tls_context
+                        )
+                        await smtp.connect()
+                        await smtp.login(SMTP_USER, SMTP_PASSWORD)
+                        sent_on_connection = 0
+                    try:
+                        await smtp.send_message(msg)
+                        sent += 1
+                    except aiosmtplib.SMTPRecipientsRefused as e:
+                        logger.error(f"❌ Failed to send email to {msg['To']}: {str(e)}")
+                    sent_on_connection += 1
+            except Exception as e:
+                logger.error(f"❌ Failed to send email batch: {str(e)}")
+            finally:
+                if smtp is not None and smtp.is_connected:
+                    try:
+                        await smtp.quit()
+                    except (aiosmtplib.SMTPException, OSError):
+                        smtp.close()
+            return sent
+        
+        workers = min(SMTP_POOL_SIZE, len(messages))
+        results = await asyncio.gather(*(worker() for _ in range(workers)))
+        return sum(results)
+    
+    @staticmethod
+    async def send_email_async(
+        to_emails: List[str],
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> bool:
+        """Async counterpart of send_email that does not block the event loop"""
+        if MOCK_EMAIL:
+            return _send_mock(to_emails, subject, html_content, text_content)
+        msg = EmailService._build_message(', '.join(to_emails), subject, html_content, text_content)
+        return await EmailService.send_many_async([msg]) == 1
     
     @staticmethod
     def send_subscription_email(
@@ -93,55 +499,9 @@ class EmailService:
         
         subject = f"Your {frequency.title()} Dashboard Report: {dashboard_name}"
         
-        html_content = f"""
-        <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                             color: white; padding: 20px; text-align: center; }}
-                    .content {{ padding: 20px; }}
-                    .dashboard-link {{ display: inline-block; background: #667eea; color: white; 
-                                     padding: 12px 24px; text-decoration: none; border-radius: 6px; 
-                                     margin: 20px 0; }}
-                    .footer {{ background: #f4f4f4; padding: 15px; text-align: center; 
-                             font-size: 12px; color: #666; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>📊 {dashboard_name}</h1>
-                    <p>{frequency.title()} Report - {datetime.now().strftime('%B %d, %Y')}</p>
-                </div>
-                <div class="content">
-                    <p>Hello!</p>
-                    <p>Here's your {frequency} dashboard report for <strong>{dashboard_name}</strong>.</p>
-                    <p>Click the button below to view your interactive dashboard:</p>
-                    <center>
-                        <a href="{dashboard_url}" class="dashboard-link">View Dashboard</a>
-                    </center>
-                    <p>This email was sent as part of your {frequency} subscription. 
-                       You can manage your subscriptions in your dashboard settings.</p>
-                </div>
-                <div class="footer">
-                    <p>© 2024 NexBII Analytics Platform | Business Intelligence Made Simple</p>
-                </div>
-            </body>
-        </html>
-        """
-        
-        text_content = f"""
-        {dashboard_name}
-        {frequency.title()} Report - {datetime.now().strftime('%B %d, %Y')}
-        
-        Hello!
-        
-        Here's your {frequency} dashboard report for {dashboard_name}.
-        
-        View your dashboard at: {dashboard_url}
-        
-        This email was sent as part of your {frequency} subscription.
-        """
+        html_content, text_content = _render_subscription(
+            dashboard_name, dashboard_url, frequency, datetime.now().strftime('%B %d, %Y')
+        )
         
         return EmailService.send_email([to_email], subject, html_content, text_content)
     
@@ -157,45 +517,16 @@ class EmailService:
         """Send alert notification email"""
         
         subject = f"🔔 Alert Triggered: {alert_name}"
+        triggered_at = datetime.now().strftime('%B %d, %Y at %I:%M %p')
         
-        html_content = f"""
-        <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .header {{ background: #ef4444; color: white; padding: 20px; text-align: center; }}
-                    .content {{ padding: 20px; }}
-                    .alert-box {{ background: #fef2f2; border-left: 4px solid #ef4444; 
-                                 padding: 15px; margin: 20px 0; }}
-                    .metric {{ font-size: 24px; font-weight: bold; color: #ef4444; }}
-                    .footer {{ background: #f4f4f4; padding: 15px; text-align: center; 
-                             font-size: 12px; color: #666; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>🔔 Alert Triggered</h1>
-                    <p>{alert_name}</p>
-                </div>
-                <div class="content">
-                    <p>An alert condition has been met for your query <strong>{query_name}</strong>.</p>
-                    
-                    <div class="alert-box">
-                        <p><strong>Condition:</strong> {condition_description}</p>
-                        <p><strong>Actual Value:</strong> <span class="metric">{actual_value}</span></p>
-                        <p><strong>Threshold:</strong> {threshold_value}</p>
-                    </div>
-                    
-                    <p>Triggered at: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-                    
-                    <p>Please review your data and take appropriate action if needed.</p>
-                </div>
-                <div class="footer">
-                    <p>© 2024 NexBII Analytics Platform | Intelligent Alerts & Monitoring</p>
-                </div>
-            </body>
-        </html>
-        """
+        html_content = _ALERT_HTML.render(
+            alert_name=alert_name,
+            condition_description=condition_description,
+            actual_value=actual_value,
+            threshold_value=threshold_value,
+            query_name=query_name,
+            triggered_at=triggered_at
+        )
         
         text_content = f"""
         🔔 ALERT TRIGGERED: {alert_name}
@@ -206,7 +537,7 @@ class EmailService:
         Actual Value: {actual_value}
         Threshold: {threshold_value}
         
-        Triggered at: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+        Triggered at: {triggered_at}
         
         Please review your data and take appropriate action if needed.
         """
@@ -226,53 +557,98 @@ class EmailService:
         
         subject = f"💬 {mentioned_by} mentioned you in a comment"
         
-        html_content = f"""
-        <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .header {{ background: #3b82f6; color: white; padding: 20px; text-align: center; }}
-                    .content {{ padding: 20px; }}
-                    .comment-box {{ background: #eff6ff; border-left: 4px solid #3b82f6; 
-                                   padding: 15px; margin: 20px 0; font-style: italic; }}
-                    .view-link {{ display: inline-block; background: #3b82f6; color: white; 
-                                 padding: 12px 24px; text-decoration: none; border-radius: 6px; 
-                                 margin: 20px 0; }}
-                    .footer {{ background: #f4f4f4; padding: 15px; text-align: center; 
-                             font-size: 12px; color: #666; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>💬 You were mentioned!</h1>
-                </div>
-                <div class="content">
-                    <p><strong>{mentioned_by}</strong> mentioned you in a comment on 
-                       {entity_type} <strong>{entity_name}</strong>:</p>
-                    
-                    <div class="comment-box">
-                        "{comment_text}"
-                    </div>
-                    
-                    <center>
-                        <a href="{entity_url}" class="view-link">View & Reply</a>
-                    </center>
-                </div>
-                <div class="footer">
-                    <p>© 2024 NexBII Analytics Platform | Collaboration Made Easy</p>
-                </div>
-            </body>
-        </html>
-        """
-        
-        text_content = f"""
-        💬 YOU WERE MENTIONED!
+        html_content = _MENTION_HTML.render(
+            mentioned_by=mentioned_by,
+            comment_text=comment_text,
+            entity_type=entity_type,
+            entity_name=entity_name,
+            entity_url=entity_url
+        )
         
-        {mentioned_by} mentioned you in a comment on {entity_type} "{entity_name}":
+        text_content = _MENTION_TEXT.format(
+            mentioned_by=mentioned_by,
+            comment_text=comment_text,
+            entity_type=entity_type,
+            entity_name=entity_name,
+            entity_url=entity_url
+        )
         
-        "{comment_text}"
+        return EmailService.send_email([to_email], subject, html_content, text_content)
+
+
+# One record per mocked email rather than one per field
+_MOCK_LOG_FORMAT = "📧 [MOCK EMAIL] To: %s\nSubject: %s\nContent: %s..."
+
+
+def _send_mock(
+    to_emails: List[str],
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None
+) -> bool:
+    """Mock mode - just log the email"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            _MOCK_LOG_FORMAT, ', '.join(to_emails), subject, text_content or html_content[:100]
+        )
+    return True
+
+
+def _send_real(
+    to_emails: List[str],
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None
+) -> bool:
+    """
+    Send email to recipients
+    
+    Args:
+        to_emails: List of recipient email addresses
+        subject: Email subject
+        html_content: HTML email body
+        text_content: Plain text email body (optional)
+    
+    Returns:
+        bool: True if successful (or delivered to part of a sharded list), False otherwise
+    """
+    recipients_str = ', '.join(to_emails)
+    try:
+        if len(to_emails) > SMTP_MAX_RECIPIENTS_PER_MESSAGE:
+            # Broadcast: one body, RCPT lists sharded per DATA, recipients kept
+            # out of the headers like a BCC
+            msg = EmailService._build_message(_UNDISCLOSED_RECIPIENTS, subject, html_content, text_content)
+            shards = [
+                to_emails[i:i + SMTP_MAX_RECIPIENTS_PER_MESSAGE]
+                for i in range(0, len(to_emails), SMTP_MAX_RECIPIENTS_PER_MESSAGE)
+            ]
+        else:
+            msg = EmailService._build_message(recipients_str, subject, html_content, text_content)
+            shards = [None]
+        server = EmailService.get_smtp()
+        delivered = 0
+        try:
+            for shard in shards:
+                server = EmailService._send_message(server, msg, to_addrs=shard)
+                delivered += 1
+        except Exception as e:
+            server.close()
+            if not delivered:
+                raise
+            # Earlier shards already went out; reporting failure would make a
+            # caller's retry send them twice
+            failed = sum(len(shard) for shard in shards[delivered:])
+            logger.error(f"❌ Email partially sent: {failed} of {len(to_emails)} recipients failed: {str(e)}")
+            return True
+        EmailService.release_smtp(server)
         
-        View and reply at: {entity_url}
-        """
+        logger.info(f"✅ Email sent successfully to {recipients_str}")
+        return True
         
-        return EmailService.send_email([to_email], subject, html_content, text_content)
+    except Exception as e:
+        logger.error(f"❌ Failed to send email: {str(e)}")
+        return False
+
+
+# Say QUIT to pooled connections when the worker process exits
+atexit.register(EmailService.close_smtp)
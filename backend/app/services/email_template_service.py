@@ -4,10 +4,207 @@ Supports custom branded email templates for multi-tenant deployments.
 """
 
 import os
-from typing import Optional, Dict, List
-from jinja2 import Template
+import re
+import stat
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, Template, TemplateError
+from markupsafe import Markup, escape
 from datetime import datetime
 
+_WHITESPACE_RUN = re.compile(r"\s+")
+
+
+def minify_html(html: str) -> str:
+    """Collapse runs of whitespace in a built-in template (templates with <pre> must not use this)"""
+    return _WHITESPACE_RUN.sub(" ", html).strip()
+
+
+# Compiled bytecode of the built-in templates is persisted so restarted
+# workers skip Jinja's lexer and compiler. Unset: Jinja's default per-user
+# directory, which it creates 0700 and checks the ownership of
+JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR")
+
+
+@lru_cache(maxsize=1)
+def get_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """
+    On-disk bytecode cache, or None if its directory is unusable or could
+    be written by another user (cached bytecode is loaded as code)
+    """
+    if not JINJA_BYTECODE_CACHE_DIR:
+        try:
+            return FileSystemBytecodeCache()
+        except (OSError, RuntimeError):
+            return None
+    
+    try:
+        os.makedirs(JINJA_BYTECODE_CACHE_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(JINJA_BYTECODE_CACHE_DIR)
+    except OSError:
+        return None
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid != os.getuid()
+        or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        return None
+    return FileSystemBytecodeCache(directory=JINJA_BYTECODE_CACHE_DIR)
+
+
+def register_template(env: Environment, name: str, source: str) -> Template:
+    """Add a built-in template to env's DictLoader and load it, so it goes through the bytecode cache"""
+    env.loader.mapping[name] = source
+    return env.get_template(name)
+
+
+# Shared environment so compiled templates can be cached and reused.
+# Autoescape stays off: body_content and subtitle are passed in as HTML.
+_ENV = Environment()
+
+
+# Body templates are compiled once at import. Autoescape is on for them, so
+# names and URLs interpolated into the HTML are escaped.
+_BODY_ENV = Environment(
+    loader=DictLoader({}), autoescape=True, bytecode_cache=get_bytecode_cache()
+)
+
+_WELCOME_BODY = register_template(_BODY_ENV, "welcome_body.html", minify_html("""
+            <p>Hi {{ user_name }},</p>
+            
+            <p>Welcome to {{ company_name }}! 🎉</p>
+            
+            <p>Your account has been successfully created. You can now log in and start exploring powerful analytics and business intelligence features.</p>
+            
+            <center>
+                <a href="{{ login_url }}" class="button">Log In Now</a>
+            </center>
+            
+            <p>If you have any questions or need assistance, please don't hesitate to reach out to our support team.</p>
+            
+            <p>Best regards,<br>
+            The {{ company_name }} Team</p>
+        """))
+
+_PASSWORD_RESET_BODY = register_template(_BODY_ENV, "password_reset_body.html", minify_html("""
+            <p>Hi {{ user_name }},</p>
+            
+            <p>We received a request to reset your password for your {{ company_name }} account.</p>
+            
+            <p>Click the button below to reset your password:</p>
+            
+            <center>
+                <a href="{{ reset_url }}" class="button">Reset Password</a>
+            </center>
+            
+            <p><strong>This link will expire in {{ expiry_hours }} hours.</strong></p>
+            
+            <p>If you didn't request this password reset, please ignore this email or contact support if you have concerns.</p>
+            
+            <p>Best regards,<br>
+            The {{ company_name }} Team</p>
+        """))
+
+_INVITATION_BODY = register_template(_BODY_ENV, "invitation_body.html", minify_html("""
+            <p>Hello,</p>
+            
+            <p><strong>{{ inviter_name }}</strong> has invited you to join <strong>{{ organization_name }}</strong> on {{ company_name }} as a <strong>{{ role }}</strong>.</p>
+            
+            <p>Accept the invitation to start collaborating with your team on powerful analytics and dashboards.</p>
+            
+            <center>
+                <a href="{{ invitation_url }}" class="button">Accept Invitation</a>
+            </center>
+            
+            <p>This invitation will expire in 7 days.</p>
+            
+            <p>If you have any questions, feel free to reply to this email.</p>
+            
+            <p>Best regards,<br>
+            The {{ company_name }} Team</p>
+        """))
+
+_DOMAIN_VERIFICATION_BODY = register_template(_BODY_ENV, "domain_verification_body.html", minify_html("""
+            <p>Hi {{ admin_name }},</p>
+            
+            <p>You've added the custom domain <strong>{{ domain }}</strong> to your {{ company_name }} account.</p>
+            
+            <p>To verify ownership of this domain, please follow these instructions:</p>
+            
+            <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid {{ primary_color }}; margin: 20px 0;">
+                <p style="margin: 0;"><strong>{{ instructions_title }}</strong></p>
+                <p style="margin: 10px 0 0 0; white-space: pre-line;">{{ instructions_html }}</p>
+            </div>
+            
+            <p>Once you've completed these steps, return to your dashboard and click "Verify Domain".</p>
+            
+            <p>If you need assistance, our support team is here to help.</p>
+            
+            <p>Best regards,<br>
+            The {{ company_name }} Team</p>
+        """))
+
+
+# Default branding; tenant values override these key by key
+_DEFAULT_BRANDING = {
+    "logo_url": None,
+    "logo_dark_url": None,
+    "primary_color": "#667eea",
+    "secondary_color": "#764ba2",
+    "accent_color": "#3b82f6",
+    "font_family": "Arial, sans-serif",
+    "company_name": "NexBII"
+}
+
+
+@lru_cache(maxsize=128)
+def _compile_base_template(branding: Optional[Tuple]) -> Template:
+    """Compile the base template once per distinct branding"""
+    return _ENV.from_string(minify_html(
+        EmailTemplateService.get_base_template(dict(branding) if branding else None)
+    ))
+
+
+@lru_cache(maxsize=256)
+def _compile_template(template_html: str) -> Template:
+    return _ENV.from_string(template_html)
+
+
+_SIMPLE_VAR = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+_JINJA_SYNTAX = re.compile(r"\{[{%#]")
+_JINJA_LITERALS = frozenset(("true", "false", "none", "True", "False", "None"))
+
+
+@lru_cache(maxsize=256)
+def _simple_skeleton(template_html: str) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    Split a template that only does {{ name }} substitution into literal and
+    variable parts, or return None if it needs the full Jinja engine.
+    """
+    # Jinja normalises \r\n line endings; leave those templates to it
+    if "\r" in template_html:
+        return None
+    parts = _SIMPLE_VAR.split(template_html)
+    literals, names = parts[0::2], parts[1::2]
+    if any(_JINJA_SYNTAX.search(literal) for literal in literals):
+        return None
+    if any(name in _JINJA_LITERALS or name in _ENV.globals for name in names):
+        return None
+    # Jinja drops a single trailing newline from the template source
+    if literals[-1].endswith("\n"):
+        literals[-1] = literals[-1][:-1]
+    return tuple(literals), tuple(names)
+
+
+def _render_simple(skeleton: Tuple[Tuple[str, ...], Tuple[str, ...]], variables: Dict) -> str:
+    """Render a skeleton from _simple_skeleton; missing variables render empty like Jinja's Undefined"""
+    literals, names = skeleton
+    out = [literals[0]]
+    for name, literal in zip(names, literals[1:]):
+        out.append(str(variables.get(name, "")))
+        out.append(literal)
+    return "".join(out)
+
 
 class EmailTemplateService:
     """Service for generating branded email templates"""
@@ -25,16 +222,7 @@ class EmailTemplateService:
         Returns:
             str: Base HTML template
         """
-        # Default branding
-        branding = {
-            "logo_url": tenant_branding.get("logo_url") if tenant_branding else None,
-            "logo_dark_url": tenant_branding.get("logo_dark_url") if tenant_branding else None,
-            "primary_color": tenant_branding.get("primary_color", "#667eea") if tenant_branding else "#667eea",
-            "secondary_color": tenant_branding.get("secondary_color", "#764ba2") if tenant_branding else "#764ba2",
-            "accent_color": tenant_branding.get("accent_color", "#3b82f6") if tenant_branding else "#3b82f6",
-            "font_family": tenant_branding.get("font_family", "Arial, sans-serif") if tenant_branding else "Arial, sans-serif",
-            "company_name": tenant_branding.get("company_name", "NexBII") if tenant_branding else "NexBII"
-        }
+        branding = {**_DEFAULT_BRANDING, **(tenant_branding or {})}
         
         logo_html = ""
         if branding["logo_url"]:
@@ -124,6 +312,27 @@ class EmailTemplateService:
         </html>
         """
     
+    @staticmethod
+    def get_compiled_base_template(tenant_branding: Optional[Dict] = None) -> Template:
+        """
+        Get the compiled base template for a tenant branding, cached per branding.
+        
+        Args:
+            tenant_branding: Dict with logo_url, primary_color, etc.
+        
+        Returns:
+            Template: Compiled Jinja2 base template
+        """
+        if not tenant_branding:
+            return _compile_base_template(None)
+        # Key only on the branding fields so unrelated tenant keys share one entry
+        key = tuple((name, tenant_branding.get(name, default)) for name, default in _DEFAULT_BRANDING.items())
+        try:
+            return _compile_base_template(key)
+        except TypeError:
+            # Unhashable branding values; compile without caching
+            return _ENV.from_string(minify_html(EmailTemplateService.get_base_template(tenant_branding)))
+    
     # ========== Welcome Email ==========
     
     @staticmethod
@@ -134,27 +343,13 @@ class EmailTemplateService:
     ) -> Dict[str, str]:
         """Generate welcome email for new users"""
         
-        base_template = EmailTemplateService.get_base_template(tenant_branding)
+        template = EmailTemplateService.get_compiled_base_template(tenant_branding)
         company_name = tenant_branding.get("company_name", "NexBII") if tenant_branding else "NexBII"
         
-        body_content = f"""
-            <p>Hi {user_name},</p>
-            
-            <p>Welcome to {company_name}! 🎉</p>
-            
-            <p>Your account has been successfully created. You can now log in and start exploring powerful analytics and business intelligence features.</p>
-            
-            <center>
-                <a href="{login_url}" class="button">Log In Now</a>
-            </center>
-            
-            <p>If you have any questions or need assistance, please don't hesitate to reach out to our support team.</p>
-            
-            <p>Best regards,<br>
-            The {company_name} Team</p>
-        """
+        body_content = _WELCOME_BODY.render(
+            user_name=user_name, company_name=company_name, login_url=login_url
+        )
         
-        template = Template(base_template)
         html_content = template.render(
             subject=f"Welcome to {company_name}!",
             title=f"Welcome to {company_name}!",
@@ -195,29 +390,13 @@ class EmailTemplateService:
     ) -> Dict[str, str]:
         """Generate password reset email"""
         
-        base_template = EmailTemplateService.get_base_template(tenant_branding)
+        template = EmailTemplateService.get_compiled_base_template(tenant_branding)
         company_name = tenant_branding.get("company_name", "NexBII") if tenant_branding else "NexBII"
         
-        body_content = f"""
-            <p>Hi {user_name},</p>
-            
-            <p>We received a request to reset your password for your {company_name} account.</p>
-            
-            <p>Click the button below to reset your password:</p>
-            
-            <center>
-                <a href="{reset_url}" class="button">Reset Password</a>
-            </center>
-            
-            <p><strong>This link will expire in {expiry_hours} hours.</strong></p>
-            
-            <p>If you didn't request this password reset, please ignore this email or contact support if you have concerns.</p>
-            
-            <p>Best regards,<br>
-            The {company_name} Team</p>
-        """
+        body_content = _PASSWORD_RESET_BODY.render(
+            user_name=user_name, company_name=company_name, reset_url=reset_url, expiry_hours=expiry_hours
+        )
         
-        template = Template(base_template)
         html_content = template.render(
             subject="Password Reset Request",
             title="Password Reset",
@@ -264,29 +443,14 @@ class EmailTemplateService:
     ) -> Dict[str, str]:
         """Generate invitation email to join tenant"""
         
-        base_template = EmailTemplateService.get_base_template(tenant_branding)
+        template = EmailTemplateService.get_compiled_base_template(tenant_branding)
         company_name = tenant_branding.get("company_name", "NexBII") if tenant_branding else "NexBII"
         
-        body_content = f"""
-            <p>Hello,</p>
-            
-            <p><strong>{inviter_name}</strong> has invited you to join <strong>{organization_name}</strong> on {company_name} as a <strong>{role}</strong>.</p>
-            
-            <p>Accept the invitation to start collaborating with your team on powerful analytics and dashboards.</p>
-            
-            <center>
-                <a href="{invitation_url}" class="button">Accept Invitation</a>
-            </center>
-            
-            <p>This invitation will expire in 7 days.</p>
-            
-            <p>If you have any questions, feel free to reply to this email.</p>
-            
-            <p>Best regards,<br>
-            The {company_name} Team</p>
-        """
+        body_content = _INVITATION_BODY.render(
+            inviter_name=inviter_name, organization_name=organization_name, company_name=company_name,
+            role=role, invitation_url=invitation_url
+        )
         
-        template = Template(base_template)
         html_content = template.render(
             subject=f"You're invited to join {organization_name}",
             title="You're Invited!",
@@ -329,32 +493,20 @@ class EmailTemplateService:
     ) -> Dict[str, str]:
         """Generate domain verification instructions email"""
         
-        base_template = EmailTemplateService.get_base_template(tenant_branding)
+        template = EmailTemplateService.get_compiled_base_template(tenant_branding)
         company_name = tenant_branding.get("company_name", "NexBII") if tenant_branding else "NexBII"
         
-        instructions_html = verification_instructions.get("instructions", "").replace("\n", "<br>")
+        instructions_html = Markup("<br>").join(
+            escape(line) for line in verification_instructions.get("instructions", "").split("\n")
+        )
         
-        body_content = f"""
-            <p>Hi {admin_name},</p>
-            
-            <p>You've added the custom domain <strong>{domain}</strong> to your {company_name} account.</p>
-            
-            <p>To verify ownership of this domain, please follow these instructions:</p>
-            
-            <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid {tenant_branding.get("primary_color", "#667eea") if tenant_branding else "#667eea"}; margin: 20px 0;">
-                <p style="margin: 0;"><strong>{verification_instructions.get("title", "Verification Instructions")}</strong></p>
-                <p style="margin: 10px 0 0 0; white-space: pre-line;">{instructions_html}</p>
-            </div>
-            
-            <p>Once you've completed these steps, return to your dashboard and click "Verify Domain".</p>
-            
-            <p>If you need assistance, our support team is here to help.</p>
-            
-            <p>Best regards,<br>
-            The {company_name} Team</p>
-        """
+        body_content = _DOMAIN_VERIFICATION_BODY.render(
+            admin_name=admin_name, domain=domain, company_name=company_name,
+            primary_color=tenant_branding.get("primary_color", "#667eea") if tenant_branding else "#667eea",
+            instructions_title=verification_instructions.get("title", "Verification Instructions"),
+            instructions_html=instructions_html
+        )
         
-        template = Template(base_template)
         html_content = template.render(
             subject=f"Verify Your Custom Domain: {domain}",
             title="Domain Verification",
@@ -405,23 +557,30 @@ class EmailTemplateService:
         Returns:
             str: Rendered HTML
         """
+        # Compilation is the cacheable step; keep it outside the render try
         try:
-            # If tenant branding provided, wrap in base template
             if tenant_branding:
-                base_template = EmailTemplateService.get_base_template(tenant_branding)
-                template = Template(base_template)
-                
-                # Inject custom content into body
-                variables["body_content"] = template_html
-                variables.setdefault("year", datetime.now().year)
-                variables.setdefault("footer_text", "Powered by NexBII")
-                variables.setdefault("unsubscribe_link", "")
-                
-                return template.render(**variables)
+                # If tenant branding provided, wrap in base template
+                template = EmailTemplateService.get_compiled_base_template(tenant_branding)
             else:
+                # Plain {{ name }} substitution skips the Jinja engine entirely
+                skeleton = _simple_skeleton(template_html)
+                if skeleton is not None:
+                    return _render_simple(skeleton, variables)
+                
                 # Render template as-is
-                template = Template(template_html)
-                return template.render(**variables)
+                template = _compile_template(template_html)
+        except TemplateError as e:
+            return f"<p>Error rendering template: {str(e)}</p>"
         
-        except Exception as e:
+        if tenant_branding:
+            # Inject custom content into body
+            variables["body_content"] = template_html
+            variables.setdefault("year", datetime.now().year)
+            variables.setdefault("footer_text", "Powered by NexBII")
+            variables.setdefault("unsubscribe_link", "")
+        
+        try:
+            return template.render(**variables)
+        except TemplateError as e:
             return f"<p>Error rendering template: {str(e)}</p>"
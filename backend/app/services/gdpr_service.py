@@ -3,13 +3,22 @@ GDPR Compliance Service
 Implements GDPR tools: data export, right to be forgotten, consent management
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 from app.models.user import User
-from app.models.security import ConsentRecord
+from app.models.datasource import DataSource
+from app.models.query import Query
+from app.models.dashboard import Dashboard
+from app.models.security import AuditLog, ConsentRecord, MFAConfig
 from datetime import datetime
-import uuid
 import json
+import orjson
+
+
+# Rows per server-side cursor batch when streaming an export
+EXPORT_BATCH_SIZE = 500
 
 
 class GDPRService:
@@ -18,106 +27,70 @@ class GDPRService:
     def __init__(self, db: Session):
         self.db = db
     
-    def export_user_data(self, user: User) -> Dict[str, Any]:
+    @staticmethod
+    def _export_statements(user_id: str) -> Dict[str, Select]:
         """
-        Export all user data for GDPR compliance
-        
-        Returns comprehensive data package including:
-        - User profile
-        - Data sources
-        - Queries
-        - Dashboards
-        - Activity logs
-        - Consent records
+        Selects for each export section, keyed by section name.
+        
+        Column-level selects: only the exported fields are loaded, without
+        hydrating full ORM entities.
         """
-        data = {
-            "user_profile": {
-                "id": user.id,
-                "email": user.email,
-                "full_name": user.full_name,
-                "role": user.role,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-                "is_active": user.is_active
-            },
-            "data_sources": [],
-            "queries": [],
-            "dashboards": [],
-            "activity_logs": [],
-            "consent_records": [],
-            "exported_at": datetime.utcnow().isoformat()
+        return {
+            "data_sources": select(
+                DataSource.id, DataSource.name, DataSource.type, DataSource.created_at
+            ).where(DataSource.created_by == user_id),
+            "queries": select(
+                Query.id, Query.name, Query.sql_query.label("sql"), Query.created_at
+            ).where(Query.created_by == user_id),
+            "dashboards": select(
+                Dashboard.id, Dashboard.name, Dashboard.description, Dashboard.created_at
+            ).where(Dashboard.created_by == user_id),
+            "activity_logs": select(
+                AuditLog.event_type, AuditLog.action, AuditLog.status, AuditLog.created_at
+            ).where(AuditLog.user_id == user_id).order_by(AuditLog.created_at.desc()).limit(1000),
+            "consent_records": select(
+                ConsentRecord.consent_type, ConsentRecord.version, ConsentRecord.is_granted,
+                ConsentRecord.granted_at, ConsentRecord.revoked_at
+            ).where(ConsentRecord.user_id == user_id),
         }
+    
+    def stream_user_data(self, user: User) -> Iterator[bytes]:
+        """
+        Stream all user data for GDPR compliance as JSON chunks.
         
-        # Get user's data sources
-        from app.models.datasource import DataSource
-        datasources = self.db.query(DataSource).filter(
-            DataSource.created_by == user.id
-        ).all()
-        
-        for ds in datasources:
-            data["data_sources"].append({
-                "id": ds.id,
-                "name": ds.name,
-                "type": ds.type,
-                "created_at": ds.created_at.isoformat() if ds.created_at else None
-            })
-        
-        # Get user's queries
-        from app.models.query import Query
-        queries = self.db.query(Query).filter(
-            Query.created_by == user.id
-        ).all()
-        
-        for q in queries:
-            data["queries"].append({
-                "id": q.id,
-                "name": q.name,
-                "sql": q.sql,
-                "created_at": q.created_at.isoformat() if q.created_at else None
-            })
-        
-        # Get user's dashboards
-        from app.models.dashboard import Dashboard
-        dashboards = self.db.query(Dashboard).filter(
-            Dashboard.created_by == user.id
-        ).all()
-        
-        for d in dashboards:
-            data["dashboards"].append({
-                "id": d.id,
-                "name": d.name,
-                "description": d.description,
-                "created_at": d.created_at.isoformat() if d.created_at else None
-            })
-        
-        # Get user's audit logs
-        from app.models.security import AuditLog
-        logs = self.db.query(AuditLog).filter(
-            AuditLog.user_id == user.id
-        ).order_by(AuditLog.created_at.desc()).limit(1000).all()
-        
-        for log in logs:
-            data["activity_logs"].append({
-                "event_type": log.event_type,
-                "action": log.action,
-                "status": log.status,
-                "created_at": log.created_at.isoformat() if log.created_at else None
-            })
-        
-        # Get consent records
-        consents = self.db.query(ConsentRecord).filter(
-            ConsentRecord.user_id == user.id
-        ).all()
-        
-        for consent in consents:
-            data["consent_records"].append({
-                "consent_type": consent.consent_type,
-                "version": consent.version,
-                "is_granted": consent.is_granted,
-                "granted_at": consent.granted_at.isoformat() if consent.granted_at else None,
-                "revoked_at": consent.revoked_at.isoformat() if consent.revoked_at else None
-            })
-        
-        return data
+        The document holds the user profile, data sources, queries,
+        dashboards, activity logs and consent records.
+        
+        Each section is read through a server-side cursor in batches of
+        EXPORT_BATCH_SIZE rows, so memory stays bounded by one batch.
+        """
+        # Read everything needed from the session now; the generator runs
+        # after the request's session has been closed
+        profile = orjson.dumps({
+            "id": user.id,
+            "email": user.email,
+            "full_name": user.full_name,
+            "role": user.role,
+            "created_at": user.created_at,
+            "is_active": user.is_active
+        })
+        statements = self._export_statements(user.id)
+        bind = self.db.get_bind()
+        
+        def generate() -> Iterator[bytes]:
+            yield b'{"user_profile":' + profile
+            with bind.connect() as conn:
+                streaming = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+                for section, statement in statements.items():
+                    yield b',"' + section.encode() + b'":['
+                    separator = b""
+                    for batch in streaming.execute(statement).partitions():
+                        yield separator + b",".join(orjson.dumps(dict(row._mapping)) for row in batch)
+                        separator = b","
+                    yield b"]"
+            yield b',"exported_at":' + orjson.dumps(datetime.utcnow()) + b"}"
+        
+        return generate()
     
     def delete_user_data(self, user: User) -> Dict[str, Any]:
         """
@@ -136,52 +109,50 @@ class GDPRService:
         }
         
         # Delete data sources
-        from app.models.datasource import DataSource
         ds_count = self.db.query(DataSource).filter(
             DataSource.created_by == user.id
-        ).delete()
+        ).delete(synchronize_session=False)
         summary["items_deleted"]["data_sources"] = ds_count
         
         # Delete queries
-        from app.models.query import Query
         q_count = self.db.query(Query).filter(
             Query.created_by == user.id
-        ).delete()
+        ).delete(synchronize_session=False)
         summary["items_deleted"]["queries"] = q_count
         
         # Delete dashboards
-        from app.models.dashboard import Dashboard
         d_count = self.db.query(Dashboard).filter(
             Dashboard.created_by == user.id
-        ).delete()
+        ).delete(synchronize_session=False)
         summary["items_deleted"]["dashboards"] = d_count
         
         # Anonymize audit logs (don't delete for compliance)
-        from app.models.security import AuditLog
-        logs = self.db.query(AuditLog).filter(
+        log_count = self.db.query(AuditLog).filter(
             AuditLog.user_id == user.id
-        ).all()
-        
-        for log in logs:
-            log.username = "[DELETED USER]"
-            log.user_id = None
+        ).update(
+            {AuditLog.username: "[DELETED USER]", AuditLog.user_id: None},
+            synchronize_session=False
+        )
         
-        summary["items_deleted"]["audit_logs_anonymized"] = len(logs)
+        summary["items_deleted"]["audit_logs_anonymized"] = log_count
         
         # Delete consent records
         consent_count = self.db.query(ConsentRecord).filter(
             ConsentRecord.user_id == user.id
-        ).delete()
+        ).delete(synchronize_session=False)
         summary["items_deleted"]["consent_records"] = consent_count
         
         # Delete MFA config
-        from app.models.security import MFAConfig
         mfa_count = self.db.query(MFAConfig).filter(
             MFAConfig.user_id == user.id
-        ).delete()
+        ).delete(synchronize_session=False)
         summary["items_deleted"]["mfa_configs"] = mfa_count
         
-        # Finally, delete the user
+        # The bulk statements above bypass the session, so reload the
+        # cascaded relationships rather than deleting stale rows twice
+        self.db.expire(user, ["mfa_config", "consent_records"])
+        
+        # Finally, delete the user; everything goes out in a single commit
         self.db.delete(user)
         self.db.commit()
         
@@ -208,7 +179,6 @@ class GDPRService:
             user_agent: User agent
         """
         consent = ConsentRecord(
-            id=str(uuid.uuid4()),
             user_id=user.id,
             tenant_id=user.tenant_id,
             consent_type=consent_type,
@@ -226,6 +196,41 @@ class GDPRService:
         
         return consent
     
+    def record_consents_bulk(
+        self, user_consents: List[Tuple[User, str, str, bool]]
+    ) -> int:
+        """
+        Record many consents at once, e.g. when rolling out a new policy version
+        
+        Args:
+            user_consents: (user, consent_type, version, is_granted) tuples
+        
+        Returns:
+            Number of consent records written
+        """
+        if not user_consents:
+            return 0
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user.id,
+                "tenant_id": user.tenant_id,
+                "consent_type": consent_type,
+                "version": version,
+                "is_granted": is_granted,
+                "granted_at": now if is_granted else None,
+                "revoked_at": None if is_granted else now
+            }
+            for user, consent_type, version, is_granted in user_consents
+        ]
+        
+        # Executemany over one connection, batched into multi-row INSERTs
+        self.db.execute(insert(ConsentRecord), rows)
+        self.db.commit()
+        
+        return len(rows)
+    
     def get_consents(self, user: User) -> List[ConsentRecord]:
         """Get all consent records for user"""
         return self.db.query(ConsentRecord).filter(
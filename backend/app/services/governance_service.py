@@ -3,11 +3,13 @@ Data Governance Service
 Phase 4.4: Data Governance
 """
 import re
+import time
+from functools import lru_cache
 from typing import List, Optional, Dict, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, case, distinct, bindparam, select, union_all
+from sqlalchemy.sql import Select
 from datetime import datetime, timedelta
-import uuid
 
 from app.models.governance import (
     DataCatalogEntry, DataLineage, DataClassificationRule,
@@ -24,26 +26,124 @@ from app.schemas.governance import (
 )
 
 
+# Enabled column-name rules per tenant are reused by PII scans for this many
+# seconds (or until a rule is created)
+SCAN_RULE_CACHE_TTL = 60
+SCAN_RULE_CACHE_MAX_ENTRIES = 1024
+
+
+@lru_cache(maxsize=256)
+def _compile_column_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# Back-references would point at the wrong group once patterns are joined
+_BACKREFERENCE = re.compile(r'\\\d|\(\?P=')
+
+
+@lru_cache(maxsize=64)
+def _fuse_column_patterns(patterns: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """
+    One alternation of all rule patterns, used as a prefilter so a column
+    that matches no rule costs a single search. None if they cannot be fused.
+    """
+    if len(patterns) < 2 or any(_BACKREFERENCE.search(p) for p in patterns):
+        return None
+    try:
+        return re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+    except re.error:
+        return None
+
+
+# Statements for the list endpoints, built once per combination of filters
+# present; the filter values are bound at execution time
+
+@lru_cache(maxsize=None)
+def _catalog_entries_statements(
+    has_datasource: bool,
+    has_table: bool,
+    has_classification: bool,
+    has_pii: bool,
+    has_search: bool
+) -> Tuple[Select, Select]:
+    """(page statement with a windowed total, count statement)"""
+    conditions = [DataCatalogEntry.tenant_id == bindparam("tenant_id")]
+    if has_datasource:
+        conditions.append(DataCatalogEntry.datasource_id == bindparam("datasource_id"))
+    if has_table:
+        conditions.append(DataCatalogEntry.table_name == bindparam("table_name"))
+    if has_classification:
+        conditions.append(DataCatalogEntry.classification_level == bindparam("classification_level"))
+    if has_pii:
+        conditions.append(DataCatalogEntry.is_pii == bindparam("is_pii"))
+    if has_search:
+        search_pattern = bindparam("search_pattern")
+        conditions.append(or_(
+            DataCatalogEntry.table_name.ilike(search_pattern),
+            DataCatalogEntry.column_name.ilike(search_pattern),
+            DataCatalogEntry.description.ilike(search_pattern),
+            DataCatalogEntry.display_name.ilike(search_pattern)
+        ))
+    
+    # The window count carries the unpaginated total on every row, so
+    # the page and the total come back in one round-trip
+    page = select(DataCatalogEntry, func.count().over().label("total"))\
+        .where(*conditions)\
+        .order_by(DataCatalogEntry.created_at.desc())\
+        .limit(bindparam("limit")).offset(bindparam("offset"))
+    count = select(func.count()).select_from(DataCatalogEntry).where(*conditions)
+    return page, count
+
+
+@lru_cache(maxsize=None)
+def _classification_rules_statement(has_enabled: bool) -> Select:
+    statement = select(DataClassificationRule).where(
+        DataClassificationRule.tenant_id == bindparam("tenant_id")
+    )
+    if has_enabled:
+        statement = statement.where(DataClassificationRule.is_enabled == bindparam("is_enabled"))
+    return statement.order_by(DataClassificationRule.priority.desc())
+
+
+@lru_cache(maxsize=None)
+def _access_requests_statement(has_status: bool, has_requester: bool, has_approver: bool) -> Select:
+    statement = select(AccessRequest).where(AccessRequest.tenant_id == bindparam("tenant_id"))
+    if has_status:
+        statement = statement.where(AccessRequest.status == bindparam("status"))
+    if has_requester:
+        statement = statement.where(AccessRequest.requester_id == bindparam("requester_id"))
+    if has_approver:
+        approver_id = bindparam("approver_id")
+        statement = statement.where(or_(
+            AccessRequest.approver_id == approver_id,
+            AccessRequest.compliance_approver_id == approver_id
+        ))
+    return statement.order_by(AccessRequest.created_at.desc())
+
+
 class GovernanceService:
     """Service for data governance operations"""
     
+    # tenant_id -> (expires_at, [(pii_type, compiled pattern)], fused prefilter)
+    _scan_rule_cache: Dict[str, Tuple[float, List[Tuple[PIIType, re.Pattern]], Optional[re.Pattern]]] = {}
+    
     # PII Detection Patterns
     PII_PATTERNS = {
-        PIIType.SSN: r'\b\d{3}-\d{2}-\d{4}\b|\b\d{9}\b',
-        PIIType.EMAIL: r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-        PIIType.PHONE: r'\b(\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b',
-        PIIType.CREDIT_CARD: r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b',
-        PIIType.PASSPORT: r'\b[A-Z]{1,2}\d{6,9}\b',
-        PIIType.DRIVER_LICENSE: r'\b[A-Z]{1,2}\d{5,8}\b',
+        PIIType.SSN: re.compile(r'\b\d{3}-\d{2}-\d{4}\b|\b\d{9}\b'),
+        PIIType.EMAIL: re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+        PIIType.PHONE: re.compile(r'\b(\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b'),
+        PIIType.CREDIT_CARD: re.compile(r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b'),
+        PIIType.PASSPORT: re.compile(r'\b[A-Z]{1,2}\d{6,9}\b'),
+        PIIType.DRIVER_LICENSE: re.compile(r'\b[A-Z]{1,2}\d{5,8}\b'),
     }
     
     COLUMN_NAME_PATTERNS = {
-        PIIType.SSN: r'(ssn|social|security)',
-        PIIType.EMAIL: r'(email|e_mail|mail)',
-        PIIType.PHONE: r'(phone|tel|mobile|cell)',
-        PIIType.CREDIT_CARD: r'(card|cc|credit)',
-        PIIType.ADDRESS: r'(address|addr|street|city|zip|postal)',
-        PIIType.DATE_OF_BIRTH: r'(dob|birth|birthday)',
+        PIIType.SSN: re.compile(r'(ssn|social|security)', re.IGNORECASE),
+        PIIType.EMAIL: re.compile(r'(email|e_mail|mail)', re.IGNORECASE),
+        PIIType.PHONE: re.compile(r'(phone|tel|mobile|cell)', re.IGNORECASE),
+        PIIType.CREDIT_CARD: re.compile(r'(card|cc|credit)', re.IGNORECASE),
+        PIIType.ADDRESS: re.compile(r'(address|addr|street|city|zip|postal)', re.IGNORECASE),
+        PIIType.DATE_OF_BIRTH: re.compile(r'(dob|birth|birthday)', re.IGNORECASE),
     }
     
     # ==================== Data Catalog ====================
@@ -80,38 +180,25 @@ class GovernanceService:
         offset: int = 0
     ) -> Tuple[List[DataCatalogEntry], int]:
         """Get catalog entries with filters"""
-        query = db.query(DataCatalogEntry).filter(
-            DataCatalogEntry.tenant_id == tenant_id
+        page, count = _catalog_entries_statements(
+            bool(datasource_id), bool(table_name), bool(classification_level),
+            is_pii is not None, bool(search_query)
         )
+        params = {
+            "tenant_id": tenant_id,
+            "datasource_id": datasource_id,
+            "table_name": table_name,
+            "classification_level": classification_level,
+            "is_pii": is_pii,
+            "search_pattern": f"%{search_query}%",
+        }
         
-        if datasource_id:
-            query = query.filter(DataCatalogEntry.datasource_id == datasource_id)
-        
-        if table_name:
-            query = query.filter(DataCatalogEntry.table_name == table_name)
-        
-        if classification_level:
-            query = query.filter(DataCatalogEntry.classification_level == classification_level)
-        
-        if is_pii is not None:
-            query = query.filter(DataCatalogEntry.is_pii == is_pii)
-        
-        if search_query:
-            search_pattern = f"%{search_query}%"
-            query = query.filter(
-                or_(
-                    DataCatalogEntry.table_name.ilike(search_pattern),
-                    DataCatalogEntry.column_name.ilike(search_pattern),
-                    DataCatalogEntry.description.ilike(search_pattern),
-                    DataCatalogEntry.display_name.ilike(search_pattern)
-                )
-            )
-        
-        total = query.count()
-        entries = query.order_by(DataCatalogEntry.created_at.desc())\
-                      .limit(limit).offset(offset).all()
+        rows = db.execute(page, {**params, "limit": limit, "offset": offset}).all()
         
-        return entries, total
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        # An empty page past the end still needs the real total
+        return [], db.execute(count, params).scalar_one() if offset else 0
     
     @staticmethod
     def update_catalog_entry(
@@ -150,45 +237,24 @@ class GovernanceService:
     @staticmethod
     def get_catalog_statistics(db: Session, tenant_id: str) -> dict:
         """Get catalog statistics"""
-        total_entries = db.query(DataCatalogEntry).filter(
+        # One conditional-aggregation query instead of a round-trip per figure
+        is_table = DataCatalogEntry.column_name.is_(None)
+        levels = list(ClassificationLevel)
+        row = db.query(
+            func.count(DataCatalogEntry.id),
+            func.count(distinct(case((is_table, DataCatalogEntry.table_name)))),
+            func.count(case((DataCatalogEntry.column_name.isnot(None), 1))),
+            func.count(case((DataCatalogEntry.is_pii == True, 1))),
+            func.count(distinct(DataCatalogEntry.datasource_id)),
+            *[func.count(case((DataCatalogEntry.classification_level == level, 1))) for level in levels]
+        ).filter(
             DataCatalogEntry.tenant_id == tenant_id
-        ).count()
-        
-        total_tables = db.query(DataCatalogEntry.table_name).filter(
-            and_(
-                DataCatalogEntry.tenant_id == tenant_id,
-                DataCatalogEntry.column_name.is_(None)
-            )
-        ).distinct().count()
+        ).one()
         
-        total_columns = db.query(DataCatalogEntry).filter(
-            and_(
-                DataCatalogEntry.tenant_id == tenant_id,
-                DataCatalogEntry.column_name.isnot(None)
-            )
-        ).count()
+        total_entries, total_tables, total_columns, pii_count, datasources_cataloged = row[:5]
         
         # Count by classification level
-        by_classification = {}
-        for level in ClassificationLevel:
-            count = db.query(DataCatalogEntry).filter(
-                and_(
-                    DataCatalogEntry.tenant_id == tenant_id,
-                    DataCatalogEntry.classification_level == level
-                )
-            ).count()
-            by_classification[level.value] = count
-        
-        pii_count = db.query(DataCatalogEntry).filter(
-            and_(
-                DataCatalogEntry.tenant_id == tenant_id,
-                DataCatalogEntry.is_pii == True
-            )
-        ).count()
-        
-        datasources_cataloged = db.query(DataCatalogEntry.datasource_id).filter(
-            DataCatalogEntry.tenant_id == tenant_id
-        ).distinct().count()
+        by_classification = {level.value: count for level, count in zip(levels, row[5:])}
         
         return {
             "total_entries": total_entries,
@@ -225,8 +291,15 @@ class GovernanceService:
         resource_id: str
     ) -> LineageGraph:
         """Build lineage graph for a resource"""
-        # Get all lineage entries for this resource (as source or target)
-        lineages = db.query(DataLineage).filter(
+        # Get all lineage entries for this resource (as source or target);
+        # only the graph's columns are loaded, as plain tuples
+        rows = db.query(
+            DataLineage.source_type, DataLineage.source_id,
+            DataLineage.source_table, DataLineage.source_column,
+            DataLineage.target_type, DataLineage.target_id,
+            DataLineage.target_table, DataLineage.target_column,
+            DataLineage.transformation_type, DataLineage.confidence_score
+        ).filter(
             and_(
                 DataLineage.tenant_id == tenant_id,
                 DataLineage.is_active == True,
@@ -246,35 +319,35 @@ class GovernanceService:
         nodes = {}
         edges = []
         
-        for lineage in lineages:
-            # Add source node
-            source_key = f"{lineage.source_type}:{lineage.source_id}"
+        for (source_type, source_id, source_table, source_column,
+             target_type, target_id, target_table, target_column,
+             transformation, confidence) in rows:
+            source_key = f"{source_type}:{source_id}"
+            target_key = f"{target_type}:{target_id}"
+            
+            # The first lineage entry to mention a node describes it
             if source_key not in nodes:
                 nodes[source_key] = {
                     "id": source_key,
-                    "type": lineage.source_type,
-                    "resource_id": lineage.source_id,
-                    "table": lineage.source_table,
-                    "column": lineage.source_column
+                    "type": source_type,
+                    "resource_id": source_id,
+                    "table": source_table,
+                    "column": source_column
                 }
-            
-            # Add target node
-            target_key = f"{lineage.target_type}:{lineage.target_id}"
             if target_key not in nodes:
                 nodes[target_key] = {
                     "id": target_key,
-                    "type": lineage.target_type,
-                    "resource_id": lineage.target_id,
-                    "table": lineage.target_table,
-                    "column": lineage.target_column
+                    "type": target_type,
+                    "resource_id": target_id,
+                    "table": target_table,
+                    "column": target_column
                 }
             
-            # Add edge
             edges.append({
                 "source": source_key,
                 "target": target_key,
-                "transformation": lineage.transformation_type,
-                "confidence": lineage.confidence_score
+                "transformation": transformation,
+                "confidence": confidence
             })
         
         return LineageGraph(
@@ -295,31 +368,31 @@ class GovernanceService:
         affected_dashboards = []
         affected_users = set()
         
-        # Get lineage where this resource is the source
-        lineages = db.query(DataLineage).filter(
-            and_(
-                DataLineage.tenant_id == tenant_id,
-                DataLineage.source_type == request.affected_resource_type,
-                DataLineage.source_id == request.affected_resource_id,
-                DataLineage.is_active == True
-            )
-        ).all()
+        # Downstream queries and dashboards of this resource with their
+        # owners, resolved by the database in one round-trip
+        is_downstream = and_(
+            DataLineage.tenant_id == tenant_id,
+            DataLineage.source_type == request.affected_resource_type,
+            DataLineage.source_id == request.affected_resource_id,
+            DataLineage.is_active == True
+        )
+        downstream = union_all(
+            select(DataLineage.target_type, DataLineage.target_id, Query.created_by)
+                .join(Query, Query.id == DataLineage.target_id)
+                .where(is_downstream, DataLineage.target_type == "query"),
+            select(DataLineage.target_type, DataLineage.target_id, Dashboard.created_by)
+                .join(Dashboard, Dashboard.id == DataLineage.target_id)
+                .where(is_downstream, DataLineage.target_type == "dashboard")
+        )
         
         # Trace downstream impacts
-        for lineage in lineages:
-            if lineage.target_type == "query":
-                query = db.query(Query).filter(Query.id == lineage.target_id).first()
-                if query:
-                    affected_queries.append(query.id)
-                    if query.created_by:
-                        affected_users.add(query.created_by)
-            
-            elif lineage.target_type == "dashboard":
-                dashboard = db.query(Dashboard).filter(Dashboard.id == lineage.target_id).first()
-                if dashboard:
-                    affected_dashboards.append(dashboard.id)
-                    if dashboard.created_by:
-                        affected_users.add(dashboard.created_by)
+        for target_type, target_id, owner_id in db.execute(downstream):
+            if target_type == "query":
+                affected_queries.append(target_id)
+            else:
+                affected_dashboards.append(target_id)
+            if owner_id:
+                affected_users.add(owner_id)
         
         # Determine impact level
         total_affected = len(affected_queries) + len(affected_dashboards)
@@ -357,7 +430,6 @@ class GovernanceService:
         
         # Save analysis
         analysis = DataImpactAnalysis(
-            id=str(uuid.uuid4()),
             tenant_id=tenant_id,
             change_type=request.change_type,
             affected_resource_type=request.affected_resource_type,
@@ -398,6 +470,7 @@ class GovernanceService:
         db.add(rule)
         db.commit()
         db.refresh(rule)
+        GovernanceService._scan_rule_cache.pop(tenant_id, None)
         return rule
     
     @staticmethod
@@ -407,14 +480,38 @@ class GovernanceService:
         is_enabled: Optional[bool] = None
     ) -> List[DataClassificationRule]:
         """Get classification rules"""
-        query = db.query(DataClassificationRule).filter(
-            DataClassificationRule.tenant_id == tenant_id
-        )
-        
-        if is_enabled is not None:
-            query = query.filter(DataClassificationRule.is_enabled == is_enabled)
-        
-        return query.order_by(DataClassificationRule.priority.desc()).all()
+        statement = _classification_rules_statement(is_enabled is not None)
+        return db.execute(
+            statement, {"tenant_id": tenant_id, "is_enabled": is_enabled}
+        ).scalars().all()
+    
+    @classmethod
+    def _get_scan_rules(
+        cls,
+        db: Session,
+        tenant_id: str
+    ) -> Tuple[List[Tuple[PIIType, re.Pattern]], Optional[re.Pattern]]:
+        """Enabled rules' compiled column-name patterns in priority order, plus their fused prefilter"""
+        now = time.monotonic()
+        entry = cls._scan_rule_cache.get(tenant_id)
+        if entry is not None and entry[0] >= now:
+            return entry[1], entry[2]
+        
+        rules = cls.get_classification_rules(db, tenant_id, is_enabled=True)
+        rule_patterns = [
+            (rule.pii_type, _compile_column_pattern(rule.column_name_pattern))
+            for rule in rules
+            if rule.column_name_pattern
+        ]
+        fused = _fuse_column_patterns(tuple(pattern.pattern for _, pattern in rule_patterns))
+        
+        if len(cls._scan_rule_cache) >= SCAN_RULE_CACHE_MAX_ENTRIES:
+            for stale_key in [k for k, (expires_at, _, _) in cls._scan_rule_cache.items() if expires_at < now]:
+                del cls._scan_rule_cache[stale_key]
+            if len(cls._scan_rule_cache) >= SCAN_RULE_CACHE_MAX_ENTRIES:
+                cls._scan_rule_cache.pop(next(iter(cls._scan_rule_cache)))
+        cls._scan_rule_cache[tenant_id] = (now + SCAN_RULE_CACHE_TTL, rule_patterns, fused)
+        return rule_patterns, fused
     
     @staticmethod
     def scan_for_pii(
@@ -436,8 +533,8 @@ class GovernanceService:
         if not datasource:
             return results
         
-        # Get classification rules
-        rules = GovernanceService.get_classification_rules(db, tenant_id, is_enabled=True)
+        # Get classification rules (compiled, cached per tenant)
+        rule_patterns, fused = GovernanceService._get_scan_rules(db, tenant_id)
         
         # Get schema from datasource (this would need actual DB connection)
         # For now, we'll return mock results or search in catalog
@@ -448,22 +545,34 @@ class GovernanceService:
             )
         ).all()
         
+        # The same column names (id, email, created_at, ...) recur across
+        # tables, so each distinct name is matched against the rules once
+        matches_by_name: Dict[str, List[PIIType]] = {}
+        
         for entry in catalog_entries:
-            if entry.column_name:
+            column_name = entry.column_name
+            if not column_name:
+                continue
+            
+            pii_types = matches_by_name.get(column_name)
+            if pii_types is None:
                 # Check column name against patterns
-                for rule in rules:
-                    if rule.column_name_pattern:
-                        pattern = re.compile(rule.column_name_pattern, re.IGNORECASE)
-                        if pattern.search(entry.column_name or ""):
-                            results.append(ScanResult(
-                                datasource_id=entry.datasource_id,
-                                table_name=entry.table_name,
-                                column_name=entry.column_name,
-                                pii_type=rule.pii_type,
-                                matches_found=1,
-                                confidence_score=80,
-                                sample_values=[]
-                            ))
+                if fused is None or fused.search(column_name):
+                    pii_types = [pii_type for pii_type, pattern in rule_patterns if pattern.search(column_name)]
+                else:
+                    pii_types = []
+                matches_by_name[column_name] = pii_types
+            
+            for pii_type in pii_types:
+                results.append(ScanResult(
+                    datasource_id=entry.datasource_id,
+                    table_name=entry.table_name,
+                    column_name=column_name,
+                    pii_type=pii_type,
+                    matches_found=1,
+                    confidence_score=80,
+                    sample_values=[]
+                ))
         
         return results
     
@@ -516,25 +625,13 @@ class GovernanceService:
         approver_id: Optional[str] = None
     ) -> List[AccessRequest]:
         """Get access requests"""
-        query = db.query(AccessRequest).filter(
-            AccessRequest.tenant_id == tenant_id
-        )
-        
-        if status:
-            query = query.filter(AccessRequest.status == status)
-        
-        if requester_id:
-            query = query.filter(AccessRequest.requester_id == requester_id)
-        
-        if approver_id:
-            query = query.filter(
-                or_(
-                    AccessRequest.approver_id == approver_id,
-                    AccessRequest.compliance_approver_id == approver_id
-                )
-            )
-        
-        return query.order_by(AccessRequest.created_at.desc()).all()
+        statement = _access_requests_statement(bool(status), bool(requester_id), bool(approver_id))
+        return db.execute(statement, {
+            "tenant_id": tenant_id,
+            "status": status,
+            "requester_id": requester_id,
+            "approver_id": approver_id,
+        }).scalars().all()
     
     @staticmethod
     def approve_access_request(
@@ -3,11 +3,64 @@ HIPAA Compliance Service
 Implements HIPAA features: PHI classification, encryption, access controls
 """
 
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
+from sqlalchemy import distinct, func, select
 from sqlalchemy.orm import Session
-from app.models.security import DataClassification, DataClassificationType
+from app.models.security import AuditLog, DataClassification, DataClassificationType
+from app.core.ids import uuid7
 from app.models.user import User
-import uuid
+import re
+
+
+# Column-name keywords suggesting PHI, by category in priority order: the
+# first category with a keyword anywhere in the name wins
+PHI_COLUMN_KEYWORDS = (
+    ("name", ("patient", "name", "first_name", "last_name", "full_name")),
+    ("address", ("address", "street", "city", "state", "zip", "postal")),
+    ("contact", ("phone", "mobile", "tel", "fax", "email")),
+    ("unique_id", (
+        "ssn", "social_security", "mrn", "medical_record",
+        "patient_id", "health_plan"
+    )),
+    ("dates", (
+        "dob", "date_of_birth", "birthdate", "admission_date",
+        "discharge_date"
+    )),
+)
+
+# All keywords in one pattern, group N for the Nth category. The zero-width
+# lookahead is tried at every position without consuming the name, so a
+# single scan sees every occurrence, and at a given position the
+# higher-priority category is tried first
+_PHI_COLUMN_PATTERN = re.compile("(?=" + "|".join(
+    "(" + "|".join(map(re.escape, keywords)) + ")"
+    for _, keywords in PHI_COLUMN_KEYWORDS
+) + ")")
+
+
+def _detect_phi_category(column_lower: str) -> Optional[str]:
+    """Highest-priority PHI category whose keywords occur in the column name"""
+    best = None
+    for match in _PHI_COLUMN_PATTERN.finditer(column_lower):
+        if best is None or match.lastindex < best:
+            best = match.lastindex
+            if best == 1:
+                break
+    return PHI_COLUMN_KEYWORDS[best - 1][0] if best else None
+
+
+@lru_cache(maxsize=4096)
+def _detect_phi_type(column_lower: str) -> Optional[str]:
+    """
+    PHI type for a lower-cased column name, or None. Memoized: the same
+    names (id, email, created_at, ...) recur across tables and schemas.
+    """
+    phi_type = _detect_phi_category(column_lower)
+    if phi_type == "contact":
+        # Contact columns are typed by their prefix (phone, email, ...)
+        phi_type = column_lower.split("_")[0]
+    return phi_type
 
 
 class HIPAAService:
@@ -70,7 +123,7 @@ class HIPAAService:
         
         # Create new classification
         classification = DataClassification(
-            id=str(uuid.uuid4()),
+            id=uuid7(),
             datasource_id=datasource_id,
             table_name=table_name,
             column_name=column_name,
@@ -107,6 +160,16 @@ class HIPAAService:
         Returns:
             List of created classifications
         """
+        # Existing classifications for these tables, loaded in one query
+        existing = {
+            (c.table_name, c.column_name): c
+            for c in self.db.query(DataClassification).filter(
+                DataClassification.datasource_id == datasource_id,
+                DataClassification.tenant_id == tenant_id,
+                DataClassification.table_name.in_(list(schema))
+            )
+        } if schema else {}
+        
         classifications = []
         
         for table_name, columns in schema.items():
@@ -114,68 +177,61 @@ class HIPAAService:
                 # Check if column name suggests PHI
                 column_lower = column_name.lower()
                 
-                is_phi = False
-                phi_type = None
-                
-                # Name patterns
-                if any(pattern in column_lower for pattern in [
-                    "patient", "name", "first_name", "last_name", "full_name"
-                ]):
-                    is_phi = True
-                    phi_type = "name"
-                
-                # Address patterns
-                elif any(pattern in column_lower for pattern in [
-                    "address", "street", "city", "state", "zip", "postal"
-                ]):
-                    is_phi = True
-                    phi_type = "address"
-                
-                # Contact patterns
-                elif any(pattern in column_lower for pattern in [
-                    "phone", "mobile", "tel", "fax", "email"
-                ]):
-                    is_phi = True
-                    phi_type = column_lower.split("_")[0]
+                phi_type = _detect_phi_type(column_lower)
+                if phi_type is None:
+                    continue
+                description = f"Auto-detected as PHI ({phi_type})"
                 
-                # ID patterns
-                elif any(pattern in column_lower for pattern in [
-                    "ssn", "social_security", "mrn", "medical_record",
-                    "patient_id", "health_plan"
-                ]):
-                    is_phi = True
-                    phi_type = "unique_id"
-                
-                # Date patterns (birth, admission, etc.)
-                elif any(pattern in column_lower for pattern in [
-                    "dob", "date_of_birth", "birthdate", "admission_date",
-                    "discharge_date"
-                ]):
-                    is_phi = True
-                    phi_type = "dates"
-                
-                if is_phi:
-                    classification = self.classify_column_as_phi(
+                # Same outcome as classify_column_as_phi, without a
+                # lookup and commit per column
+                classification = existing.get((table_name, column_name))
+                if classification:
+                    classification.classification = DataClassificationType.PHI
+                    classification.masking_rule_id = None
+                    classification.description = description
+                else:
+                    classification = DataClassification(
+                        id=uuid7(),
                         datasource_id=datasource_id,
                         table_name=table_name,
                         column_name=column_name,
+                        classification=DataClassificationType.PHI,
+                        description=description,
+                        detected_by="manual",
                         tenant_id=tenant_id,
-                        user_id=user_id,
-                        description=f"Auto-detected as PHI ({phi_type})"
+                        classified_by=user_id
                     )
-                    classifications.append(classification)
+                    self.db.add(classification)
+                    existing[(table_name, column_name)] = classification
+                classifications.append(classification)
+        
+        if not classifications:
+            return classifications
+        
+        ids = [c.id for c in classifications]
+        
+        # New rows go out as one batched INSERT, all changes in one commit
+        self.db.commit()
+        
+        # Reload the committed rows together rather than one refresh each
+        self.db.query(DataClassification).filter(DataClassification.id.in_(ids)).all()
         
         return classifications
     
     def get_phi_columns(
-        self, datasource_id: str, tenant_id: str
+        self, datasource_id: Optional[str], tenant_id: str
     ) -> List[DataClassification]:
-        """Get all PHI-classified columns for a datasource"""
-        return self.db.query(DataClassification).filter(
-            DataClassification.datasource_id == datasource_id,
+        """Get all PHI-classified columns for a datasource, or for the whole tenant"""
+        # Filters in the order of the (tenant_id, classification, datasource_id) index
+        query = self.db.query(DataClassification).filter(
             DataClassification.tenant_id == tenant_id,
             DataClassification.classification == DataClassificationType.PHI
-        ).all()
+        )
+        
+        if datasource_id:
+            query = query.filter(DataClassification.datasource_id == datasource_id)
+        
+        return query.all()
     
     def generate_hipaa_compliance_report(
         self, tenant_id: str
@@ -185,45 +241,54 @@ class HIPAAService:
         
         Returns summary of PHI classification, access controls, etc.
         """
-        # Get all PHI classifications
-        phi_classifications = self.db.query(DataClassification).filter(
-            DataClassification.tenant_id == tenant_id,
-            DataClassification.classification == DataClassificationType.PHI
-        ).all()
-        
         # Get audit logs related to PHI access
-        from app.models.security import AuditLog
-        phi_access_logs = self.db.query(AuditLog).filter(
+        phi_access_logs = select(func.count()).select_from(AuditLog).where(
             AuditLog.tenant_id == tenant_id,
             AuditLog.resource_type.in_(["datasource", "query"])
-        ).count()
+        ).scalar_subquery()
         
         # Get users with access to PHI
-        from app.models.user import User
-        users_with_access = self.db.query(User).filter(
+        users_with_access = select(func.count()).select_from(User).where(
             User.tenant_id == tenant_id,
             User.is_active == True
-        ).count()
+        ).scalar_subquery()
+        
+        # Every figure in one round-trip, aggregated by the database
+        # rather than by loading the PHI classifications
+        (
+            total_phi_columns, data_sources_with_phi, tables_with_phi,
+            phi_access_logs, users_with_access
+        ) = self.db.execute(
+            select(
+                func.count(DataClassification.id),
+                # NULL datasource_ids count as one source, as they did in the set
+                func.count(distinct(func.coalesce(DataClassification.datasource_id, "None"))),
+                func.count(distinct(
+                    func.coalesce(DataClassification.datasource_id, "None")
+                    + "." + DataClassification.table_name
+                )),
+                phi_access_logs,
+                users_with_access
+            ).where(
+                DataClassification.tenant_id == tenant_id,
+                DataClassification.classification == DataClassificationType.PHI
+            )
+        ).one()
         
         report = {
             "generated_at": "2025-01-01T00:00:00Z",
             "tenant_id": tenant_id,
             "phi_summary": {
-                "total_phi_columns": len(phi_classifications),
-                "data_sources_with_phi": len(set(
-                    c.datasource_id for c in phi_classifications
-                )),
-                "tables_with_phi": len(set(
-                    f"{c.datasource_id}.{c.table_name}" 
-                    for c in phi_classifications
-                ))
+                "total_phi_columns": total_phi_columns,
+                "data_sources_with_phi": data_sources_with_phi,
+                "tables_with_phi": tables_with_phi
             },
             "access_controls": {
                 "users_with_access": users_with_access,
                 "phi_access_events": phi_access_logs
             },
             "compliance_status": {
-                "phi_classification_complete": len(phi_classifications) > 0,
+                "phi_classification_complete": total_phi_columns > 0,
                 "access_logging_enabled": True,
                 "encryption_enabled": True
             }
@@ -1,11 +1,15 @@
 """Integration service for managing email and Slack configurations with encryption"""
 
 import os
+import time
 import logging
-from typing import Optional, Tuple
-from cryptography.fernet import Fernet
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from cryptography.fernet import Fernet, InvalidToken
 import base64
+import redis
 from sqlalchemy.orm import Session
+from ..core.config import settings
 from ..models.integration import Integration
 from ..schemas.integration import EmailConfigCreate, SlackConfigCreate
 
@@ -20,20 +24,97 @@ if not ENCRYPTION_KEY:
     ENCRYPTION_KEY = "dJIqJ2H98c8bzKs4fD7e4j_W0sCmyHalWpsTWmXEJXM="
     logger.warning("⚠️  Using default encryption key. Set INTEGRATION_ENCRYPTION_KEY in production!")
 
+# Decrypted configs are reused for this many seconds (or until saved again)
+CONFIG_CACHE_TTL = 30
+
+# Bumped in Redis on every save, so each worker process drops its cached
+# configs as soon as any process saves new ones
+CONFIG_VERSION_KEY = "integration:config_version"
+
 cipher_suite = Fernet(ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else ENCRYPTION_KEY)
+_encrypt = cipher_suite.encrypt
+_decrypt = cipher_suite.decrypt
+
+
+@lru_cache(maxsize=256)
+def _decrypt_cached(encrypted_value: str) -> str:
+    """
+    Decrypt a stored value. A ciphertext never changes once written, so the
+    configs read on every send are decrypted only once; failures are not cached.
+    """
+    return _decrypt(encrypted_value.encode()).decode()
+
+
+@lru_cache(maxsize=1)
+def _get_redis() -> Optional[redis.Redis]:
+    """
+    Redis client shared by the config caches of all workers, or None when Redis
+    is unreachable. Without it each process only sees its own saves, and other
+    workers pick up new configs when their CONFIG_CACHE_TTL runs out.
+    """
+    try:
+        client = redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1
+        )
+        client.ping()
+        return client
+    except redis.RedisError as e:
+        logger.warning(f"⚠️  Redis unavailable ({e}); integration configs are invalidated per process only")
+        return None
+
+
+def _config_version() -> Optional[str]:
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(CONFIG_VERSION_KEY)
+    except redis.RedisError:
+        return None
+
 
 class IntegrationService:
     """Service for managing encrypted integration configurations"""
     
+    # "email" / "slack" -> (expires_at, config version, config tuple as returned by get_*_config)
+    _config_cache: Dict[str, Tuple[float, Optional[str], Tuple[Any, bool]]] = {}
+    
+    @classmethod
+    def _get_cached_config(cls, key: str, version: Optional[str]) -> Optional[Tuple[Any, bool]]:
+        entry = cls._config_cache.get(key)
+        if entry is None or entry[0] < time.monotonic() or entry[1] != version:
+            return None
+        return entry[2]
+    
+    @classmethod
+    def _store_config(cls, key: str, version: Optional[str], config: Tuple[Any, bool]) -> None:
+        # version is read before the database, so a save racing this read
+        # leaves the entry already outdated rather than stale under the new version
+        cls._config_cache[key] = (time.monotonic() + CONFIG_CACHE_TTL, version, config)
+    
+    @classmethod
+    def _invalidate_configs(cls) -> None:
+        """Drop cached configs in this process and, through Redis, in every other worker"""
+        cls._config_cache.clear()
+        client = _get_redis()
+        if client is not None:
+            try:
+                client.incr(CONFIG_VERSION_KEY)
+            except redis.RedisError as e:
+                logger.warning(f"⚠️  Could not publish integration config change: {e}")
+    
     @staticmethod
     def encrypt_value(value: str) -> str:
         """Encrypt a string value"""
         if not value:
             return ""
         try:
-            encrypted = cipher_suite.encrypt(value.encode())
-            return encrypted.decode()
-        except Exception as e:
+            return _encrypt(value.encode()).decode()
+        except (AttributeError, TypeError, UnicodeError) as e:
+            # Not a str, or not encodable as UTF-8
             logger.error(f"Encryption error: {e}")
             return ""
     
@@ -43,9 +124,12 @@ class IntegrationService:
         if not encrypted_value:
             return ""
         try:
-            decrypted = cipher_suite.decrypt(encrypted_value.encode())
-            return decrypted.decode()
-        except Exception as e:
+            return _decrypt_cached(encrypted_value)
+        except InvalidToken:
+            # Malformed, tampered with, or encrypted under another key
+            logger.error("Decryption error: invalid token")
+            return ""
+        except UnicodeError as e:
             logger.error(f"Decryption error: {e}")
             return ""
     
@@ -63,6 +147,7 @@ class IntegrationService:
             db.add(integration)
             db.commit()
             db.refresh(integration)
+            IntegrationService._invalidate_configs()
             logger.info("Created new integration configuration")
         
         return integration
@@ -89,6 +174,10 @@ class IntegrationService:
         db.commit()
         db.refresh(integration)
         
+        # Don't keep the replaced secrets' plaintext around
+        _decrypt_cached.cache_clear()
+        IntegrationService._invalidate_configs()
+        
         logger.info(f"Email configuration saved by user {user_id}")
         return integration
     
@@ -109,33 +198,54 @@ class IntegrationService:
         db.commit()
         db.refresh(integration)
         
+        # Don't keep the replaced secrets' plaintext around
+        _decrypt_cached.cache_clear()
+        IntegrationService._invalidate_configs()
+        
         logger.info(f"Slack configuration saved by user {user_id}")
         return integration
     
-    @staticmethod
-    def get_email_config(db: Session) -> Tuple[Optional[dict], bool]:
+    @classmethod
+    def get_email_config(cls, db: Session) -> Tuple[Optional[dict], bool]:
         """Get decrypted email configuration"""
+        version = _config_version()
+        cached = cls._get_cached_config("email", version)
+        if cached is not None:
+            email_config, mock_email = cached
+            return (dict(email_config) if email_config else None), mock_email
+        
         integration = db.query(Integration).first()
         
         if not integration:
-            return None, True
-        
-        return {
-            'smtp_host': integration.smtp_host,
-            'smtp_port': int(integration.smtp_port) if integration.smtp_port else 587,
-            'smtp_user': IntegrationService.decrypt_value(integration.smtp_user) if integration.smtp_user else None,
-            'smtp_password': IntegrationService.decrypt_value(integration.smtp_password) if integration.smtp_password else None,
-            'from_email': integration.from_email,
-            'from_name': integration.from_name,
-        }, integration.mock_email
+            config = (None, True)
+        else:
+            config = ({
+                'smtp_host': integration.smtp_host,
+                'smtp_port': int(integration.smtp_port) if integration.smtp_port else 587,
+                'smtp_user': cls.decrypt_value(integration.smtp_user) if integration.smtp_user else None,
+                'smtp_password': cls.decrypt_value(integration.smtp_password) if integration.smtp_password else None,
+                'from_email': integration.from_email,
+                'from_name': integration.from_name,
+            }, integration.mock_email)
+        
+        cls._store_config("email", version, config)
+        return (dict(config[0]) if config[0] else None), config[1]
     
-    @staticmethod
-    def get_slack_config(db: Session) -> Tuple[Optional[str], bool]:
+    @classmethod
+    def get_slack_config(cls, db: Session) -> Tuple[Optional[str], bool]:
         """Get decrypted Slack webhook URL"""
+        version = _config_version()
+        cached = cls._get_cached_config("slack", version)
+        if cached is not None:
+            return cached
+        
         integration = db.query(Integration).first()
         
         if not integration or not integration.slack_webhook_url:
-            return None, True
+            config = (None, True)
+        else:
+            webhook_url = cls.decrypt_value(integration.slack_webhook_url)
+            config = (webhook_url, integration.mock_slack)
         
-        webhook_url = IntegrationService.decrypt_value(integration.slack_webhook_url)
-        return webhook_url, integration.mock_slack
+        cls._store_config("slack", version, config)
+        return config
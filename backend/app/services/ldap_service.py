@@ -5,8 +5,8 @@ LDAP/Active Directory Service
 from typing import Dict, Any, Optional, List
 from sqlalchemy.orm import Session
 from app.models.security import LDAPConfig
+from app.core.ids import uuid7
 from app.models.user import User, UserRole
-import uuid
 
 # Note: For production, use ldap3 library
 # This is a mock implementation for demo purposes
@@ -34,7 +34,7 @@ class LDAPService:
     def create_config(self, tenant_id: str, config_data: Dict[str, Any]) -> LDAPConfig:
         """Create LDAP configuration"""
         config = LDAPConfig(
-            id=str(uuid.uuid4()),
+            id=uuid7(),
             tenant_id=tenant_id,
             **config_data
         )
@@ -171,7 +171,7 @@ class LDAPService:
         role = self.get_user_role(config, ldap_attributes)
         
         user = User(
-            id=str(uuid.uuid4()),
+            id=uuid7(),
             email=email,
             full_name=user_data.get("full_name", email),
             hashed_password=get_password_hash(secrets.token_urlsafe(32)),
@@ -3,22 +3,48 @@ Multi-Factor Authentication (MFA) Service
 Implements TOTP-based MFA with QR codes and backup codes
 """
 
-from typing import Dict, Any, Optional, List
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 from sqlalchemy.orm import Session
 from app.models.security import MFAConfig
+from app.core.ids import uuid7
 from app.models.user import User
 import pyotp
 import qrcode
-import io
+from qrcode.image.svg import SvgPathFillImage
 import base64
+import hashlib
 import secrets
-import uuid
+import time
 from datetime import datetime
 
 
+# Whether a user has MFA enabled is reused for this many seconds; every
+# change to it in this service drops the user's entry
+MFA_STATUS_CACHE_TTL = 60
+
+
+@lru_cache(maxsize=4096)
+def _totp_for(secret_key: str) -> pyotp.TOTP:
+    """TOTP for a user's secret, reused across login attempts"""
+    return pyotp.TOTP(secret_key)
+
+
+def _hash_backup_code(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+def _backup_code_hashes(codes: List[str]) -> Dict[str, bool]:
+    """Stored form of backup codes: SHA-256 hash -> still unused"""
+    return {_hash_backup_code(code): True for code in codes}
+
+
 class MFAService:
     """Service for Multi-Factor Authentication"""
     
+    # user_id -> (expires_at, MFA enabled)
+    _mfa_enabled_cache: Dict[str, Tuple[float, bool]] = {}
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -33,39 +59,39 @@ class MFAService:
                 "backup_codes": List[str]
             }
         """
-        # Check if user already has MFA
-        existing_mfa = self.db.query(MFAConfig).filter(
-            MFAConfig.user_id == user.id
-        ).first()
-        
-        if existing_mfa:
-            # Delete old config to re-enroll
-            self.db.delete(existing_mfa)
-            self.db.commit()
-        
         # Generate secret key
         secret_key = pyotp.random_base32()
         
         # Generate backup codes
         backup_codes = [self._generate_backup_code() for _ in range(10)]
         
-        # Create MFA config (not enabled yet)
-        mfa_config = MFAConfig(
-            id=str(uuid.uuid4()),
-            user_id=user.id,
-            secret_key=secret_key,  # In production, encrypt this
-            backup_codes=backup_codes,  # In production, hash these
-            is_enabled=False,
-            enrollment_completed=False
-        )
+        # Check if user already has MFA
+        mfa_config = self.db.query(MFAConfig).filter(
+            MFAConfig.user_id == user.id
+        ).first()
         
-        self.db.add(mfa_config)
-        self.db.commit()
-        self.db.refresh(mfa_config)
+        if mfa_config:
+            # Re-enroll: reset the existing config in place, so the user is
+            # never left without a row and it all commits at once
+            mfa_config.enrolled_at = None
+            mfa_config.last_used_at = None
+            mfa_config.failed_attempts = 0
+        else:
+            mfa_config = MFAConfig(id=uuid7(), user_id=user.id)
+            self.db.add(mfa_config)
+        
+        # Not enabled until the enrollment is verified
+        mfa_config.secret_key = secret_key  # In production, encrypt this
+        mfa_config.backup_codes = _backup_code_hashes(backup_codes)
+        mfa_config.is_enabled = False
+        mfa_config.enrollment_completed = False
         
         # Generate QR code
         qr_code_url = self._generate_qr_code(user, secret_key)
         
+        self.db.commit()
+        self._mfa_enabled_cache.pop(user.id, None)
+        
         return {
             "secret_key": secret_key,
             "qr_code_url": qr_code_url,
@@ -86,7 +112,7 @@ class MFAService:
             return False
         
         # Verify code
-        totp = pyotp.TOTP(mfa_config.secret_key)
+        totp = _totp_for(mfa_config.secret_key)
         
         if totp.verify(code, valid_window=1):
             # Enable MFA
@@ -94,6 +120,7 @@ class MFAService:
             mfa_config.enrollment_completed = True
             mfa_config.enrolled_at = datetime.utcnow()
             self.db.commit()
+            self._mfa_enabled_cache.pop(user.id, None)
             return True
         
         return False
@@ -118,7 +145,7 @@ class MFAService:
             return False
         
         # Try TOTP code first
-        totp = pyotp.TOTP(mfa_config.secret_key)
+        totp = _totp_for(mfa_config.secret_key)
         if totp.verify(code, valid_window=1):
             mfa_config.last_used_at = datetime.utcnow()
             mfa_config.failed_attempts = 0
@@ -126,9 +153,14 @@ class MFAService:
             return True
         
         # Try backup codes
-        if code in mfa_config.backup_codes:
-            # Remove used backup code
-            mfa_config.backup_codes.remove(code)
+        backup_codes = mfa_config.backup_codes or {}
+        if isinstance(backup_codes, list):
+            # Enrolled before backup codes were stored hashed
+            backup_codes = _backup_code_hashes(backup_codes)
+        code_hash = _hash_backup_code(code)
+        if backup_codes.get(code_hash):
+            # Mark the backup code used; reassign so the JSON column is saved
+            mfa_config.backup_codes = {**backup_codes, code_hash: False}
             mfa_config.last_used_at = datetime.utcnow()
             mfa_config.failed_attempts = 0
             self.db.commit()
@@ -142,6 +174,7 @@ class MFAService:
         if mfa_config.failed_attempts >= 5:
             mfa_config.is_enabled = False
             self.db.commit()
+            self._mfa_enabled_cache.pop(user.id, None)
         
         return False
     
@@ -156,6 +189,7 @@ class MFAService:
         if mfa_config:
             self.db.delete(mfa_config)
             self.db.commit()
+            self._mfa_enabled_cache.pop(user.id, None)
             return True
         
         return False
@@ -197,7 +231,7 @@ class MFAService:
         
         # Generate new backup codes
         backup_codes = [self._generate_backup_code() for _ in range(10)]
-        mfa_config.backup_codes = backup_codes
+        mfa_config.backup_codes = _backup_code_hashes(backup_codes)
         self.db.commit()
         
         return backup_codes
@@ -210,11 +244,13 @@ class MFAService:
         """
         Generate QR code data URL for authenticator apps
         
+        Rendered as SVG, which needs no raster encoding and scales cleanly
+        
         Returns:
-            Data URL string (data:image/png;base64,...)
+            Data URL string (data:image/svg+xml;base64,...)
         """
         # Create provisioning URI
-        totp = pyotp.TOTP(secret_key)
+        totp = _totp_for(secret_key)
         provisioning_uri = totp.provisioning_uri(
             name=user.email,
             issuer_name="NexBII"
@@ -226,18 +262,17 @@ class MFAService:
             error_correction=qrcode.constants.ERROR_CORRECT_L,
             box_size=10,
             border=4,
+            image_factory=SvgPathFillImage,
         )
         qr.add_data(provisioning_uri)
         qr.make(fit=True)
         
-        img = qr.make_image(fill_color="black", back_color="white")
+        img = qr.make_image()
         
         # Convert to data URL
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        img_str = base64.b64encode(buffer.getvalue()).decode()
+        img_str = base64.b64encode(img.to_string()).decode()
         
-        return f"data:image/png;base64,{img_str}"
+        return f"data:image/svg+xml;base64,{img_str}"
     
     def is_mfa_required(self, user: User) -> bool:
         """
@@ -245,10 +280,16 @@ class MFAService:
         
         This can be based on role, tenant policy, etc.
         """
+        cached = self._mfa_enabled_cache.get(user.id)
+        now = time.monotonic()
+        if cached is not None and cached[0] >= now:
+            return cached[1]
+        
         # For now, just check if user has MFA enabled
-        mfa_config = self.db.query(MFAConfig).filter(
+        mfa_enabled = self.db.query(MFAConfig.id).filter(
             MFAConfig.user_id == user.id,
             MFAConfig.is_enabled == True
-        ).first()
+        ).first() is not None
         
-        return mfa_config is not None
+        self._mfa_enabled_cache[user.id] = (now + MFA_STATUS_CACHE_TTL, mfa_enabled)
+        return mfa_enabled
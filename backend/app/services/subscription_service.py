@@ -158,6 +158,9 @@ class SubscriptionService:
                 logger.error(f"Failed to send subscription email: {str(e)}")
                 continue
         
+        # Release the SMTP connection shared across this run
+        EmailService.close_smtp()
+        
         logger.info(f"Sent {sent_count} subscription emails")
         return sent_count
     
@@ -8,6 +8,9 @@ from app.core.security import get_password_hash
 from app.services.websocket_service import socket_app, sio
 from app.core.tenant_context import TenantContextMiddleware
 from app.core.rate_limit_middleware import RateLimitMiddleware
+from app.services.datasource_service import DataSourceService
+from app.services.dns_verification_service import DNSVerificationService
+from app.services.email_service import EmailService
 import uvicorn
 import uuid
 
@@ -92,6 +95,9 @@ async def shutdown_event():
     """Stop background services on shutdown"""
     background_monitor.stop()
     print("🛑 Background monitor stopped")
+    await DataSourceService.close_all()
+    await DNSVerificationService.close()
+    EmailService.close_smtp()
 
 # CORS middleware
 app.add_middleware(
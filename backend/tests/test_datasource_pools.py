@@ -0,0 +1,104 @@
+"""
+Tests for the shared data source connection pools
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.models.datasource import DataSourceType
+from app.services.datasource_service import DataSourceService, _PoolRegistry
+
+
+def _pg_config(host):
+    return {"host": host, "database": "analytics", "user": "bi", "password": "secret"}
+
+
+@pytest.fixture
+def create_pool():
+    """Stand-in asyncpg.create_pool returning a fresh mock pool per call"""
+    with patch("asyncpg.create_pool", AsyncMock(side_effect=lambda **kwargs: Mock(close=AsyncMock()))) as create:
+        yield create
+    asyncio.run(DataSourceService.close_all())
+
+
+class TestDataSourcePools:
+    """Test pool reuse, eviction and closing"""
+
+    def test_pool_reused_for_same_config(self, create_pool):
+        """Test one pool is created per connection config"""
+        async def run():
+            first = await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+            second = await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+            other = await DataSourceService._get_asyncpg_pool(_pg_config("db2"))
+            return first, second, other
+
+        first, second, other = asyncio.run(run())
+        assert first is second
+        assert other is not first
+        assert create_pool.await_count == 2
+
+    def test_close_pools_closes_and_forgets_pool(self, create_pool):
+        """Test closing a data source's pool makes the next use reconnect"""
+        async def run():
+            pool = await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+            await DataSourceService.close_pools(DataSourceType.POSTGRESQL, _pg_config("db1"))
+            return pool, await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+
+        pool, reopened = asyncio.run(run())
+        pool.close.assert_awaited_once()
+        assert reopened is not pool
+
+    def test_close_pools_keeps_pool_shared_with_another_source(self, create_pool):
+        """Test a pool still keyed by another data source's config stays open"""
+        async def run():
+            pool = await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+            in_use = [(DataSourceType.MYSQL, _pg_config("db1")), (DataSourceType.TIMESCALEDB, _pg_config("db1"))]
+            await DataSourceService.close_pools(DataSourceType.POSTGRESQL, _pg_config("db1"), in_use)
+            return pool, await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+
+        pool, reused = asyncio.run(run())
+        pool.close.assert_not_awaited()
+        assert reused is pool
+
+    def test_pool_sharing_types(self):
+        """Test types backed by one registry are reported together"""
+        assert set(DataSourceService.pool_sharing_types(DataSourceType.TIMESCALEDB)) == {
+            DataSourceType.POSTGRESQL, DataSourceType.TIMESCALEDB
+        }
+        assert DataSourceService.pool_sharing_types(DataSourceType.CSV) == []
+
+    def test_least_recently_used_pool_evicted_and_closed(self, create_pool):
+        """Test the pool registry stays bounded and closes what it evicts"""
+        async def run():
+            with patch.object(DataSourceService._asyncpg_pools, "max_entries", 2):
+                db1 = await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+                db2 = await DataSourceService._get_asyncpg_pool(_pg_config("db2"))
+                await DataSourceService._get_asyncpg_pool(_pg_config("db1"))
+                await DataSourceService._get_asyncpg_pool(_pg_config("db3"))
+                # Let the scheduled close run
+                await asyncio.sleep(0)
+            return db1, db2
+
+        db1, db2 = asyncio.run(run())
+        db2.close.assert_awaited_once()
+        db1.close.assert_not_awaited()
+        assert len(DataSourceService._asyncpg_pools) == 2
+
+    def test_close_all_closes_every_pool(self, create_pool):
+        """Test shutdown closes all pooled connections"""
+        async def run():
+            pools = [await DataSourceService._get_asyncpg_pool(_pg_config(host)) for host in ("db1", "db2")]
+            await DataSourceService.close_all()
+            return pools
+
+        for pool in asyncio.run(run()):
+            pool.close.assert_awaited_once()
+        assert len(DataSourceService._asyncpg_pools) == 0
+
+    def test_idle_entries_evicted(self):
+        """Test entries unused past the idle timeout are dropped when a new one is added"""
+        registry = _PoolRegistry(key=lambda config: config, close=Mock(), idle_timeout=0)
+        registry.put("db1", "pool1")
+        assert registry.put("db2", "pool2") == ["pool1"]
+        assert registry.get("db1") is None
+        assert registry.get("db2") == "pool2"
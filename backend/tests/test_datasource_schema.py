@@ -0,0 +1,65 @@
+"""
+Tests for the data source schema endpoint
+"""
+import sqlite3
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.api.v1 import datasources
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.datasource import DataSource, DataSourceType
+from app.services.datasource_service import DataSourceService
+
+
+@pytest.fixture
+def schema_client(db_session, test_user):
+    """Client for the data source routes, authenticated as the test user"""
+    app = FastAPI()
+    app.include_router(datasources.router, prefix="/api/datasources")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: test_user
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def sqlite_source(db_session, test_user, tmp_path):
+    """SQLite data source with one table"""
+    path = tmp_path / "warehouse.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER, total REAL)")
+    datasource = DataSource(
+        id="ds-sqlite", name="Warehouse", type=DataSourceType.SQLITE,
+        connection_config={"database": str(path)}, created_by=test_user.id
+    )
+    db_session.add(datasource)
+    db_session.commit()
+    yield datasource
+    DataSourceService.invalidate_schema(datasource.id)
+
+
+class TestSchemaEndpoint:
+    """Test the schema endpoint"""
+
+    def test_returns_tables(self, schema_client, sqlite_source):
+        """Test the schema is serialized straight to JSON"""
+        response = schema_client.get("/api/datasources/ds-sqlite/schema")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/json"
+        tables = response.json()["tables"]
+        assert [table["name"] for table in tables] == ["orders"]
+
+    def test_schema_response_documented_not_validated(self):
+        """Test SchemaResponse appears in the OpenAPI spec without being the route's response model"""
+        route = next(r for r in datasources.router.routes if r.path == "/{datasource_id}/schema")
+        assert route.response_model is None
+
+        app = FastAPI()
+        app.include_router(datasources.router, prefix="/api/datasources")
+        operation = app.openapi()["paths"]["/api/datasources/{datasource_id}/schema"]["get"]
+        assert operation["responses"]["200"]["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/SchemaResponse"
+        }
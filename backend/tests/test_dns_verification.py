@@ -0,0 +1,71 @@
+"""
+Tests for DNS answer caching in domain verification
+"""
+import asyncio
+import pytest
+import dns.message
+import dns.name
+import dns.rdataclass
+import dns.rdatatype
+import dns.resolver
+import dns.rrset
+
+from app.services import dns_verification_service
+from app.services.dns_verification_service import DNSVerificationService, _PositiveLRUCache
+
+
+def _txt_answer(domain, *values):
+    """Resolver answer for a TXT query of domain, empty (NoAnswer) without values"""
+    qname = dns.name.from_text(domain)
+    response = dns.message.make_response(dns.message.make_query(qname, dns.rdatatype.TXT))
+    if values:
+        rrset = response.find_rrset(response.answer, qname, dns.rdataclass.IN, dns.rdatatype.TXT, create=True)
+        rrset.update(dns.rrset.from_text(qname, 3600, "IN", "TXT", *(f'"{v}"' for v in values)))
+    return dns.resolver.Answer(qname, dns.rdatatype.TXT, dns.rdataclass.IN, response)
+
+
+def _key(domain):
+    return (dns.name.from_text(domain), dns.rdatatype.TXT, dns.rdataclass.IN)
+
+
+@pytest.fixture
+def resolver_cache(monkeypatch):
+    """Fresh resolver cache for each test"""
+    cache = _PositiveLRUCache(max_size=16)
+    monkeypatch.setattr(dns_verification_service._resolver, "cache", cache)
+    return cache
+
+
+class TestResolverCache:
+    """Test which DNS answers the shared resolver keeps"""
+
+    def test_negative_answers_not_cached(self, resolver_cache):
+        """Test NoAnswer/NXDOMAIN results are not held for the SOA negative TTL"""
+        resolver_cache.put(_key("example.com"), _txt_answer("example.com"))
+
+        assert resolver_cache.get(_key("example.com")) is None
+
+    def test_positive_answers_cached(self, resolver_cache):
+        """Test answers with records are cached"""
+        answer = _txt_answer("example.com", "v=spf1 -all")
+        resolver_cache.put(_key("example.com"), answer)
+
+        assert resolver_cache.get(_key("example.com")) is answer
+
+    def test_mismatching_answer_dropped_after_failed_check(self, resolver_cache):
+        """Test a cached record that failed verification is looked up again next time"""
+        resolver_cache.put(_key("example.com"), _txt_answer("example.com", "nexbii-verification=old"))
+
+        result = asyncio.run(DNSVerificationService.verify_txt_record("example.com", "new"))
+
+        assert result["verified"] is False
+        assert resolver_cache.get(_key("example.com")) is None
+
+    def test_matching_answer_kept(self, resolver_cache):
+        """Test a cached record that verifies stays cached"""
+        resolver_cache.put(_key("example.com"), _txt_answer("example.com", "nexbii-verification=tok"))
+
+        result = asyncio.run(DNSVerificationService.verify_txt_record("example.com", "tok"))
+
+        assert result["verified"] is True
+        assert resolver_cache.get(_key("example.com")) is not None
@@ -0,0 +1,97 @@
+"""
+Tests for SMTP connection reuse in the email service
+"""
+import pytest
+import smtplib
+from unittest.mock import Mock, patch
+
+from app.services.email_service import EmailService
+
+
+@pytest.fixture
+def smtp():
+    """Real (non-mock) sending against a stand-in smtplib.SMTP"""
+    with patch("app.services.email_service.MOCK_EMAIL", False), \
+            patch("smtplib.SMTP") as smtp_class:
+        smtp_class.return_value.sock = None
+        yield smtp_class
+        EmailService.close_smtp()
+
+
+class TestSMTPReuse:
+    """Test pooled SMTP connections"""
+
+    def test_send_email_reuses_connection(self, smtp):
+        """Test consecutive sends share one logged-in connection"""
+        assert EmailService.send_email(["a@example.com"], "First", "<p>1</p>") is True
+        assert EmailService.send_email(["b@example.com"], "Second", "<p>2</p>") is True
+
+        assert smtp.call_count == 1
+        server = smtp.return_value
+        server.login.assert_called_once()
+        assert server.send_message.call_count == 2
+
+    def test_reconnects_once_when_dropped(self, smtp):
+        """Test a dropped connection is replaced and the message resent"""
+        server = smtp.return_value
+        server.send_message.side_effect = [smtplib.SMTPServerDisconnected(), None]
+
+        assert EmailService.send_email(["a@example.com"], "Hello", "<p>hi</p>") is True
+        assert smtp.call_count == 2
+        assert server.send_message.call_count == 2
+
+    def test_send_many_uses_one_connection(self, smtp):
+        """Test a batch goes out over a single connection"""
+        messages = [
+            EmailService._build_message(f"user{i}@example.com", "Digest", "<p>hi</p>")
+            for i in range(3)
+        ]
+
+        assert EmailService.send_many(messages) == 3
+        assert smtp.call_count == 1
+        assert smtp.return_value.send_message.call_count == 3
+
+    def test_close_smtp_quits_pooled_connections(self, smtp):
+        """Test closing the pool says QUIT to idle connections"""
+        EmailService.send_email(["a@example.com"], "Hello", "<p>hi</p>")
+
+        EmailService.close_smtp()
+
+        smtp.return_value.quit.assert_called_once()
+
+    def test_mock_mode_opens_no_connection(self):
+        """Test mock mode only logs"""
+        with patch("app.services.email_service.MOCK_EMAIL", True), patch("smtplib.SMTP") as smtp_class:
+            assert EmailService.send_email(["a@example.com"], "Hello", "<p>hi</p>") is True
+            smtp_class.assert_not_called()
+
+    def test_used_up_connection_not_returned_to_pool(self, smtp):
+        """Test a connection is quit instead of pooled after its message limit"""
+        with patch("app.services.email_service.SMTP_MAX_MESSAGES_PER_CONNECTION", 1):
+            EmailService.send_email(["a@example.com"], "Hello", "<p>hi</p>")
+
+        smtp.return_value.quit.assert_called_once()
+        assert EmailService._smtp_pool.empty()
+
+    def test_failed_resend_closes_new_connection(self, smtp):
+        """Test the replacement connection is quit when the resend fails too"""
+        dropped, replacement = Mock(sock=None), Mock(sock=None)
+        smtp.side_effect = [dropped, replacement]
+        dropped.send_message.side_effect = smtplib.SMTPServerDisconnected()
+        replacement.send_message.side_effect = smtplib.SMTPDataError(554, b"rejected")
+
+        assert EmailService.send_email(["a@example.com"], "Hello", "<p>hi</p>") is False
+        replacement.quit.assert_called_once()
+        assert EmailService._smtp_pool.empty()
+
+    def test_partial_shard_delivery_reported_as_sent(self, smtp):
+        """Test a failing later shard does not report the delivered ones as failed"""
+        server = smtp.return_value
+        server.send_message.side_effect = [None, smtplib.SMTPDataError(554, b"rejected")]
+        recipients = [f"user{i}@example.com" for i in range(5)]
+
+        with patch("app.services.email_service.SMTP_MAX_RECIPIENTS_PER_MESSAGE", 2):
+            assert EmailService.send_email(recipients, "Broadcast", "<p>hi</p>") is True
+
+        assert server.send_message.call_count == 2
+        server.close.assert_called_once()
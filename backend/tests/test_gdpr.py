@@ -0,0 +1,93 @@
+"""
+Tests for GDPR data export
+"""
+import json
+import pytest
+from datetime import datetime
+from fastapi import status
+
+from app.core.security import get_current_user
+from app.models.dashboard import Dashboard
+from app.models.datasource import DataSource
+from app.models.query import Query
+from app.models.security import AuditEventCategory, AuditLog, ConsentRecord
+from app.services.gdpr_service import GDPRService
+
+
+@pytest.fixture
+def user_data(db_session, test_user):
+    """Rows owned by the test user, plus one data source of another user"""
+    db_session.add_all([
+        DataSource(id="ds-1", name="Warehouse", type="postgresql", created_by=test_user.id),
+        DataSource(id="ds-2", name="Someone else's", type="mysql", created_by="other-user"),
+        Query(id="q-1", name="Revenue", sql_query="SELECT 1", created_by=test_user.id),
+        Dashboard(id="d-1", name="Sales", description="Weekly sales", created_by=test_user.id),
+        AuditLog(
+            id="log-1", event_type="login", event_category=AuditEventCategory.AUTHENTICATION,
+            action="login", status="success", user_id=test_user.id,
+            created_at=datetime(2024, 1, 2, 3, 4, 5)
+        ),
+        ConsentRecord(
+            user_id=test_user.id, consent_type="privacy_policy", version="2.0",
+            is_granted=True, granted_at=datetime(2024, 1, 1)
+        ),
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def user_client(client, test_user):
+    """Test client authenticated as the test user (the client fixture clears the override)"""
+    from server import app
+    app.dependency_overrides[get_current_user] = lambda: test_user
+    return client
+
+
+class TestGDPRExport:
+    """Test the streamed GDPR data export"""
+
+    def test_stream_user_data_content(self, db_session, test_user, user_data):
+        """Test the streamed chunks form one JSON document with every section"""
+        chunks = list(GDPRService(db_session).stream_user_data(test_user))
+        data = json.loads(b"".join(chunks))
+
+        assert data["user_profile"]["id"] == test_user.id
+        assert data["user_profile"]["email"] == test_user.email
+        assert [ds["id"] for ds in data["data_sources"]] == ["ds-1"]
+        assert data["data_sources"][0]["type"] == "postgresql"
+        assert data["queries"] == [
+            {"id": "q-1", "name": "Revenue", "sql": "SELECT 1", "created_at": data["queries"][0]["created_at"]}
+        ]
+        assert data["dashboards"][0]["description"] == "Weekly sales"
+        assert data["activity_logs"] == [{
+            "event_type": "login", "action": "login", "status": "success",
+            "created_at": "2024-01-02T03:04:05"
+        }]
+        assert data["consent_records"] == [{
+            "consent_type": "privacy_policy", "version": "2.0", "is_granted": True,
+            "granted_at": "2024-01-01T00:00:00", "revoked_at": None
+        }]
+        assert "exported_at" in data
+
+    def test_stream_user_data_without_rows(self, db_session, test_user):
+        """Test sections are empty lists when the user owns nothing"""
+        data = json.loads(b"".join(GDPRService(db_session).stream_user_data(test_user)))
+
+        for section in ("data_sources", "queries", "dashboards", "activity_logs", "consent_records"):
+            assert data[section] == []
+
+    def test_export_streams_document_and_audits_it(self, user_client, db_session, test_user, user_data):
+        """Test the export endpoint returns the document as an attachment and records the export"""
+        response = user_client.get("/api/compliance/gdpr/export")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-disposition"].startswith('attachment; filename="nexbii-export-')
+        assert [q["id"] for q in response.json()["queries"]] == ["q-1"]
+        exports = db_session.query(AuditLog).filter_by(event_type="gdpr_data_export", user_id=test_user.id)
+        assert exports.count() == 1
+
+    def test_download_route_removed(self, user_client, user_data):
+        """Test there is no download-by-id route serving exports for arbitrary ids"""
+        response = user_client.get("/api/compliance/gdpr/download/abc123")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,115 @@
+"""
+Tests for the data governance service
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.governance import ClassificationLevel, DataCatalogEntry
+from app.services.governance_service import GovernanceService
+
+
+@pytest.fixture
+def catalog(db_session):
+    """Five column entries and one table entry for tenant-1, one entry for tenant-2"""
+    created = datetime(2024, 1, 1)
+    entries = [
+        DataCatalogEntry(
+            id=f"col-{i}", tenant_id="tenant-1", datasource_id="ds-1", table_name="customers",
+            column_name=f"field_{i}", is_pii=i < 2,
+            classification_level=ClassificationLevel.CONFIDENTIAL if i < 2 else ClassificationLevel.INTERNAL,
+            created_at=created + timedelta(minutes=i)
+        )
+        for i in range(5)
+    ]
+    entries += [
+        DataCatalogEntry(
+            id="table-orders", tenant_id="tenant-1", datasource_id="ds-2", table_name="orders",
+            column_name=None, description="Customer orders",
+            classification_level=ClassificationLevel.RESTRICTED, created_at=created + timedelta(hours=1)
+        ),
+        DataCatalogEntry(
+            id="other-tenant", tenant_id="tenant-2", datasource_id="ds-3", table_name="customers",
+            column_name="field_0", is_pii=True, classification_level=ClassificationLevel.PUBLIC,
+            created_at=created
+        ),
+    ]
+    db_session.add_all(entries)
+    db_session.commit()
+
+
+class TestCatalogEntries:
+    """Test catalog listing, paging and totals"""
+
+    def test_first_page_with_total(self, db_session, catalog):
+        """Test a page holds the newest entries and the tenant-wide total"""
+        entries, total = GovernanceService.get_catalog_entries(db_session, "tenant-1", limit=2)
+
+        assert [e.id for e in entries] == ["table-orders", "col-4"]
+        assert total == 6
+
+    def test_last_partial_page(self, db_session, catalog):
+        """Test the last page is short but still reports the full total"""
+        entries, total = GovernanceService.get_catalog_entries(db_session, "tenant-1", limit=4, offset=4)
+
+        assert [e.id for e in entries] == ["col-1", "col-0"]
+        assert total == 6
+
+    def test_page_past_the_end_keeps_total(self, db_session, catalog):
+        """Test an empty page beyond the last entry still reports the real total"""
+        entries, total = GovernanceService.get_catalog_entries(db_session, "tenant-1", limit=10, offset=50)
+
+        assert entries == []
+        assert total == 6
+
+    def test_no_matches(self, db_session, catalog):
+        """Test an empty result reports a zero total"""
+        entries, total = GovernanceService.get_catalog_entries(db_session, "tenant-1", search_query="nothing")
+
+        assert entries == []
+        assert total == 0
+
+    def test_filters_and_search(self, db_session, catalog):
+        """Test filters narrow both the page and the total"""
+        entries, total = GovernanceService.get_catalog_entries(db_session, "tenant-1", is_pii=True, limit=1)
+        assert [e.id for e in entries] == ["col-1"]
+        assert total == 2
+
+        entries, total = GovernanceService.get_catalog_entries(db_session, "tenant-1", search_query="orders")
+        assert [e.id for e in entries] == ["table-orders"]
+        assert total == 1
+
+        entries, total = GovernanceService.get_catalog_entries(
+            db_session, "tenant-1", datasource_id="ds-1",
+            classification_level=ClassificationLevel.INTERNAL
+        )
+        assert total == 3
+
+
+class TestCatalogStatistics:
+    """Test catalog statistics"""
+
+    def test_counts(self, db_session, catalog):
+        """Test every figure is counted for the tenant only"""
+        stats = GovernanceService.get_catalog_statistics(db_session, "tenant-1")
+
+        assert stats == {
+            "total_entries": 6,
+            "total_tables": 1,
+            "total_columns": 5,
+            "by_classification": {
+                "public": 0,
+                "internal": 3,
+                "confidential": 2,
+                "restricted": 1,
+            },
+            "pii_count": 2,
+            "datasources_cataloged": 2,
+        }
+
+    def test_empty_catalog(self, db_session):
+        """Test an empty catalog reports zeros"""
+        stats = GovernanceService.get_catalog_statistics(db_session, "tenant-1")
+
+        assert stats["total_entries"] == 0
+        assert stats["datasources_cataloged"] == 0
+        assert set(stats["by_classification"].values()) == {0}
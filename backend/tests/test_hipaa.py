@@ -0,0 +1,70 @@
+"""
+Tests for the HIPAA service
+"""
+import pytest
+
+from app.models.security import DataClassification, DataClassificationType
+from app.services.hipaa_service import HIPAAService
+
+
+class TestAutoDetectPHI:
+    """Test automatic PHI detection"""
+
+    def test_creates_classifications_for_phi_columns(self, db_session, test_user):
+        """Test only PHI-looking columns are classified"""
+        service = HIPAAService(db_session)
+
+        result = service.auto_detect_phi(
+            "ds-1", {"patients": ["id", "first_name", "email", "zip", "visit_count"]}, "tenant-1", test_user.id
+        )
+
+        assert [(c.column_name, c.description) for c in result] == [
+            ("first_name", "Auto-detected as PHI (name)"),
+            ("email", "Auto-detected as PHI (email)"),
+            ("zip", "Auto-detected as PHI (address)"),
+        ]
+        assert db_session.query(DataClassification).count() == 3
+
+    def test_updates_existing_classifications_in_place(self, db_session, test_user):
+        """Test an already classified column is updated rather than duplicated"""
+        db_session.add(DataClassification(
+            id="existing",
+            datasource_id="ds-1",
+            table_name="patients",
+            column_name="email",
+            classification=DataClassificationType.CONFIDENTIAL,
+            masking_rule_id="mask-1",
+            description="Manually classified",
+            tenant_id="tenant-1"
+        ))
+        db_session.commit()
+        service = HIPAAService(db_session)
+
+        result = service.auto_detect_phi("ds-1", {"patients": ["email", "dob"]}, "tenant-1", test_user.id)
+
+        assert [c.column_name for c in result] == ["email", "dob"]
+        assert result[0].id == "existing"
+        rows = db_session.query(DataClassification).filter_by(column_name="email").all()
+        assert len(rows) == 1
+        assert rows[0].classification == DataClassificationType.PHI
+        assert rows[0].masking_rule_id is None
+        assert rows[0].description == "Auto-detected as PHI (email)"
+
+    def test_rows_of_other_tenants_untouched(self, db_session, test_user):
+        """Test a same-named column of another tenant gets its own classification"""
+        db_session.add(DataClassification(
+            id="other-tenant",
+            datasource_id="ds-1",
+            table_name="patients",
+            column_name="email",
+            classification=DataClassificationType.CONFIDENTIAL,
+            tenant_id="tenant-2"
+        ))
+        db_session.commit()
+
+        result = HIPAAService(db_session).auto_detect_phi("ds-1", {"patients": ["email"]}, "tenant-1", test_user.id)
+
+        assert result[0].id != "other-tenant"
+        db_session.expire_all()
+        other = db_session.get(DataClassification, "other-tenant")
+        assert other.classification == DataClassificationType.CONFIDENTIAL
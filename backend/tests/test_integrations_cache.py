@@ -0,0 +1,92 @@
+"""
+Tests for the cached integration configs and their cross-worker invalidation
+"""
+import pytest
+from unittest.mock import patch
+
+from app.models.integration import Integration
+from app.schemas.integration import EmailConfigCreate
+from app.services.integration_service import CONFIG_VERSION_KEY, IntegrationService
+
+
+class FakeRedis:
+    """The two Redis commands the config cache uses"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key) or 0) + 1)
+        return int(self.values[key])
+
+
+@pytest.fixture
+def shared_redis():
+    """Redis shared by all (simulated) workers"""
+    fake = FakeRedis()
+    IntegrationService._config_cache.clear()
+    with patch("app.services.integration_service._get_redis", return_value=fake):
+        yield fake
+    IntegrationService._config_cache.clear()
+
+
+@pytest.fixture
+def integration(db_session):
+    integration = Integration(id="integration-1", smtp_host="smtp.old.example.com", mock_email=False)
+    db_session.add(integration)
+    db_session.commit()
+    return integration
+
+
+class TestConfigCache:
+    """Test integration config caching"""
+
+    def test_config_cached_between_reads(self, db_session, shared_redis, integration):
+        """Test a second read is served from the cache"""
+        IntegrationService.get_email_config(db_session)
+        integration.smtp_host = "smtp.new.example.com"
+        db_session.commit()
+
+        config, mock_email = IntegrationService.get_email_config(db_session)
+
+        assert config["smtp_host"] == "smtp.old.example.com"
+        assert mock_email is False
+
+    def test_save_in_another_worker_invalidates(self, db_session, shared_redis, integration):
+        """Test a version bump by another process makes this one re-read the config"""
+        IntegrationService.get_email_config(db_session)
+        integration.smtp_host = "smtp.new.example.com"
+        db_session.commit()
+        shared_redis.incr(CONFIG_VERSION_KEY)
+
+        config, _ = IntegrationService.get_email_config(db_session)
+
+        assert config["smtp_host"] == "smtp.new.example.com"
+
+    def test_save_publishes_new_version(self, db_session, test_user, shared_redis, integration):
+        """Test saving a config bumps the shared version"""
+        IntegrationService.save_email_config(
+            db_session, test_user.id, EmailConfigCreate(smtp_host="smtp.new.example.com", mock_email=True)
+        )
+
+        assert shared_redis.get(CONFIG_VERSION_KEY) == "1"
+        config, mock_email = IntegrationService.get_email_config(db_session)
+        assert config["smtp_host"] == "smtp.new.example.com"
+        assert mock_email is True
+
+    def test_without_redis_saves_still_invalidate_locally(self, db_session, test_user, integration):
+        """Test the per-process cache still works and is cleared on save when Redis is down"""
+        IntegrationService._config_cache.clear()
+        with patch("app.services.integration_service._get_redis", return_value=None):
+            IntegrationService.get_email_config(db_session)
+            IntegrationService.save_email_config(
+                db_session, test_user.id, EmailConfigCreate(smtp_host="smtp.new.example.com")
+            )
+
+            config, _ = IntegrationService.get_email_config(db_session)
+
+        assert config["smtp_host"] == "smtp.new.example.com"
+        IntegrationService._config_cache.clear()
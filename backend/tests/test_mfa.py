@@ -0,0 +1,94 @@
+"""
+Tests for the MFA service
+"""
+import pytest
+import pyotp
+
+from app.models.security import MFAConfig
+from app.services.mfa_service import MFAService, _hash_backup_code
+
+
+@pytest.fixture
+def mfa_config(db_session, test_user):
+    """Enabled MFA config for the test user"""
+    config = MFAConfig(
+        id="mfa-1",
+        user_id=test_user.id,
+        secret_key=pyotp.random_base32(),
+        backup_codes={_hash_backup_code("ABCD1234"): True},
+        is_enabled=True,
+        enrollment_completed=True,
+        failed_attempts=0
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+
+class TestBackupCodes:
+    """Test backup code verification"""
+
+    def test_enrollment_stores_only_hashes(self, db_session, test_user):
+        """Test backup codes handed to the user are not stored in clear"""
+        result = MFAService(db_session).enroll_user(test_user)
+
+        stored = db_session.query(MFAConfig).filter_by(user_id=test_user.id).one().backup_codes
+        assert set(stored) == {_hash_backup_code(code) for code in result["backup_codes"]}
+        assert all(stored.values())
+
+    def test_backup_code_is_single_use(self, db_session, test_user, mfa_config):
+        """Test a hashed backup code verifies once, then is marked used"""
+        service = MFAService(db_session)
+
+        assert service.verify_code(test_user, "ABCD1234") is True
+        assert service.verify_code(test_user, "ABCD1234") is False
+
+        db_session.expire_all()
+        assert mfa_config.backup_codes == {_hash_backup_code("ABCD1234"): False}
+
+    def test_legacy_plaintext_codes_converted_to_hashes(self, db_session, test_user, mfa_config):
+        """Test codes stored as a plain list before hashing still work and are rewritten hashed"""
+        mfa_config.backup_codes = ["OLDCODE1", "OLDCODE2"]
+        db_session.commit()
+        service = MFAService(db_session)
+
+        assert service.verify_code(test_user, "OLDCODE1") is True
+
+        db_session.expire_all()
+        assert mfa_config.backup_codes == {
+            _hash_backup_code("OLDCODE1"): False,
+            _hash_backup_code("OLDCODE2"): True
+        }
+        assert service.verify_code(test_user, "OLDCODE1") is False
+        assert service.verify_code(test_user, "OLDCODE2") is True
+
+    def test_wrong_code_counts_failed_attempt(self, db_session, test_user, mfa_config):
+        """Test an unknown code is rejected and counted"""
+        assert MFAService(db_session).verify_code(test_user, "NOTACODE") is False
+
+        db_session.expire_all()
+        assert mfa_config.failed_attempts == 1
+
+
+class TestTOTP:
+    """Test TOTP verification"""
+
+    def test_current_totp_code_accepted(self, db_session, test_user, mfa_config):
+        """Test the current code verifies, repeatedly, with the cached TOTP"""
+        service = MFAService(db_session)
+        code = pyotp.TOTP(mfa_config.secret_key).now()
+
+        assert service.verify_code(test_user, code) is True
+        assert service.verify_code(test_user, code) is True
+
+    def test_totp_follows_reenrolled_secret(self, db_session, test_user, mfa_config):
+        """Test codes from a replaced secret stop working after re-enrollment"""
+        service = MFAService(db_session)
+        old_code = pyotp.TOTP(mfa_config.secret_key).now()
+
+        new_totp = pyotp.TOTP(service.enroll_user(test_user)["secret_key"])
+
+        # Skip the (one in a few hundred thousand) case of the codes colliding
+        if not new_totp.verify(old_code, valid_window=1):
+            assert service.verify_enrollment(test_user, old_code) is False
+        assert service.verify_enrollment(test_user, new_totp.now()) is True
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { Shield, Download, Trash2, CheckCircle } from 'lucide-react';
+import { saveAs } from 'file-saver';
 import api from '../services/api';
 
 const CompliancePage: React.FC = () => {
@@ -9,9 +10,10 @@ const CompliancePage: React.FC = () => {
   const exportUserData = async () => {
     setLoading(true);
     try {
-      const response = await api.get('/api/compliance/gdpr/export');
-      alert('Data export initiated. You will receive a download link via email.');
-      console.log('Export response:', response.data);
+      const response = await api.get('/api/compliance/gdpr/export', {
+        responseType: 'blob'
+      });
+      saveAs(new Blob([response.data], { type: 'application/json' }), 'nexbii-export.json');
     } catch (error) {
       console.error('Failed to export data:', error);
       alert('Failed to export data');